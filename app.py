@@ -1,17 +1,24 @@
 import streamlit as st
 from langchain_core.messages import HumanMessage, AIMessage
-from simple_graph import graph
-from db.mongodb_client import db
+from simple_graph import get_graph
+from db.chat_threads import ensure_chat_thread_indexes, get_chat_title
 from utils.config import create_chat_config
 from components.chat import create_chat
-from components.sidebar import create_sidebar
+from components.sidebar import create_sidebar, refresh_chat_history
+from utils.chat_titles import get_title_worker
 
-# Initialize MongoDB collection
-collection = db["chat_threads"]
 st.set_page_config(page_title="Local RAG")
+ensure_chat_thread_indexes()
 
+# Load the first page of threads, and reload it when the background title worker has written new titles
+title_version = get_title_worker().version
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = list(collection.find())
+    st.session_state.title_version = title_version
+    refresh_chat_history()
+elif st.session_state.title_version != title_version:
+    st.session_state.title_version = title_version
+    refresh_chat_history(clear_cache=True)
+    st.session_state.chat_title = get_chat_title(st.session_state.config["configurable"]["thread_id"]) or "New Chat"
 
 # Initialize config if not present
 if "config" not in st.session_state:
@@ -27,12 +34,12 @@ if "prev_thread_id" not in st.session_state:
 if st.session_state.prev_thread_id != current_thread_id:
     # Thread ID changed, reload messages
     st.session_state.prev_thread_id = current_thread_id
-    messages = graph.get_state(st.session_state.config).values.get("messages", [])
+    messages = get_graph().get_state(st.session_state.config).values.get("messages", [])
     st.session_state.messages = messages
 
 # Initialize messages if empty
 if "messages" not in st.session_state:
-    messages = graph.get_state(st.session_state.config).values.get("messages", [])
+    messages = get_graph().get_state(st.session_state.config).values.get("messages", [])
     st.session_state.messages = messages
 
 # Display header based on chat history
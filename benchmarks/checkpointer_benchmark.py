@@ -0,0 +1,109 @@
+"""
+Measure checkpoint write latency as thread histories grow, with and without retention.
+
+Several sessions chat concurrently through a small graph whose node returns a
+fixed answer, so only checkpointing is measured. With --state messages the answers
+accumulate like a chat thread, so every checkpoint is larger than the last; with
+--state fixed each turn replaces the previous answer, isolating the cost of a
+growing store. The baseline is the original single-connection SqliteSaver, which
+keeps every checkpoint. Turn latencies are reported per range of turns together
+with the final database and WAL size.
+
+Run from the repository root:
+
+    python -m benchmarks.checkpointer_benchmark --turns 2000 --sessions 4 --state fixed
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, MessagesState, StateGraph
+from typing_extensions import TypedDict
+from db.checkpointer import PooledSqliteSaver
+
+ANSWER = "A typical machine learning engineer role asks for Python, PyTorch and MLOps experience. " * 8
+
+class FixedState(TypedDict):
+    messages: str
+
+def build_graph(checkpointer, state):
+    if state == "messages":
+        workflow = StateGraph(MessagesState)
+        workflow.add_node("generate_answer", lambda state: {"messages": AIMessage(content=ANSWER)})
+    else:
+        workflow = StateGraph(FixedState)
+        workflow.add_node("generate_answer", lambda state: {"messages": ANSWER})
+    workflow.set_entry_point("generate_answer")
+    workflow.add_edge("generate_answer", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+def file_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+def run_scenario(name, make_saver, state, turns, sessions, buckets):
+    directory = tempfile.mkdtemp(prefix="checkpointer-benchmark-")
+    path = os.path.join(directory, "checkpoints.db")
+    graph = build_graph(make_saver(path), state)
+    latencies = [[] for _ in range(turns)]
+    lock = threading.Lock()
+
+    def session(index):
+        config = {"configurable": {"thread_id": f"session-{index}"}}
+        for turn in range(turns):
+            start = time.perf_counter()
+            graph.invoke({"messages": f"Question {turn}"}, config)
+            with lock:
+                latencies[turn].append(time.perf_counter() - start)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=session, args=(index,)) for index in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    size = max(1, turns // buckets)
+    by_turns = {}
+    for first in range(0, turns, size):
+        samples = sorted(sample for turn in latencies[first:first + size] for sample in turn)
+        by_turns[f"{first + 1}-{min(first + size, turns)}"] = {
+            "p50_ms": round(statistics.median(samples) * 1000, 2),
+            "p95_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 2),
+        }
+
+    return {
+        "scenario": name,
+        "state": state,
+        "sessions": sessions,
+        "turns": turns,
+        "elapsed_s": round(elapsed, 2),
+        "turns_per_s": round(turns * sessions / elapsed, 1),
+        "latency_by_turn": by_turns,
+        "store_mb": round(file_size(path) / 1e6, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200, help="Turns per session")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent sessions")
+    parser.add_argument("--buckets", type=int, default=4, help="Number of turn ranges to report")
+    parser.add_argument("--state", choices=["messages", "fixed"], default="fixed", help="Shape of the graph state")
+    parser.add_argument("--keep-last", type=int, default=20, help="Retention of the pooled saver")
+    args = parser.parse_args()
+
+    scenarios = [
+        ("single connection, keep all",
+         lambda path: SqliteSaver(sqlite3.connect(path, check_same_thread=False))),
+        (f"pooled, keep last {args.keep_last}",
+         lambda path: PooledSqliteSaver(path, keep_last=args.keep_last, maintenance_every=200)),
+    ]
+    results = [run_scenario(name, make_saver, args.state, args.turns, args.sessions, args.buckets) for name, make_saver in scenarios]
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,67 @@
+"""
+Report how much boilerplate cleaning and near-duplicate filtering shrink the chunk corpus.
+
+A fixture corpus of r.jina.ai-style SEEK pages is generated by benchmarks.seek_pages:
+every page carries the site navigation, scam warning, similar-jobs sidebar and
+footer, adverts of one company share its 'about us' and benefits text, all of them
+share an equal-opportunity statement, and some adverts are reposted under a new
+job ID with small edits. The corpus is chunked as populate_database does (1) raw,
+(2) after clean_job_markdown and (3) after cleaning and the SimHash near-duplicate
+filter, and the chunks and characters that would be embedded are counted.
+
+Run from the repository root:
+
+    python -m benchmarks.chunk_dedup_benchmark --postings 500 --repost-rate 0.15
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("JINA_API_KEY", "benchmark")
+os.environ.setdefault("MONGODB_DATABASE", "benchmark")
+
+from benchmarks.seek_pages import job_documents, make_corpus
+from populate_database import calculate_chunk_ids, split_documents
+from utils.near_duplicates import NearDuplicateFilter
+
+def describe(chunks, seconds):
+    return {
+        "chunks": len(chunks),
+        "characters": sum(len(chunk.page_content) for chunk in chunks),
+        "distinct_texts": len({chunk.page_content for chunk in chunks}),
+        "seconds": round(seconds, 3),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--postings", type=int, default=500)
+    parser.add_argument("--repost-rate", type=float, default=0.15, help="Share of postings that repost an earlier advert")
+    parser.add_argument("--max-distance", type=int, default=3, help="SimHash bits two near-duplicates may differ in")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pages = make_corpus(args.postings, args.repost_rate, args.seed)
+
+    start = time.perf_counter()
+    raw = calculate_chunk_ids(split_documents(job_documents(pages, clean=False)))
+    raw_report = describe(raw, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    cleaned = calculate_chunk_ids(split_documents(job_documents(pages, clean=True)))
+    cleaned_report = describe(cleaned, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    near_duplicates = NearDuplicateFilter(args.max_distance)
+    deduplicated = near_duplicates.filter(cleaned)
+    deduplicated_report = describe(deduplicated, time.perf_counter() - start)
+
+    print(json.dumps({
+        "postings": args.postings,
+        "raw": raw_report,
+        "cleaned": cleaned_report,
+        "cleaned_and_deduplicated": deduplicated_report,
+        "near_duplicates_dropped": near_duplicates.dropped,
+        "chunk_reduction": round(1 - len(deduplicated) / len(raw), 3),
+        "character_reduction": round(1 - deduplicated_report["characters"] / raw_report["characters"], 3),
+    }, indent=2))
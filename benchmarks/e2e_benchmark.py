@@ -0,0 +1,286 @@
+"""
+End-to-end benchmark of scraping, ingestion and chat against local stand-ins for every service.
+
+Nothing leaves the machine:
+- Jina is a local aiohttp server (benchmarks.fake_jina) serving SEEK-style pages.
+- OpenAI and Ollama chat models and the embeddings are deterministic fakes with
+  configurable latency (benchmarks.fakes).
+- Tavily is a fake search tool.
+- Mongo is mongomock unless --mongo-uri points at a real server.
+- Chroma, the checkpointer and the answer cache write to a temporary directory.
+
+The suite measures:
+- scrape_job_documents throughput;
+- ingestion through repost skipping, split_documents and add_to_chroma;
+- per-node latency of the RAG graph (graph.py) and the chat graph (simple_graph.py);
+- Streamlit-free chat turns (simple_graph.get_response): time to first token,
+  turn latency and answer cache hits;
+- how often each router tier decides;
+- the events recorded by utils.instrumentation, summarized by kind and name.
+
+Progress output goes to stderr. The results are printed to stdout as JSON and
+written to --output if given, so runs can be compared for regressions.
+
+Run from the repository root:
+
+    python -m benchmarks.e2e_benchmark --postings 200 --llm-latency 0.2 --output e2e.json
+"""
+from collections import Counter
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+# The graph modules copy these into the environment at import; none of them is used
+for variable in ("JINA_API_KEY", "OPENAI_API_KEY", "TAVILY_API_KEY"):
+    os.environ.setdefault(variable, "benchmark")
+os.environ.setdefault("MONGODB_DATABASE", "benchmark")
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings, fake_search_tool, use_mongomock
+from benchmarks.fake_jina import FakeJinaServer
+from benchmarks.seek_pages import make_corpus
+
+QUESTIONS = [
+    "What skills do machine learning engineer roles in Sydney need?",
+    "Which companies are hiring MLOps engineers?",
+    "Do data scientist positions ask for a PhD?",
+    "What cloud platforms do the job ads ask for?",
+    "What is the latest news about tech layoffs?",
+    "What frameworks like PyTorch or TensorFlow do the postings mention?",
+]
+
+def latency_summary(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {"n": 0}
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 2),
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)] * 1000, 2),
+    }
+
+async def bench_scrape(corpus, latency, concurrency):
+    from models.job_brief_model import JobBriefModel
+    from scraper.jobs_scraper import scrape_job_documents
+
+    pages = {job_id: page for job_id, page, _ in corpus}
+    server = FakeJinaServer(latency=latency, body=lambda job_id: pages[job_id])
+    base_url = await server.start()
+    briefs = [JobBriefModel(company_name="", job_id=job_id, role="", location="") for job_id in pages]
+    try:
+        start = time.perf_counter()
+        documents = await scrape_job_documents(briefs, base_url=base_url, rate_limit=60000, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.stop()
+    return documents, {
+        "postings": len(briefs),
+        "fetched": len(documents),
+        "seconds": round(elapsed, 3),
+        "postings_per_s": round(len(documents) / elapsed, 1),
+    }
+
+def bench_ingest(documents, chroma_path):
+    from db.posting_index import canonical_documents, ensure_posting_indexes
+    from populate_database import add_to_chroma, split_documents
+
+    timings = {}
+    start = time.perf_counter()
+    ensure_posting_indexes()
+    canonical = canonical_documents(documents)
+    timings["repost_skipping_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = split_documents(canonical)
+    timings["split_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stored = add_to_chroma(chunks, chroma_path)
+    timings["add_to_chroma_s"] = time.perf_counter() - start
+
+    total = sum(timings.values())
+    return {
+        "documents": len(documents),
+        "canonical_documents": len(canonical),
+        "chunks": len(chunks),
+        "chunks_stored": stored,
+        **{name: round(seconds, 3) for name, seconds in timings.items()},
+        "documents_per_s": round(len(documents) / total, 1),
+        "chunks_per_s": round(len(chunks) / total, 1),
+    }
+
+def node_latencies(graph, runs):
+    """
+    Run graph once per (inputs, config) and time each node from the stream of updates.
+
+    A node's latency is the time from the previous update (or the start of the run)
+    to its own update, so it includes any routing done before it.
+    """
+    per_node, totals = {}, []
+    for inputs, config in runs:
+        start = previous = time.perf_counter()
+        for update in graph.stream(inputs, config, stream_mode="updates"):
+            now = time.perf_counter()
+            for node in update:
+                per_node.setdefault(node, []).append(now - previous)
+            previous = now
+        totals.append(time.perf_counter() - start)
+    return {"turn": latency_summary(totals), "nodes": {node: latency_summary(samples) for node, samples in per_node.items()}}
+
+def bench_rag_graph(questions):
+    from graph import get_graph, get_query_router
+    graph = get_graph()
+    runs = [({"question": question}, {"configurable": {"thread_id": str(uuid.uuid4())}}) for question in questions]
+    return {**node_latencies(graph, runs), "router_tiers": get_query_router().metrics()}
+
+def bench_chat(questions, turns, context_budget):
+    from db.chat_threads import create_thread, ensure_chat_thread_indexes
+    from simple_graph import CONTEXT_BUDGETS, get_graph, get_response, wait_for_summary
+    from utils.selection import DEFAULT_MODEL
+
+    ensure_chat_thread_indexes()
+    # Lower the default model's own budget rather than override it per thread, which skips the answer cache
+    CONTEXT_BUDGETS[DEFAULT_MODEL] = context_budget
+    first_tokens, totals, cache_hits, configs = [], [], 0, []
+    for question in questions:
+        thread_id = str(uuid.uuid4())
+        config = {"configurable": {"thread_id": thread_id}}
+        configs.append(config)
+        create_thread(thread_id)
+        for turn in range(turns):
+            query = question if turn == 0 else f"Tell me more about point {turn} of your answer."
+            start = time.perf_counter()
+            first_token = None
+            chunks = 0
+            for _ in get_response(query, config):
+                chunks += 1
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+            totals.append(time.perf_counter() - start)
+            first_tokens.append(first_token)
+            # A cached answer arrives as one chunk instead of streaming token by token
+            cache_hits += turn == 0 and chunks == 1
+
+    for config in configs:
+        wait_for_summary(config)
+
+    # Per-node latency of the chat graph on fresh threads
+    graph = get_graph()
+    runs = [({"messages": question}, {"configurable": {"thread_id": str(uuid.uuid4())}}) for question in questions]
+    return {
+        "turns": len(totals),
+        "answer_cache_hits": cache_hits,
+        "time_to_first_token": latency_summary(first_tokens),
+        "turn_latency": latency_summary(totals),
+        "graph": node_latencies(graph, runs),
+    }
+
+class CollectingSink:
+    """Instrumentation sink keeping the events in memory."""
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, event):
+        self.events.append(event)
+
+def summarize_events(events):
+    """Latency, time to first token and tokens of the recorded events by kind and name."""
+    groups = {}
+    for event in events:
+        groups.setdefault(f"{event['kind']}:{event['name']}", []).append(event)
+    summary = {}
+    for key, group in sorted(groups.items()):
+        summary[key] = {"latency": latency_summary([event["seconds"] for event in group])}
+        first_tokens = [event["time_to_first_token"] for event in group if event.get("time_to_first_token") is not None]
+        if first_tokens:
+            summary[key]["time_to_first_token"] = latency_summary(first_tokens)
+        if any("prompt_tokens" in event for event in group):
+            summary[key]["prompt_tokens"] = sum(event.get("prompt_tokens", 0) for event in group)
+            summary[key]["completion_tokens"] = sum(event.get("completion_tokens", 0) for event in group)
+        if any("hit" in event for event in group):
+            summary[key]["hits"] = sum(event["hit"] for event in group)
+        if any("tier" in event for event in group):
+            summary[key]["tiers"] = dict(Counter(event["tier"] for event in group))
+    return summary
+
+def install_fakes(args, workdir):
+    """Route every external service of the app to its local stand-in."""
+    from db.checkpointer import PooledSqliteSaver, get_checkpointer
+    from utils.embeddings import open_vectorstore, use_embedding_backend
+    from utils.selection import DEFAULT_MODEL, register_chat_model
+
+    embeddings = FakeEmbeddings(latency=args.embed_latency, per_text_latency=args.embed_text_latency)
+    use_embedding_backend(embeddings, embeddings.backend_id)
+    model = FakeChatModel(latency=args.llm_latency, token_latency=args.token_latency,
+                          structured={"RouterAnswer": {"datasource": "vectorstore"}})
+    for model_name in (DEFAULT_MODEL, "gpt-4o-mini"):
+        register_chat_model(model_name, model)
+    get_checkpointer.override(PooledSqliteSaver(os.path.join(workdir, "checkpoints.db")))
+
+    import graph
+    graph.get_vectorstore.override(open_vectorstore(os.path.join(workdir, "chroma")))
+    graph.get_web_search_tool.override(fake_search_tool(args.search_latency))
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="e2e-benchmark-")
+    os.environ["ANSWER_CACHE_PATH"] = os.path.join(workdir, "answers.db")
+    if not args.mongo_uri:
+        use_mongomock()
+    else:
+        os.environ["MONGODB_URI"] = args.mongo_uri
+    # Before anything is built, so the graphs and embeddings are instrumented
+    from utils.instrumentation import get_instrumentation
+    events = CollectingSink()
+    get_instrumentation().add_sink(events)
+    install_fakes(args, workdir)
+
+    corpus = make_corpus(args.postings, args.repost_rate, args.seed)
+    # Questions repeat once the list runs out, so the answer cache is exercised
+    questions = (QUESTIONS * ((args.questions + len(QUESTIONS) - 1) // len(QUESTIONS)))[:args.questions]
+
+    documents, scrape = asyncio.run(bench_scrape(corpus, args.jina_latency, args.concurrency))
+    results = {
+        "scrape": scrape,
+        "ingest": bench_ingest(documents, os.path.join(workdir, "chroma")),
+        "rag_graph": bench_rag_graph(questions),
+        "chat": bench_chat(questions, args.turns, args.context_budget),
+        "instrumentation": summarize_events(events.events),
+    }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--postings", type=int, default=200)
+    parser.add_argument("--repost-rate", type=float, default=0.15)
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent fetches")
+    parser.add_argument("--questions", type=int, default=12, help="Questions asked of each graph")
+    parser.add_argument("--turns", type=int, default=4, help="Turns per chat thread")
+    parser.add_argument("--context-budget", type=int, default=400, help="Chat token budget; low enough to trigger summarization")
+    parser.add_argument("--jina-latency", type=float, default=0.05, help="Seconds per Jina response")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds to a chat model's first token")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Seconds per streamed token")
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="Seconds per embedding call")
+    parser.add_argument("--embed-text-latency", type=float, default=0.0005, help="Seconds per embedded text")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="Seconds per web search")
+    parser.add_argument("--mongo-uri", default=None, help="Use this Mongo server instead of mongomock")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Keep stdout for the results; the app's progress prints go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        results = {"config": vars(args), **main(args)}
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
@@ -0,0 +1,79 @@
+"""
+Compare embedding backends on ingest throughput and query latency.
+
+Each backend embeds the same synthetic job-posting chunks in one call, as
+ingestion does, and then embeds a series of short questions one at a time, as the
+chat does. The embedding cache is bypassed so every text is actually computed.
+Backends that cannot start here (no API key, no network to fetch a model) are
+reported with their error instead of failing the run.
+
+Run from the repository root:
+
+    python -m benchmarks.embedding_benchmark --docs 2000 --queries 50 --backends hashing onnx openai
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from utils.embeddings import build_embeddings
+
+SKILLS = ["Python", "PyTorch", "TensorFlow", "Kubernetes", "SQL", "Spark", "MLOps", "LLMs", "computer vision", "NLP"]
+ROLES = ["Machine Learning Engineer", "Data Scientist", "ML Platform Engineer", "Research Engineer", "AI Engineer"]
+CITIES = ["Sydney", "Melbourne", "Brisbane", "Perth", "Remote"]
+
+def make_chunk(rng):
+    skills = ", ".join(rng.sample(SKILLS, 4))
+    return (
+        f"{rng.choice(ROLES)} in {rng.choice(CITIES)}. You will design, train and deploy models "
+        f"and work closely with product teams. Requirements: {skills}. "
+        f"{rng.randint(2, 8)}+ years of experience building production systems."
+    ) * 3
+
+def make_query(rng):
+    return f"Which {rng.choice(ROLES).lower()} jobs in {rng.choice(CITIES)} ask for {rng.choice(SKILLS)}?"
+
+def run_backend(backend, docs, queries):
+    try:
+        start = time.perf_counter()
+        embeddings, backend_id = build_embeddings(backend)
+        # Load the model (and the pool) before timing
+        embeddings.embed_documents(docs[:2])
+        startup = time.perf_counter() - start
+    except Exception as e:
+        return {"backend": backend, "error": repr(e)}
+
+    start = time.perf_counter()
+    vectors = embeddings.embed_documents(docs)
+    ingest = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        embeddings.embed_query(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    return {
+        "backend": backend_id,
+        "dims": len(vectors[0]),
+        "startup_s": round(startup, 3),
+        "docs_per_s": round(len(docs) / ingest, 1),
+        "query_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "query_p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000, help="Chunks embedded in the ingest test")
+    parser.add_argument("--queries", type=int, default=50, help="Questions embedded in the latency test")
+    parser.add_argument("--backends", nargs="+", default=["hashing", "onnx", "openai"], help="Backends to compare")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = [make_chunk(rng) for _ in range(args.docs)]
+    queries = [make_query(rng) for _ in range(args.queries)]
+    results = [run_backend(backend, docs, queries) for backend in args.backends]
+    print(json.dumps(results, indent=2))
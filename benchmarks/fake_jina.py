@@ -0,0 +1,119 @@
+# benchmarks/fake_jina.py
+from aiohttp import web
+import asyncio
+import random
+import time
+
+class FakeJinaServer:
+    """
+    Local stand-in for the r.jina.ai proxy.
+
+    Serves /job/<job_id> with a markdown body, or a 404 for IDs starting with
+    "missing". When server_limit is set, requests
+    are counted in fixed windows of server_window seconds and answered with the
+    usual X-RateLimit-* headers, returning 429 with Retry-After once the window's
+    quota is spent.
+
+    Faults can be injected for resilience runs: fault_rate is the share of requests
+    that fail with one of fault_kinds ("500", "503", "timeout", "disconnect"), and
+    outage is a (start, duration) pair in seconds after start() during which every
+    request gets a 503. Faults are drawn from a seeded generator.
+    """
+
+    def __init__(self, server_limit=None, server_window=1.0, latency=0.0, body=None,
+                 fault_rate=0.0, fault_kinds=("500", "503", "timeout", "disconnect"),
+                 outage=None, hang_seconds=30.0, seed=0):
+        self.server_limit = server_limit
+        self.server_window = server_window
+        self.latency = latency
+        self.fault_rate = fault_rate
+        self.fault_kinds = fault_kinds
+        self.outage = outage
+        self.hang_seconds = hang_seconds
+        self.rng = random.Random(seed)
+        self.started_at = None
+        self.body = body or (lambda job_id: f"# Job {job_id}\n\n" + "Machine learning engineer. " * 200)
+        self.request_times = []
+        self.status_counts = {}
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.runner = None
+        self.base_url = None
+
+    def _rate_limit_headers(self, now):
+        if now - self.window_start >= self.server_window:
+            self.window_start = now
+            self.window_count = 0
+        self.window_count += 1
+        reset = self.window_start + self.server_window - now
+        remaining = max(0, self.server_limit - self.window_count)
+        headers = {
+            "X-RateLimit-Limit": str(self.server_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": f"{reset:.3f}",
+        }
+        return headers, self.window_count > self.server_limit
+
+    def _count(self, status):
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    async def _inject_fault(self, request, now):
+        """Return a failure response, or None to serve the request normally."""
+        if self.outage:
+            start, duration = self.outage
+            if start <= now - self.started_at < start + duration:
+                self._count("outage_503")
+                return web.Response(status=503)
+
+        if self.rng.random() >= self.fault_rate:
+            return None
+
+        kind = self.rng.choice(self.fault_kinds)
+        self._count(f"fault_{kind}")
+        if kind == "timeout":
+            await asyncio.sleep(self.hang_seconds)
+            return web.Response(status=504)
+        if kind == "disconnect":
+            request.transport.close()
+            return web.Response(status=500)
+        return web.Response(status=int(kind))
+
+    async def handle_job(self, request):
+        now = time.monotonic()
+        fault = await self._inject_fault(request, now)
+        if fault is not None:
+            return fault
+
+        if request.match_info["job_id"].startswith("missing"):
+            self._count(404)
+            return web.Response(status=404)
+
+        headers = {}
+        if self.server_limit:
+            headers, limited = self._rate_limit_headers(now)
+            if limited:
+                headers["Retry-After"] = headers["X-RateLimit-Reset"]
+                self._count(429)
+                return web.Response(status=429, headers=headers)
+
+        self.request_times.append(now)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._count(200)
+        return web.Response(text=self.body(request.match_info["job_id"]), headers=headers)
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_get("/job/{job_id}", self.handle_job)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}/job/"
+        self.started_at = time.monotonic()
+        return self.base_url
+
+    async def stop(self):
+        await self.runner.cleanup()
+
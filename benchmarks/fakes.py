@@ -0,0 +1,105 @@
+# benchmarks/fakes.py
+from typing import Any, Dict, List, Optional
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+import hashlib
+import time
+
+import numpy as np
+
+DEFAULT_RESPONSE = (
+    "Most machine learning engineer postings ask for strong Python, experience with PyTorch or "
+    "TensorFlow, and a track record of deploying models to production on AWS or GCP."
+)
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic local stand-in for the OpenAI and Ollama chat models.
+
+    Every call waits latency seconds before the first token and token_latency
+    seconds per token after it, then returns response word by word. Structured
+    output calls return the schema built from structured[schema name], with
+    Literal fields not given there set to their first allowed value.
+    """
+
+    response: str = DEFAULT_RESPONSE
+    latency: float = 0.0
+    token_latency: float = 0.0
+    structured: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _tokens(self):
+        words = self.response.split(" ")
+        return [word + " " for word in words[:-1]] + words[-1:]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency + self.token_latency * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any):
+        time.sleep(self.latency)
+        for index, token in enumerate(self._tokens()):
+            if index:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs):
+        values = dict(self.structured.get(schema.__name__, {}))
+        for name, field in schema.model_fields.items():
+            if name not in values and getattr(field.annotation, "__args__", None):
+                values[name] = field.annotation.__args__[0]
+
+        def respond(_):
+            time.sleep(self.latency)
+            return schema(**values)
+
+        return RunnableLambda(respond)
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic unit vectors seeded by the text, after latency plus per_text_latency per text."""
+
+    def __init__(self, dims=256, latency=0.0, per_text_latency=0.0):
+        self.dims = dims
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.backend_id = f"fake:{dims}"
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dims)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency + self.per_text_latency * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def fake_search_tool(latency=0.0, results=4):
+    """Stand-in for the Tavily search tool, returning results snippets after latency."""
+    def search(inputs):
+        time.sleep(latency)
+        return [
+            {"url": f"https://example.com/{i}", "content": f"Result {i} for {inputs['query']}: machine learning news."}
+            for i in range(results)
+        ]
+    return RunnableLambda(search)
+
+def use_mongomock():
+    """Point every pymongo client at an in-memory mongomock server; call before importing db modules."""
+    import mongomock
+    import pymongo
+    pymongo.MongoClient = mongomock.MongoClient
@@ -0,0 +1,65 @@
+"""
+Measure cold import time of the app's entry modules with `python -X importtime`.
+
+Each module is imported in a fresh interpreter. The script reports the total
+cumulative import time and the heaviest imports, and exits non-zero if any
+module exceeds --max-ms, so cold-start regressions can be caught in CI.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time_benchmark --max-ms 1500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["simple_graph", "graph", "components.chat", "components.sidebar"]
+
+def measure(module, repeat):
+    """Return the best-of-repeat cumulative import time of module and its heaviest imports."""
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, cwd=os.getcwd(),
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            # Lines look like "import time:   self_us |   cumulative_us |   package.module"
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            imports.append((name.strip(), int(self_us), int(cumulative_us)))
+
+        total_us = next(cumulative for name, _, cumulative in reversed(imports) if name == module)
+        if best is None or total_us < best[0]:
+            best = (total_us, imports)
+
+    total_us, imports = best
+    heaviest = sorted(imports, key=lambda item: item[1], reverse=True)[:10]
+    return {
+        "module": module,
+        "cumulative_ms": round(total_us / 1000, 1),
+        "heaviest_self_ms": {name: round(self_us / 1000, 1) for name, self_us, _ in heaviest},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module; the fastest is reported")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if a module takes longer than this")
+    args = parser.parse_args()
+
+    results = [measure(module, args.repeat) for module in args.modules]
+    print(json.dumps(results, indent=2))
+
+    if args.max_ms is not None:
+        slow = [result["module"] for result in results if result["cumulative_ms"] > args.max_ms]
+        if slow:
+            print(f"Import time above {args.max_ms} ms: {', '.join(slow)}", file=sys.stderr)
+            sys.exit(1)
@@ -0,0 +1,112 @@
+"""
+Compare listing-page crawl strategies against locally served fixture pages.
+
+The fixture server mimics a SEEK search: each listing page carries a set of job
+cards plus slow images, web fonts and a tracker script, and pages past the last
+populated one are empty. Jobs are read from the DOM instead of AgentQL so the
+run needs no network access.
+
+Run from the repository root (requires `playwright install chromium`):
+
+    python -m benchmarks.listing_crawler_benchmark
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import web
+from scraper.job_briefs_scraper import scrape_job_briefs
+
+JOBS_PER_PAGE = 22
+ASSET_LATENCY = 0.2
+
+def render_listing(page_num, populated_pages):
+    cards = ""
+    if page_num <= populated_pages:
+        for i in range(JOBS_PER_PAGE):
+            job_id = f"{page_num}{i:03d}"
+            cards += (
+                f'<article class="job" data-job-id="{job_id}" data-company="Company {job_id}" '
+                f'data-role="ML Engineer {job_id}" data-location="Sydney NSW">'
+                f'<img src="/assets/logo-{job_id}.png"><h3>ML Engineer {job_id}</h3></article>'
+            )
+    return f"""<html><head>
+        <link rel="stylesheet" href="/assets/font.css">
+        <script src="/tracker/googletagmanager.com/gtm.js"></script>
+        </head><body><img src="/assets/hero-{page_num}.jpg">{cards}</body></html>"""
+
+async def serve_fixtures(populated_pages):
+    stats = {"assets_served": 0}
+
+    async def listing(request):
+        page_num = int(request.query.get("page", 1))
+        await asyncio.sleep(0.05)
+        return web.Response(text=render_listing(page_num, populated_pages), content_type="text/html")
+
+    async def asset(request):
+        stats["assets_served"] += 1
+        await asyncio.sleep(ASSET_LATENCY)
+        content_type = "text/css" if request.path.endswith(".css") else "image/png"
+        return web.Response(body=b"", content_type=content_type)
+
+    app = web.Application()
+    app.router.add_get("/machine-learning-jobs", listing)
+    app.router.add_get("/assets/{name}", asset)
+    app.router.add_get("/tracker/{path:.*}", asset)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/machine-learning-jobs", stats
+
+async def extract_jobs_from_dom(page):
+    return await page.eval_on_selector_all(
+        "article.job",
+        """cards => cards.map(card => ({
+            job_id: card.dataset.jobId,
+            company_name: card.dataset.company,
+            role: card.dataset.role,
+            location: card.dataset.location,
+        }))""",
+    )
+
+async def run_strategy(name, num_pages, populated_pages, concurrency, block_resources):
+    runner, base_url, stats = await serve_fixtures(populated_pages)
+    start = time.monotonic()
+    jobs = await scrape_job_briefs(
+        num_pages=num_pages,
+        concurrency=concurrency,
+        headless=True,
+        block_resources=block_resources,
+        base_url=base_url,
+        extract_jobs=extract_jobs_from_dom,
+    )
+    elapsed = time.monotonic() - start
+    await runner.cleanup()
+    return {
+        "strategy": name,
+        "concurrency": concurrency,
+        "block_resources": block_resources,
+        "jobs": len(jobs),
+        "elapsed_s": round(elapsed, 3),
+        "assets_served": stats["assets_served"],
+    }
+
+async def main(num_pages, populated_pages):
+    results = [
+        await run_strategy("sequential", num_pages, populated_pages, 1, False),
+        await run_strategy("sequential_blocked", num_pages, populated_pages, 1, True),
+        await run_strategy("pooled_blocked", num_pages, populated_pages, 4, True),
+        await run_strategy("pooled_blocked_8", num_pages, populated_pages, 8, True),
+    ]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=15, help="Maximum listing pages to crawl")
+    parser.add_argument("--populated-pages", type=int, default=12,
+                        help="Pages that contain jobs; later pages are empty")
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.populated_pages))
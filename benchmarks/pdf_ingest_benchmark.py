@@ -0,0 +1,118 @@
+"""
+Compare PDF ingestion from temporary files with the in-memory process-pool ingest.
+
+The baseline is the old upload path: every PDF is written to a temporary file,
+loaded page by page with PyPDFLoader one file after another, and only then split,
+embedded and stored. The pool path parses the same bytes in worker processes and
+stores each file's chunks while the others are still being parsed. Both parse
+rates are reported in pages per second. The end-to-end runs write into a
+temporary Chroma directory and also report the time until the first batch of
+chunks was stored. The hashing embedding backend is used so the numbers measure
+the ingestion pipeline rather than an embedding API.
+
+Run from the repository root:
+
+    python -m benchmarks.pdf_ingest_benchmark --folder ./data --repeat 4
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+
+from utils.pdf_ingest import ingest_pdfs
+
+def load_folder(folder, repeat):
+    files = []
+    for path in sorted(glob.glob(os.path.join(folder, "**", "*.pdf"), recursive=True)):
+        with open(path, "rb") as f:
+            data = f.read()
+        # Copies get distinct names so each one is chunked and stored separately
+        files.extend((f"{i}-{os.path.basename(path)}", data) for i in range(repeat))
+    return files
+
+def parse_from_temp_files(files):
+    from langchain_community.document_loaders import PyPDFLoader
+    documents = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, data in files:
+            path = os.path.join(tmp, name)
+            with open(path, "wb") as f:
+                f.write(data)
+            documents.extend(PyPDFLoader(path).load())
+    return documents
+
+def baseline_ingest(files, vectorstore_path):
+    """The previous upload path: temp files, sequential parse, one add_documents call."""
+    from populate_database import prepare_chunks
+    from utils.embeddings import open_vectorstore
+    start = time.perf_counter()
+    documents = parse_from_temp_files(files)
+    chunks = prepare_chunks(documents)
+    vectorstore = open_vectorstore(vectorstore_path)
+    vectorstore.add_documents(chunks, ids=[chunk.metadata["id"] for chunk in chunks])
+    elapsed = time.perf_counter() - start
+    return {"pages": len(documents), "chunks": len(chunks), "total_s": round(elapsed, 2),
+            "first_batch_s": round(elapsed, 2)}
+
+def pool_ingest(files, vectorstore_path, workers, batch_size):
+    start = time.perf_counter()
+    first_batch = []
+
+    def on_progress(progress):
+        if progress.stored and not first_batch:
+            first_batch.append(time.perf_counter() - start)
+
+    progress = ingest_pdfs(files, vectorstore_path, workers=workers, embed_batch_size=batch_size, on_progress=on_progress)
+    elapsed = time.perf_counter() - start
+    return {"pages": progress.pages, "chunks": progress.chunks, "total_s": round(elapsed, 2),
+            "first_batch_s": round(first_batch[0], 2) if first_batch else None, "errors": progress.errors}
+
+def pool_parse(files, workers):
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    from utils.pdf_ingest import parse_pdf
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return sum(len(pages) for _, pages in pool.map(parse_pdf, *zip(*files)))
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    pages = fn(*args)
+    return pages, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--folder", required=True, help="Folder of sample PDFs, searched recursively")
+    parser.add_argument("--repeat", type=int, default=1, help="Copies of each PDF to ingest")
+    parser.add_argument("--workers", type=int, default=None, help="Parsing processes; defaults to the number of cores")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks embedded per call")
+    args = parser.parse_args()
+
+    files = load_folder(args.folder, args.repeat)
+    if not files:
+        raise SystemExit(f"No PDFs found in {args.folder}")
+
+    temp_pages, temp_s = timed(lambda files: len(parse_from_temp_files(files)), files)
+    pool_pages, pool_s = timed(pool_parse, files, args.workers)
+
+    workdir = tempfile.mkdtemp(prefix="pdf-ingest-benchmark-")
+    try:
+        baseline = baseline_ingest(files, os.path.join(workdir, "baseline"))
+        streamed = pool_ingest(files, os.path.join(workdir, "pool"), args.workers, args.batch_size)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({
+        "files": len(files),
+        "megabytes": round(sum(len(data) for _, data in files) / 1e6, 1),
+        "cores": os.cpu_count(),
+        "parse": {
+            "temp_files_pages_per_s": round(temp_pages / temp_s, 1),
+            "process_pool_pages_per_s": round(pool_pages / pool_s, 1),
+        },
+        "end_to_end": {"baseline": baseline, "process_pool": streamed},
+    }, indent=2))
@@ -0,0 +1,76 @@
+"""
+Measure the throughput AdaptiveRateLimiter achieves against a local Jina stand-in.
+
+Run from the repository root:
+
+    python -m benchmarks.rate_limiter_benchmark
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("JINA_API_KEY", "benchmark")
+
+import aiohttp
+from benchmarks.fake_jina import FakeJinaServer
+from scraper.jobs_scraper import AdaptiveRateLimiter
+
+async def run_scenario(name, num_requests, client_limit, window, concurrency, server_limit=None):
+    server = FakeJinaServer(server_limit=server_limit, server_window=window)
+    base_url = await server.start()
+    rate_limiter = AdaptiveRateLimiter(client_limit, window)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(job_id):
+        async with semaphore:
+            while True:
+                await rate_limiter.acquire()
+                async with session.get(f"{base_url}{job_id}") as response:
+                    rate_limiter.update_rate_limit(response.headers)
+                    if response.status != 429:
+                        await response.read()
+                        return
+
+    start = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(request(i) for i in range(num_requests)))
+    elapsed = time.monotonic() - start
+    await server.stop()
+
+    # Steady-state rate excludes the initial burst the full bucket allows
+    times = server.request_times
+    burst = min(client_limit, server_limit or client_limit)
+    steady = times[burst:]
+    steady_rate = (len(steady) - 1) / (steady[-1] - steady[0]) if len(steady) > 1 else None
+    target_rate = min(client_limit, server_limit or client_limit) / window
+
+    return {
+        "scenario": name,
+        "requests": num_requests,
+        "elapsed_s": round(elapsed, 3),
+        "target_rps": round(target_rate, 2),
+        "achieved_rps": round(num_requests / elapsed, 2),
+        "steady_state_rps": round(steady_rate, 2) if steady_rate else None,
+        "steady_state_vs_target": round(steady_rate / target_rate, 3) if steady_rate else None,
+        "status_counts": server.status_counts,
+    }
+
+async def main(scale):
+    scenarios = [
+        # Client-side limit only: steady state should sit at the configured rate
+        ("client_limit", 200 * scale, 50, 1.0, 100, None),
+        # Concurrency well above the rate: waiters must not serialize behind one sleeper
+        ("high_concurrency", 200 * scale, 50, 1.0, 200 * scale, None),
+        # Server allows less than the client is configured for and reports it in headers
+        ("server_headers", 120 * scale, 100, 1.0, 100, 30),
+    ]
+    results = [await run_scenario(*scenario) for scenario in scenarios]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="Multiply the number of requests per scenario")
+    args = parser.parse_args()
+    asyncio.run(main(args.scale))
@@ -0,0 +1,94 @@
+"""
+Measure repost detection on a fixture corpus of SEEK postings.
+
+benchmarks.seek_pages generates postings of which a share are reposts of an
+earlier advert under a new job ID, with a sentence edited. The first crawl
+assigns every cleaned posting to a cluster through db.posting_index. The report
+compares the clusters with the known originals, counts the chunks that would be
+embedded with and without repost skipping, and compares the number of LSH
+candidates each posting was verified against in the first and last tenth of the
+crawl. Only canonical postings are candidates, so this grows with the number of
+distinct adverts already indexed rather than with the number of listings. A second crawl over the same listings plus new ones
+shows how many fetches skip_known_reposts saves.
+
+The index is written to the posting_index collection of a separate
+benchmark_posting_index database on MONGODB_URI, which is dropped afterwards.
+
+Run from the repository root:
+
+    python -m benchmarks.repost_benchmark --postings 2000 --repost-rate 0.3
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("JINA_API_KEY", "benchmark")
+os.environ["MONGODB_DATABASE"] = "benchmark_posting_index"
+
+from benchmarks.seek_pages import job_documents, make_corpus
+from db.posting_index import assign_posting, ensure_posting_indexes, posting_collection, skip_known_reposts
+from models.job_brief_model import JobBriefModel
+from populate_database import split_documents
+from utils.near_duplicates import lsh_bands, minhash
+
+def brief(job_id):
+    return JobBriefModel(company_name="", job_id=job_id, role="", location="")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--postings", type=int, default=2000)
+    parser.add_argument("--repost-rate", type=float, default=0.3, help="Share of postings that repost an earlier advert")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.postings, args.repost_rate, args.seed)
+    originals = {job_id: original_id for job_id, _, original_id in corpus}
+    documents = job_documents(corpus)
+    first_crawl = int(len(documents) * 0.9)
+
+    posting_collection.drop()
+    ensure_posting_indexes()
+    try:
+        canonical, candidates = [], []
+        start = time.perf_counter()
+        for document in documents[:first_crawl]:
+            bands = lsh_bands(minhash(document.page_content))
+            candidates.append(posting_collection.count_documents({"lsh_bands": {"$in": bands}, "canonical": True}))
+            if assign_posting(document) == document.metadata["job_id"]:
+                canonical.append(document)
+        assign_s = time.perf_counter() - start
+
+        assigned = {entry["job_id"]: entry["cluster_id"] for entry in posting_collection.find({}, {"job_id": 1, "cluster_id": 1})}
+        reposts = [job_id for job_id in assigned if originals[job_id] != job_id]
+        detected = [job_id for job_id in assigned if assigned[job_id] != job_id]
+        correct = sum(assigned[job_id] == originals[job_id] for job_id in assigned)
+
+        # The next crawl sees every listing again plus the last tenth as new ones
+        start = time.perf_counter()
+        to_fetch = skip_known_reposts([brief(job_id) for job_id, _, _ in corpus])
+        skip_s = time.perf_counter() - start
+
+        tenth = max(1, len(candidates) // 10)
+        print(json.dumps({
+            "listings": first_crawl,
+            "unique_adverts": len(set(originals[job_id] for job_id in assigned)),
+            "canonical_postings": len(canonical),
+            "reposts": len(reposts),
+            "reposts_detected": len(detected),
+            "assignment_accuracy": round(correct / len(assigned), 4),
+            "chunks_without_repost_skipping": len(split_documents(documents[:first_crawl])),
+            "chunks_with_repost_skipping": len(split_documents(canonical)),
+            "candidates_per_posting_first_tenth": round(statistics.mean(candidates[:tenth]), 1),
+            "candidates_per_posting_last_tenth": round(statistics.mean(candidates[-tenth:]), 1),
+            "assign_s": round(assign_s, 2),
+            "second_crawl": {
+                "listings": len(corpus),
+                "fetches": len(to_fetch),
+                "skipped_known_reposts": len(corpus) - len(to_fetch),
+                "skip_lookup_s": round(skip_s, 3),
+            },
+        }, indent=2))
+    finally:
+        posting_collection.drop()
@@ -0,0 +1,81 @@
+"""
+Check that job fetching rides out injected faults against a local Jina stand-in.
+
+Each scenario fetches a batch of postings while the server injects errors,
+timeouts, dropped connections or a full outage, and reports how many postings
+were recovered, along with the crawl's own ScrapeMetrics: requests, status codes,
+retries, throttles and request latency. The process exits non-zero if a
+recoverable posting was lost.
+
+Run from the repository root:
+
+    python -m benchmarks.retry_benchmark
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("JINA_API_KEY", "benchmark")
+
+from benchmarks.fake_jina import FakeJinaServer
+from models.job_brief_model import JobBriefModel
+from scraper.jobs_scraper import scrape_job_documents
+from scraper.retry_policy import RetryPolicy
+from scraper.scrape_metrics import ScrapeMetrics
+
+def make_briefs(num_jobs, num_missing=0):
+    job_ids = [str(i) for i in range(num_jobs)] + [f"missing-{i}" for i in range(num_missing)]
+    return [
+        JobBriefModel(company_name="Acme", job_id=job_id, role="ML Engineer", location="Sydney")
+        for job_id in job_ids
+    ]
+
+async def run_scenario(name, num_jobs, num_missing=0, **server_kwargs):
+    server = FakeJinaServer(hang_seconds=2.0, **server_kwargs)
+    base_url = await server.start()
+    retry_policy = RetryPolicy(
+        max_attempts=6, base_delay=0.05, max_delay=1.0, deadline=30.0,
+        request_timeout=1.0, failure_threshold=5, reset_timeout=1.0, seed=0,
+    )
+
+    metrics = ScrapeMetrics()
+    start = time.monotonic()
+    documents = await scrape_job_documents(
+        make_briefs(num_jobs, num_missing), retry_policy=retry_policy, base_url=base_url,
+        rate_limit=6000, concurrency=20, metrics=metrics
+    )
+    elapsed = time.monotonic() - start
+    await server.stop()
+
+    return {
+        "scenario": name,
+        "jobs": num_jobs + num_missing,
+        "expected": num_jobs,
+        "fetched": len(documents),
+        "lost": num_jobs - len(documents),
+        "elapsed_s": round(elapsed, 3),
+        "server_responses": {str(status): count for status, count in server.status_counts.items()},
+        "client_metrics": {
+            key: value for key, value in metrics.snapshot().items()
+            if key in ("requests", "requests_per_s", "status_counts", "error_counts", "retries", "throttles", "latency_s")
+        },
+    }
+
+async def main(num_jobs):
+    results = [
+        await run_scenario("healthy", num_jobs),
+        await run_scenario("random_faults", num_jobs, fault_rate=0.2),
+        await run_scenario("outage", num_jobs, outage=(0.0, 2.0)),
+        await run_scenario("missing_postings", num_jobs, num_missing=5),
+    ]
+    print(json.dumps(results, indent=2))
+    return all(result["lost"] == 0 for result in results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100, help="Number of postings per scenario")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.jobs)) else 1)
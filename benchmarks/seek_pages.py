@@ -0,0 +1,220 @@
+# benchmarks/seek_pages.py
+from langchain_core.documents import Document
+from scraper.job_cleaning import clean_job_markdown
+import random
+
+ROLES = ["Machine Learning Engineer", "Data Scientist", "ML Platform Engineer", "Research Engineer",
+         "AI Engineer", "Computer Vision Engineer", "NLP Engineer", "MLOps Engineer"]
+SENIORITY = ["Junior", "", "Senior", "Lead", "Principal"]
+CITIES = ["Sydney NSW", "Melbourne VIC", "Brisbane QLD", "Perth WA", "Adelaide SA", "Canberra ACT"]
+COMPANIES = ["Acme Analytics", "Koala Labs", "Southern Cross Data", "Harbour AI", "Outback Robotics",
+             "Quokka Health", "Reef Insights", "Gum Tree Systems", "Wattle Finance", "Banksia Retail"]
+SKILLS = ["Python", "PyTorch", "TensorFlow", "Kubernetes", "SQL", "Spark", "Airflow", "AWS SageMaker",
+          "GCP Vertex AI", "LLMs", "retrieval-augmented generation", "computer vision", "time series forecasting",
+          "recommender systems", "causal inference", "feature stores", "dbt", "Docker", "Terraform", "Rust"]
+DUTIES = [
+    "design, train and evaluate models that ship to millions of customers",
+    "own the end-to-end lifecycle of models from prototype to production",
+    "build data pipelines and feature stores that other teams rely on",
+    "run experiments and communicate results to product and business stakeholders",
+    "improve the latency and cost of our inference platform",
+    "mentor engineers and set technical direction for the team",
+    "partner with researchers to turn papers into production systems",
+    "monitor model quality and drift and respond to incidents",
+    "fine-tune and evaluate large language models for internal tools",
+    "write well-tested, maintainable code and review the code of others",
+]
+
+NAVIGATION = """[Skip to content](https://www.seek.com.au/job/{job_id}#skip-link)
+
+*   [Job search](https://www.seek.com.au/)
+*   [Profile](https://www.seek.com.au/profile/me)
+*   [Career advice](https://www.seek.com.au/career-advice)
+*   [Company reviews](https://www.seek.com.au/companies)
+
+[Sign in](https://www.seek.com.au/oauth/login)
+
+[Employer site](https://talent.seek.com.au/)
+
+[Back to search results](https://www.seek.com.au/jobs)
+
+![Image 1: {company}](https://image-service-cdn.seek.com.au/{job_id}/logo)
+"""
+
+TAIL = """Employer questions
+------------------
+
+Your application will include the following questions:
+
+*   Which of the following statements best describes your right to work in Australia?
+*   How many years' experience do you have as a {role}?
+*   Do you have a current Police Check (National) issued within the last 6 months?
+
+Report this job advert
+----------------------
+
+Be careful
+----------
+
+Don’t provide your bank or credit card details when applying for jobs.
+
+[Learn how to protect yourself](https://www.seek.com.au/security-privacy)
+
+[Report this job ad](https://www.seek.com.au/job/{job_id}/report)
+
+Career advice
+-------------
+
+What can I earn as a {role}
+---------------------------
+
+[See more detailed salary information](https://www.seek.com.au/career-advice/role/{role_slug}/salary)
+
+Similar jobs
+------------
+
+{similar}
+
+Job seekers
+-----------
+
+*   [Job search](https://www.seek.com.au/)
+*   [Profile](https://www.seek.com.au/profile/me)
+*   [Recommended jobs](https://www.seek.com.au/recommended)
+*   [Saved searches](https://www.seek.com.au/my-activity/saved-searches)
+*   [Saved jobs](https://www.seek.com.au/my-activity/saved-jobs)
+*   [Applied jobs](https://www.seek.com.au/my-activity/applied-jobs)
+*   [Career advice](https://www.seek.com.au/career-advice)
+*   [Explore careers](https://www.seek.com.au/career-advice/explore-careers)
+*   [Company reviews](https://www.seek.com.au/companies)
+*   [Download apps](https://www.seek.com.au/apps)
+*   [SEEK sites](https://www.seek.com.au/about/sites)
+
+Employers
+---------
+
+*   [Register for free](https://talent.seek.com.au/account/register)
+*   [Post a job ad](https://talent.seek.com.au/joblisting)
+*   [Products & prices](https://talent.seek.com.au/products)
+*   [Customer service](https://talent.seek.com.au/contactus)
+*   [Hiring advice](https://www.seek.com.au/employer/hiring-advice)
+*   [Market insights](https://www.seek.com.au/employer/market-insights)
+*   [Recruitment software partners](https://talent.seek.com.au/partners)
+
+About SEEK
+----------
+
+*   [About SEEK](https://www.seek.com.au/about)
+*   [Newsroom](https://www.seek.com.au/about/news)
+*   [Investors](https://www.seek.com.au/about/investors)
+*   [Careers at SEEK](https://www.seek.com.au/careers)
+
+Employment Hero, JobAdder and SEEK are proud to work together to make hiring simpler. We acknowledge the
+Traditional Owners and Custodians of Country throughout Australia and their continuing connection to land,
+sea and community. We pay our respects to them and their cultures, and to Elders both past and present.
+SEEK is committed to a safe and secure job search experience. Read our security and privacy guidance, our
+terms and conditions and our privacy policy before applying for any role advertised on this site.
+
+© SEEK. All rights reserved
+"""
+
+EQUAL_OPPORTUNITY = (
+    "We are an equal opportunity employer and value diversity at our company. We do not discriminate on the "
+    "basis of race, religion, colour, national origin, gender, sexual orientation, age, marital status, veteran "
+    "status or disability status. Aboriginal and Torres Strait Islander peoples, people with disability and "
+    "people from culturally and linguistically diverse backgrounds are strongly encouraged to apply. If you "
+    "require any adjustments during the recruitment process please let our talent team know."
+)
+
+def company_blurb(company):
+    """The same 'about us' and benefits text appears on every advert of a company."""
+    rng = random.Random(company)
+    perks = rng.sample(["flexible hybrid working", "an annual learning budget of $3,000", "extra paid parental leave",
+                        "a wellbeing allowance", "employee share options", "a day off for your birthday",
+                        "quarterly hack weeks", "salary packaging"], 5)
+    return (
+        f"About {company}\n\n{company} is one of Australia's fastest growing technology companies, helping "
+        f"organisations across the country make better decisions with data. Our teams in {rng.choice(CITIES)} and "
+        f"around Australia work on problems that matter to our customers every day.\n\n"
+        f"Why you'll love working here\n\n" + "\n".join(f"* {perk.capitalize()}" for perk in perks) +
+        "\n* A supportive team that cares about doing great work and about each other"
+    )
+
+def job_description(rng, role, company, city):
+    skills = rng.sample(SKILLS, 6)
+    duties = rng.sample(DUTIES, 4)
+    years = rng.randint(2, 8)
+    return (
+        f"About the role\n\nWe are looking for a {role} to join our growing data team in {city}. "
+        f"In this role you will {duties[0]} and {duties[1]}. You will work with {skills[0]} and {skills[1]} every "
+        f"day, and have the opportunity to {duties[2]}.\n\n"
+        f"What you'll do\n\n" + "\n".join(f"* {duty.capitalize()}" for duty in duties) + "\n\n"
+        f"About you\n\n* {years}+ years of commercial experience as a {role.lower()} or similar\n"
+        + "\n".join(f"* Strong experience with {skill}" for skill in skills[2:]) +
+        "\n* A degree in computer science, statistics, mathematics or a related field\n"
+        "* Excellent communication skills and a collaborative approach\n\n"
+        f"{company_blurb(company)}\n\n{EQUAL_OPPORTUNITY}\n\n"
+        f"To apply, click 'Apply' and submit your resume and a short cover letter. Applications close in "
+        f"{rng.randint(2, 6)} weeks."
+    )
+
+def similar_jobs(rng):
+    return "\n\n".join(
+        f"[{rng.choice(SENIORITY)} {rng.choice(ROLES)}]".replace("[ ", "[")
+        + f"(https://www.seek.com.au/job/{rng.randint(70000000, 89999999)})\n\n"
+        f"{rng.choice(COMPANIES)}\n\n{rng.choice(CITIES)}\n\nPosted {rng.randint(1, 30)}d ago"
+        for _ in range(6)
+    )
+
+def seek_page(job_id, rng, role=None, company=None, city=None, description=None):
+    """r.jina.ai-style markdown of a SEEK job page."""
+    role = role or f"{rng.choice(SENIORITY)} {rng.choice(ROLES)}".strip()
+    company = company or rng.choice(COMPANIES)
+    city = city or rng.choice(CITIES)
+    description = description or job_description(rng, role, company, city)
+    underline = "=" * len(role)
+    return (
+        f"Title: {role} Job in {city} - SEEK\n\nURL Source: https://www.seek.com.au/job/{job_id}\n\n"
+        f"Markdown Content:\n{NAVIGATION.format(job_id=job_id, company=company)}\n"
+        f"{role}\n{underline}\n\n[{company}](https://www.seek.com.au/{company.replace(' ', '-')}-jobs)\n\n"
+        f"[View all jobs](https://www.seek.com.au/{company.replace(' ', '-')}-jobs)\n\n{city} (Hybrid)\n\n"
+        f"Engineering - Software (Information & Communication Technology)\n\nFull time\n\n"
+        f"${rng.randint(110, 200)},000 – ${rng.randint(200, 260)},000 per year\n\nPosted {rng.randint(1, 30)}d ago\n\n"
+        f"[Quick apply](https://www.seek.com.au/job/{job_id}/apply)\n\n{description}\n\n"
+        + TAIL.format(job_id=job_id, role=role, role_slug=role.lower().replace(" ", "-"), similar=similar_jobs(rng))
+    )
+
+def make_corpus(num_postings, repost_rate=0.15, seed=0):
+    """
+    Return (job ID, page markdown, original job ID) triples for num_postings postings.
+
+    A repost_rate share of them are an earlier advert posted again under a new job
+    ID, with a new date and sidebar and a sentence or two edited, as recruiters do.
+    Their original job ID is that of the first posting of the advert; for every
+    other posting it is its own job ID.
+    """
+    rng = random.Random(seed)
+    pages, originals = [], []
+    for i in range(num_postings):
+        job_id = str(80000000 + i)
+        if originals and rng.random() < repost_rate:
+            original_id, role, company, city, description = rng.choice(originals)
+            sentences = description.split(". ")
+            edited = rng.randrange(len(sentences))
+            sentences[edited] = sentences[edited].replace("our", "the", 1) + " (reposted)"
+            pages.append((job_id, seek_page(job_id, rng, role, company, city, ". ".join(sentences)), original_id))
+            continue
+        role = f"{rng.choice(SENIORITY)} {rng.choice(ROLES)}".strip()
+        company, city = rng.choice(COMPANIES), rng.choice(CITIES)
+        description = job_description(rng, role, company, city)
+        originals.append((job_id, role, company, city, description))
+        pages.append((job_id, seek_page(job_id, rng, role, company, city, description), job_id))
+    return pages
+
+def job_documents(pages, clean=True):
+    """Documents as fetch_job_document returns them, optionally without the cleaning step."""
+    return [
+        Document(page_content=clean_job_markdown(page) if clean else page,
+                 metadata={"source": f"https://www.seek.com.au/job/{job_id}", "job_id": job_id})
+        for job_id, page, _ in pages
+    ]
@@ -0,0 +1,70 @@
+"""
+Check that a chat turn waits for a summarization still queued behind busy workers.
+
+Both summary workers are kept busy, a summarization of an over-budget thread is
+submitted behind them, and wait_for_summary is called for the thread's next turn.
+The check fails if wait_for_summary returns before the queued job has run, or if
+the thread is not summarized once it returns. Reports how long the turn was held
+back as JSON and exits non-zero on failure.
+
+Run from the repository root:
+
+    python -m benchmarks.summary_race_benchmark
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+for variable in ("OPENAI_API_KEY", "TAVILY_API_KEY"):
+    os.environ.setdefault(variable, "benchmark")
+
+from benchmarks.fakes import FakeChatModel
+from db.checkpointer import PooledSqliteSaver, get_checkpointer
+from utils.selection import DEFAULT_MODEL, register_chat_model
+
+def main(busy_seconds):
+    register_chat_model(DEFAULT_MODEL, FakeChatModel())
+    get_checkpointer.override(PooledSqliteSaver(os.path.join(tempfile.mkdtemp(), "checkpoints.db")))
+    import simple_graph
+
+    graph = simple_graph.get_graph()
+    config = {"configurable": {"thread_id": "race", "context_budget": 50}}
+    for turn in range(4):
+        for _ in graph.stream({"messages": f"Question {turn} about machine learning jobs"}, config, stream_mode="updates"):
+            pass
+
+    # Occupy every worker so the summarization has to queue
+    release = threading.Event()
+    executor = simple_graph._summary_executor()
+    blockers = [executor.submit(release.wait) for _ in range(executor._max_workers)]
+    simple_graph.summarize_in_background(config)
+
+    waiter = threading.Thread(target=simple_graph.wait_for_summary, args=(config,))
+    start = time.perf_counter()
+    waiter.start()
+    waiter.join(busy_seconds)
+    returned_early = not waiter.is_alive()
+    release.set()
+    waiter.join()
+    held_back = time.perf_counter() - start
+    for blocker in blockers:
+        blocker.result()
+
+    summarized = bool(graph.get_state(config).values.get("summary"))
+    result = {
+        "returned_while_queued": returned_early,
+        "summarized_after_wait": summarized,
+        "turn_held_back_s": round(held_back, 3),
+    }
+    print(json.dumps(result, indent=2))
+    return summarized and not returned_early
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--busy-seconds", type=float, default=1.0, help="How long the workers stay busy")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.busy_seconds) else 1)
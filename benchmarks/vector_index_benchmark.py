@@ -0,0 +1,134 @@
+"""
+Compare the quantized vector index with the Chroma store on recall, latency and memory.
+
+A synthetic corpus of clustered unit vectors stands in for the job-posting chunks.
+Variance decays along the dimensions, like Matryoshka-trained embeddings, so
+truncated indexes are meaningful. Each store is written to a temporary directory
+and then queried from a fresh process, which reports its query latencies and how
+much its resident memory grew while loading the store and serving queries.
+Recall@k is measured against exact float32 search.
+
+Run from the repository root:
+
+    python -m benchmarks.vector_index_benchmark --vectors 20000 --dims 1536 --queries 200
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from db.vector_index import QuantizedVectorStore, write_index
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def make_corpus(num_vectors, dims, num_queries, seed):
+    rng = np.random.default_rng(seed)
+    decay = 1.0 / (1.0 + np.arange(dims) / 64.0)
+    centers = rng.standard_normal((max(8, num_vectors // 200), dims)) * decay
+    labels = rng.integers(len(centers), size=num_vectors + num_queries)
+    points = centers[labels] + 0.5 * rng.standard_normal((len(labels), dims)) * decay
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    return points[:num_vectors].astype(np.float32), points[num_vectors:].astype(np.float32)
+
+def build_chroma(path, vectors):
+    import chromadb
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection("benchmark", metadata={"hnsw:space": "cosine"})
+    for start in range(0, len(vectors), 5000):
+        batch = vectors[start:start + 5000]
+        collection.add(
+            ids=[str(i) for i in range(start, start + len(batch))],
+            embeddings=batch.tolist(),
+            documents=[f"chunk {i}" for i in range(start, start + len(batch))],
+        )
+
+def query_store(kind, path, queries, k, connection):
+    """Run in a child process: load the store, answer every query, report ids, latencies and RSS growth."""
+    baseline = rss_mb()
+    if kind == "chroma":
+        import chromadb
+        collection = chromadb.PersistentClient(path=path).get_collection("benchmark")
+        search = lambda query: [int(i) for i in collection.query(query_embeddings=[query.tolist()], n_results=k)["ids"][0]]
+    else:
+        store = QuantizedVectorStore(path, embedding=None)
+        search = lambda query: store.search_vectors(query, k)[0].tolist()
+
+    ids, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        ids.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    connection.send((ids, latencies, rss_mb() - baseline))
+
+def run_query_process(kind, path, queries, k):
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe()
+    process = context.Process(target=query_store, args=(kind, path, queries, k, child))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+def directory_mb(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--truncate", type=int, default=512, help="Dimensions kept by the truncated index")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors, queries = make_corpus(args.vectors, args.dims, args.queries, args.seed)
+    scores = queries @ vectors.T
+    truth = np.argsort(-scores, axis=1)[:, :args.k]
+
+    workdir = tempfile.mkdtemp(prefix="vector-index-benchmark-")
+    ids = [str(i) for i in range(len(vectors))]
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    scenarios = [("chroma (float32 HNSW)", "chroma", None, None),
+                 ("quantized float16", "quantized", "float16", None),
+                 ("quantized int8", "quantized", "int8", None),
+                 (f"quantized int8, {args.truncate} dims", "quantized", "int8", args.truncate)]
+
+    results = []
+    try:
+        for name, kind, dtype, dims in scenarios:
+            path = os.path.join(workdir, name.replace(" ", "_").replace(",", ""))
+            start = time.perf_counter()
+            if kind == "chroma":
+                build_chroma(path, vectors)
+            else:
+                write_index(path, ids, texts, [None] * len(ids), vectors, dtype=dtype, dims=dims)
+            build_s = time.perf_counter() - start
+
+            found, latencies, rss_growth = run_query_process(kind, path, queries, args.k)
+            recall = np.mean([len(set(row) & set(expected)) / args.k for row, expected in zip(found, truth.tolist())])
+            latencies.sort()
+            results.append({
+                "store": name,
+                "build_s": round(build_s, 2),
+                "disk_mb": round(directory_mb(path), 1),
+                "rss_growth_mb": round(rss_growth, 1),
+                f"recall_at_{args.k}": round(float(recall), 4),
+                "query_p50_ms": round(statistics.median(latencies) * 1000, 2),
+                "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+            })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({"vectors": args.vectors, "dims": args.dims, "queries": args.queries, "results": results}, indent=2))
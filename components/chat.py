@@ -1,50 +1,10 @@
 import streamlit as st
 from langchain_core.messages import HumanMessage, AIMessage
-from simple_graph import graph
-from db.mongodb_client import db
-from models.chat_thread_model import ChatThreadModel
-from langchain_openai import ChatOpenAI
-from pydantic import BaseModel, Field
-
-class ChatTitleResponse(BaseModel):
-    chat_title: str = Field(
-        None, description="The title for the current conversation"
-    )
-    
-collection = db["chat_threads"]
-
-def get_response(query, config):
-    # Execute the graph with streaming
-    inputs = {
-        "messages": query,
-    }
-    
-    for message_chunk, metadata in graph.stream(
-        inputs, config, stream_mode="messages"
-    ):
-        if message_chunk.content and metadata["langgraph_node"] == "generate_answer":
-            yield message_chunk.content
-            
-def create_chat_title(messages):
-    llm = ChatOpenAI(model="gpt-4o-mini")
-    title_generator = llm.with_structured_output(ChatTitleResponse)
-    prompt = f"""Given the following conversation transcript:
-    
-    {messages}
-    
-    Generate a concise and engaging title that accurately reflects the main topic or theme discussed.  
-    If the conversation covers multiple topics, focus on the most prominent or overarching theme. 
-    """
-    result = title_generator.invoke(prompt)
-    
-    return result.chat_title
-            
-def save_thread(thread_id):
-    chat_thread = ChatThreadModel(thread_id=thread_id, chat_title="New Chat")
-    collection.insert_one(chat_thread.model_dump())
-    
-def update_chat_title(thread_id, title):
-    collection.update_one({"thread_id": thread_id}, { "$set": { 'chat_title': title } })
+from simple_graph import get_response
+from db.chat_threads import create_thread
+from utils.selection import DEFAULT_MODEL
+from utils.chat_titles import get_title_worker
+from components.sidebar import refresh_chat_history
 
 def create_chat():
     # React to user input
@@ -52,10 +12,9 @@ def create_chat():
         thread_id = st.session_state.config["configurable"]["thread_id"]
         
         # Save thread if new
-        if not collection.find_one({"thread_id": thread_id}):
-            save_thread(thread_id)
+        if create_thread(thread_id):
             # Refresh chat history
-            st.session_state.chat_history = list(collection.find())
+            refresh_chat_history(clear_cache=True)
         
         # Display user message
         st.chat_message("user").markdown(prompt)
@@ -65,14 +24,21 @@ def create_chat():
         with st.chat_message("assistant"):
             response_placeholder = st.empty()
             full_response = ""
-            for chunk in get_response(prompt, st.session_state.config):
+            # Run the graph with the model picked in the sidebar
+            config = {
+                "configurable": {
+                    **st.session_state.config["configurable"],
+                    "model": st.session_state.get("selected_model", DEFAULT_MODEL),
+                }
+            }
+            for chunk in get_response(prompt, config):
                 full_response += chunk
                 response_placeholder.markdown(full_response + "▌")
             response_placeholder.markdown(full_response)
 
-        chat_title = create_chat_title(st.session_state.messages)
-        update_chat_title(thread_id, chat_title)
-        
         # Save assistant response
         st.session_state.messages.append(AIMessage(content=full_response))
+        
+        # The title is generated in the background and picked up on a later rerun
+        get_title_worker().submit(thread_id, st.session_state.messages)
         st.rerun()  # Ensure UI updates with new messages
\ No newline at end of file
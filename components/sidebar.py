@@ -1,7 +1,29 @@
 import streamlit as st
 from utils.selection import configure_model
-from utils.upload import upload_dialog
+from utils.upload import upload_dialog, ingest_status
 from utils.config import create_chat_config
+from db.chat_threads import list_threads
+
+# Threads shown per page of the chat history and how long a page is reused
+THREADS_PAGE_SIZE = 20
+THREADS_CACHE_TTL = 30  # seconds
+
+@st.cache_data(ttl=THREADS_CACHE_TTL, show_spinner=False)
+def load_thread_page(limit, after=None):
+    return list_threads(limit=limit, after=after)
+
+def refresh_chat_history(clear_cache=False):
+    """Reset the chat history to its first page, optionally bypassing the page cache."""
+    if clear_cache:
+        load_thread_page.clear()
+    threads, cursor = load_thread_page(THREADS_PAGE_SIZE)
+    st.session_state.chat_history = threads
+    st.session_state.chat_history_cursor = cursor
+
+def load_more_threads():
+    threads, cursor = load_thread_page(THREADS_PAGE_SIZE, st.session_state.chat_history_cursor)
+    st.session_state.chat_history = st.session_state.chat_history + threads
+    st.session_state.chat_history_cursor = cursor
 
 def create_sidebar():
     # Create sidebar
@@ -16,20 +38,25 @@ def create_sidebar():
             
         if st.button(":material/draft: Upload Documents", use_container_width=True):
             upload_dialog()
+        # Progress of uploads running in the background
+        ingest_status()
             
         with st.popover(":material/settings: Settings", use_container_width=True):
             model_options = ["deepseek-r1:7b","gpt-4o-mini"]
-            selected_model = configure_model(st.selectbox("Select a model",model_options,index=0))
+            selected_model = st.selectbox("Select a model",model_options,index=0)
+            # Cached per process, so reruns reuse the client; the first selection starts loading the model
+            configure_model(selected_model)
+            st.session_state.selected_model = selected_model
             agent_options = ["general","document-writer"]
             selected_agent = st.selectbox("Select an agent",agent_options,index=0)
             selected_collection = st.selectbox("Select a collection", model_options, index=0)
         
         st.subheader("Chat History")
         
-        # Handle empty chat history
-        reversed_chat_history = st.session_state.chat_history[::-1]
-        if reversed_chat_history:
-            chat_titles = [thread["chat_title"] for thread in reversed_chat_history]
+        # Chat history is newest first
+        chat_history = st.session_state.chat_history
+        if chat_history:
+            chat_titles = [thread["chat_title"] for thread in chat_history]
             
             selected_index = st.selectbox(
                 "Select a chat", 
@@ -38,7 +65,7 @@ def create_sidebar():
                 key="chat_selector"
             )
 
-            current_chat = reversed_chat_history[selected_index]
+            current_chat = chat_history[selected_index]
             
             # Update config when chat selection changes
             new_thread_id = current_chat["thread_id"]
@@ -46,6 +73,9 @@ def create_sidebar():
                 st.session_state.current_thread_id = new_thread_id
                 st.session_state.config = {"configurable": {"thread_id": new_thread_id}}
                 st.session_state.chat_title = chat_titles[selected_index]
+
+            if st.session_state.chat_history_cursor is not None:
+                st.button("Load more", on_click=load_more_threads, use_container_width=True)
         else:
             st.info("No chat history yet. Start a new chat!")
             chat_titles = ["New Chat"]
@@ -0,0 +1,156 @@
+# db/answer_cache.py
+from typing import List, Optional
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = "./answer_cache/answers.db"
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 5000
+
+class AnswerCache:
+    """
+    Semantic cache of answers keyed by question embeddings and the answering model.
+
+    A lookup returns the answer of the most similar cached question answered by the
+    same model if its cosine similarity is at least threshold and the entry is
+    younger than ttl seconds.
+    Embeddings are kept in memory as a normalized matrix for a vectorized
+    nearest-neighbour search and reloaded when another process invalidates the cache.
+
+    Args:
+        path: SQLite file holding the cache
+        threshold: Minimum cosine similarity for a hit
+        ttl: Seconds an answer stays valid
+        max_entries: Number of answers kept; the oldest are dropped first
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, threshold=DEFAULT_THRESHOLD, ttl=DEFAULT_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                model TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(answers)")]
+        if "model" not in columns:
+            # Caches written before answers recorded their model; those rows never match a lookup
+            self.conn.execute("ALTER TABLE answers ADD COLUMN model TEXT NOT NULL DEFAULT ''")
+        self.conn.commit()
+        self.generation = None
+        self.ids = np.empty(0, dtype=np.int64)
+        self.created_at = np.empty(0)
+        self.models = np.empty(0, dtype=object)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+
+    def _current_generation(self):
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def _reload_if_stale(self):
+        generation = self._current_generation()
+        if generation == self.generation:
+            return
+        rows = self.conn.execute("SELECT id, embedding, created_at, model FROM answers ORDER BY id").fetchall()
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.created_at = np.array([row[2] for row in rows], dtype=np.float64)
+        self.models = np.array([row[3] for row in rows], dtype=object)
+        self.matrix = (
+            np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            if rows else np.empty((0, 0), dtype=np.float32)
+        )
+        self.generation = generation
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: List[float], model: str) -> Optional[str]:
+        """Return model's cached answer for the nearest question above the threshold, if any."""
+        query = self._normalize(embedding)
+        with self.lock:
+            self._reload_if_stale()
+            if not len(self.ids) or self.matrix.shape[1] != query.shape[0]:
+                return None
+
+            similarities = self.matrix @ query
+            similarities[self.created_at < time.time() - self.ttl] = -1.0
+            similarities[self.models != model] = -1.0
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            row = self.conn.execute("SELECT answer FROM answers WHERE id = ?", (int(self.ids[best]),)).fetchone()
+            return row[0] if row else None
+
+    def store(self, question: str, embedding: List[float], answer: str, model: str):
+        """Cache model's answer, dropping expired entries and the oldest ones above max_entries."""
+        vector = self._normalize(embedding)
+        now = time.time()
+        with self.lock:
+            self._reload_if_stale()
+            cursor = self.conn.execute(
+                "INSERT INTO answers (question, embedding, answer, created_at, model) VALUES (?, ?, ?, ?, ?)",
+                (question, vector.tobytes(), answer, now, model),
+            )
+            self.conn.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl,))
+            self.conn.execute(
+                "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY id DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            # Bump the generation so other processes reload their matrix
+            self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            generation = self._current_generation()
+            self.conn.commit()
+
+            # Apply the same change in memory unless another process wrote in the meantime
+            if generation != self.generation + 1 or self.matrix.shape[1] not in (0, vector.shape[0]):
+                self.generation = None
+                return
+            keep = self.created_at >= now - self.ttl
+            self.ids = np.append(self.ids[keep], cursor.lastrowid)[-self.max_entries:]
+            self.created_at = np.append(self.created_at[keep], now)[-self.max_entries:]
+            self.models = np.append(self.models[keep], np.array([model], dtype=object))[-self.max_entries:]
+            self.matrix = np.vstack([self.matrix[keep].reshape(-1, vector.shape[0]), vector])[-self.max_entries:]
+            self.generation = generation
+
+    def invalidate(self):
+        """Drop every cached answer, e.g. after the underlying collection changed."""
+        with self.lock:
+            self.conn.execute("DELETE FROM answers")
+            self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            self.conn.commit()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(
+                path=os.getenv("ANSWER_CACHE_PATH", DEFAULT_CACHE_PATH),
+                threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", DEFAULT_THRESHOLD)),
+                ttl=float(os.getenv("ANSWER_CACHE_TTL", DEFAULT_TTL)),
+                max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+        return _cache
@@ -0,0 +1,76 @@
+# db/chat_threads.py
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from db.mongodb_client import db
+from models.chat_thread_model import ChatThreadModel
+from utils.lazy import lazy_singleton
+
+THREAD_FIELDS = ["thread_id", "chat_title", "created_at"]
+THREAD_ORDER = [("created_at", DESCENDING), ("thread_id", DESCENDING)]
+
+chat_threads_collection = db["chat_threads"]
+
+@lazy_singleton
+def ensure_chat_thread_indexes():
+    """Create the thread_id lookup index and the newest-first listing index once per process."""
+    try:
+        chat_threads_collection.create_index([("thread_id", ASCENDING)], unique=True)
+    except OperationFailure as e:
+        # Existing duplicates block a unique index; lookups still benefit from a plain one
+        print(f"Could not build unique thread_id index ({e}), falling back to non-unique")
+        chat_threads_collection.create_index([("thread_id", ASCENDING)])
+    chat_threads_collection.create_index(THREAD_ORDER)
+
+def create_thread(thread_id, chat_title="New Chat"):
+    """
+    Store a thread unless it already exists.
+
+    Returns:
+        True if the thread was created by this call
+    """
+    chat_thread = ChatThreadModel(thread_id=thread_id, chat_title=chat_title)
+    result = chat_threads_collection.update_one(
+        {"thread_id": thread_id},
+        {"$setOnInsert": chat_thread.model_dump()},
+        upsert=True,
+    )
+    return result.upserted_id is not None
+
+def update_chat_title(thread_id, title):
+    chat_threads_collection.update_one({"thread_id": thread_id}, {"$set": {"chat_title": title}})
+
+def get_chat_title(thread_id):
+    thread = chat_threads_collection.find_one({"thread_id": thread_id}, {"chat_title": 1, "_id": 0})
+    return thread["chat_title"] if thread else None
+
+def list_threads(limit=20, after=None):
+    """
+    Return one page of threads, newest first, with only the fields the sidebar shows.
+
+    Pages are keyed on the last thread of the previous page rather than skipped over,
+    so later pages cost the same as the first.
+
+    Args:
+        limit: Maximum number of threads in the page
+        after: Cursor returned with the previous page, or None for the first page
+
+    Returns:
+        Tuple of (threads, cursor); cursor is None when there are no more threads
+    """
+    query = {}
+    if after is not None:
+        created_at, thread_id = after
+        query = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "thread_id": {"$lt": thread_id}},
+        ]}
+
+    projection = {field: 1 for field in THREAD_FIELDS}
+    projection["_id"] = 0
+    # Fetch one extra thread to know whether another page exists
+    threads = list(chat_threads_collection.find(query, projection).sort(THREAD_ORDER).limit(limit + 1))
+
+    if len(threads) <= limit:
+        return threads, None
+    threads = threads[:limit]
+    return threads, (threads[-1]["created_at"], threads[-1]["thread_id"])
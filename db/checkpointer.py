@@ -0,0 +1,210 @@
+# db/checkpointer.py
+from contextlib import contextmanager
+from langgraph.checkpoint.sqlite import SqliteSaver
+from utils.lazy import lazy_singleton
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+
+CHECKPOINT_DB_PATH = "./state_db/example.db"
+
+# Checkpoints kept per thread and namespace; older ones are pruned every PRUNE_EVERY writes to it
+CHECKPOINT_KEEP_LAST = 20
+PRUNE_EVERY = 10
+# Number of checkpoint writes between WAL checkpoints (and VACUUMs when enough pages are free)
+MAINTENANCE_EVERY = 500
+VACUUM_FREE_RATIO = 0.25
+# Upper bound on the size the WAL file is truncated back to after a checkpoint
+WAL_SIZE_LIMIT = 64 * 1024 * 1024
+
+class PooledSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver backed by a pool of connections instead of one shared connection.
+
+    Each cursor() borrows a connection for its duration, so concurrent sessions
+    read in parallel under WAL and only contend on SQLite's own write lock. Every
+    PRUNE_EVERY writes to a thread prune it back to its keep_last most recent
+    checkpoints, and every maintenance_every puts a background thread checkpoints
+    the WAL and vacuums the file once enough of it is free. The async methods run
+    the sync ones in a worker thread.
+
+    Args:
+        path: SQLite file holding the checkpoints
+        pool_size: Number of pooled connections
+        keep_last: Checkpoints kept per thread, or None to keep everything
+        maintenance_every: Checkpoint writes between maintenance runs
+        busy_timeout: Seconds a connection waits for the write lock
+    """
+
+    def __init__(self, path=CHECKPOINT_DB_PATH, pool_size=4, keep_last=CHECKPOINT_KEEP_LAST,
+                 maintenance_every=MAINTENANCE_EVERY, busy_timeout=30.0, *, serde=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.keep_last = keep_last
+        self.maintenance_every = maintenance_every
+        self.local = threading.local()
+        self.pool = queue.LifoQueue()
+        for _ in range(pool_size):
+            self.pool.put(self._connect())
+        self.puts = 0
+        self.thread_puts = {}
+        self.puts_lock = threading.Lock()
+        self.maintenance_lock = threading.Lock()
+        super().__init__(None, serde=serde)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.executescript(f"""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA journal_size_limit={WAL_SIZE_LIMIT};
+        """)
+        return conn
+
+    # SqliteSaver reads self.conn inside cursor(); point it at the connection this thread borrowed
+    @property
+    def conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            raise RuntimeError("PooledSqliteSaver.conn is only available inside cursor()")
+        return conn
+
+    @conn.setter
+    def conn(self, value):
+        pass
+
+    @contextmanager
+    def _borrow(self):
+        # Nested cursors on the same thread reuse the connection it already holds
+        if getattr(self.local, "conn", None) is not None:
+            self.local.depth += 1
+            try:
+                yield self.local.conn
+            finally:
+                self.local.depth -= 1
+            return
+
+        conn = self.pool.get()
+        self.local.conn, self.local.depth = conn, 1
+        try:
+            yield conn
+        finally:
+            self.local.conn = None
+            self.pool.put(conn)
+
+    def setup(self):
+        if self.is_setup:
+            return
+        with self.lock:
+            super().setup()
+
+    @contextmanager
+    def cursor(self, transaction=True):
+        with self._borrow() as conn:
+            self.setup()
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                if transaction:
+                    conn.commit()
+                cur.close()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread = (saved["configurable"]["thread_id"], saved["configurable"]["checkpoint_ns"])
+
+        with self.puts_lock:
+            self.puts += 1
+            self.thread_puts[thread] = self.thread_puts.get(thread, 0) + 1
+            prune_due = self.keep_last and self.thread_puts[thread] % PRUNE_EVERY == 0
+            maintenance_due = self.maintenance_every and self.puts % self.maintenance_every == 0
+        if prune_due:
+            self.prune(*thread, keep_last=self.keep_last)
+        if maintenance_due:
+            threading.Thread(target=self.maintain, daemon=True).start()
+        return saved
+
+    def prune(self, thread_id, checkpoint_ns="", keep_last=CHECKPOINT_KEEP_LAST):
+        """Delete all but the keep_last most recent checkpoints of a thread, and their writes."""
+        with self.cursor() as cur:
+            # Checkpoint ids are time-ordered, so the newest sort last
+            cur.execute(
+                """
+                DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < (
+                    SELECT MIN(checkpoint_id) FROM (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                        ORDER BY checkpoint_id DESC LIMIT ?
+                    )
+                )
+                """,
+                (str(thread_id), checkpoint_ns, str(thread_id), checkpoint_ns, keep_last),
+            )
+            if cur.rowcount:
+                cur.execute(
+                    """
+                    DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                    )
+                    """,
+                    (str(thread_id), checkpoint_ns, str(thread_id), checkpoint_ns),
+                )
+
+    def prune_all(self, keep_last=CHECKPOINT_KEEP_LAST):
+        """Apply the retention limit to every stored thread, e.g. for a database written before it existed."""
+        with self.cursor(transaction=False) as cur:
+            threads = cur.execute("SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints").fetchall()
+        for thread_id, checkpoint_ns in threads:
+            self.prune(thread_id, checkpoint_ns, keep_last)
+
+    def maintain(self, vacuum_free_ratio=VACUUM_FREE_RATIO):
+        """Checkpoint and truncate the WAL, and VACUUM when at least vacuum_free_ratio of the pages are free."""
+        # One maintenance run at a time; a run that finds another in progress has nothing to add
+        if not self.maintenance_lock.acquire(blocking=False):
+            return
+        try:
+            with self._borrow() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if page_count and freelist_count / page_count >= vacuum_free_ratio:
+                    conn.execute("VACUUM")
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.OperationalError as e:
+            # A busy database is fine; the next maintenance run will catch up
+            print(f"Checkpoint store maintenance skipped: {e}")
+        finally:
+            self.maintenance_lock.release()
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+@lazy_singleton
+def get_checkpointer():
+    """Return the pooled SQLite checkpointer shared by the chat graphs."""
+    return PooledSqliteSaver(CHECKPOINT_DB_PATH)
+
+if __name__ == "__main__":
+    # One-off compaction of a store written before retention existed: python -m db.checkpointer
+    saver = get_checkpointer()
+    size = lambda: sum(os.path.getsize(CHECKPOINT_DB_PATH + suffix) for suffix in ("", "-wal") if os.path.exists(CHECKPOINT_DB_PATH + suffix))
+    before = size()
+    saver.prune_all()
+    saver.maintain(vacuum_free_ratio=0)
+    print(f"Compacted {CHECKPOINT_DB_PATH}: {before / 1e6:.1f} MB -> {size() / 1e6:.1f} MB")
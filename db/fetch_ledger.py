@@ -0,0 +1,107 @@
+# db/fetch_ledger.py
+from datetime import datetime, timedelta
+from itertools import islice
+from pymongo import ASCENDING, UpdateOne
+from db.mongodb_client import db
+from db.embedding_cache import text_hash
+
+DEFAULT_REFRESH_TTL = timedelta(days=7)
+
+ledger_collection = db["fetch_ledger"]
+
+def ensure_ledger_indexes():
+    ledger_collection.create_index([("job_id", ASCENDING)], unique=True)
+
+def _in_batches(items, batch_size=1000):
+    items = iter(items)
+    while batch := list(islice(items, batch_size)):
+        yield batch
+
+def iter_stale_briefs(job_briefs, refresh_ttl=DEFAULT_REFRESH_TTL):
+    """
+    Yield the briefs that need fetching, looking them up in the ledger a batch at a time.
+
+    A brief is skipped if its posting was fetched successfully within refresh_ttl;
+    new postings, failed fetches and postings older than the TTL are yielded.
+    """
+    cutoff = datetime.now() - refresh_ttl
+    skipped = 0
+    for batch in _in_batches(job_briefs):
+        cursor = ledger_collection.find(
+            {"job_id": {"$in": [brief.job_id for brief in batch]}, "status": "ok", "fetched_at": {"$gte": cutoff}},
+            {"job_id": 1, "_id": 0},
+        )
+        fresh_ids = {entry["job_id"] for entry in cursor}
+        skipped += sum(1 for brief in batch if brief.job_id in fresh_ids)
+        yield from (brief for brief in batch if brief.job_id not in fresh_ids)
+    print(f"Skipped {skipped} postings fetched within {refresh_ttl}")
+
+def select_stale_briefs(job_briefs, refresh_ttl=DEFAULT_REFRESH_TTL):
+    """Return the briefs that need fetching as a list; see iter_stale_briefs."""
+    return list(iter_stale_briefs(job_briefs, refresh_ttl))
+
+def record_fetches(job_briefs, documents):
+    """
+    Record the outcome of fetching job_briefs and return the documents whose content changed.
+
+    Briefs without a matching document are marked as failed and keep their previous
+    content hash, so they are retried on the next run without being treated as changed.
+    Changed documents are only marked pending: they count as up to date once
+    confirm_fetches records them after they are stored, so a run that fails before
+    then fetches them again.
+
+    Args:
+        job_briefs: Briefs that were fetched
+        documents: Successfully fetched documents, with a job_id in their metadata
+
+    Returns:
+        The documents that are new or whose content hash differs from the ledger
+    """
+    documents_by_id = {document.metadata["job_id"]: document for document in documents}
+    job_ids = [brief.job_id for brief in job_briefs]
+
+    previous_hashes = {}
+    for batch in _in_batches(job_ids):
+        cursor = ledger_collection.find({"job_id": {"$in": batch}}, {"job_id": 1, "content_hash": 1, "_id": 0})
+        previous_hashes.update((entry["job_id"], entry.get("content_hash")) for entry in cursor)
+
+    now = datetime.now()
+    operations = []
+    changed_documents = []
+    for job_id in job_ids:
+        document = documents_by_id.get(job_id)
+        if document is None:
+            operations.append(UpdateOne(
+                {"job_id": job_id},
+                {"$set": {"status": "failed", "attempted_at": now}},
+                upsert=True,
+            ))
+            continue
+
+        content_hash = text_hash(document.page_content)
+        if previous_hashes.get(job_id) != content_hash:
+            changed_documents.append(document)
+            update = {"status": "pending", "attempted_at": now}
+        else:
+            # Already stored as it is now
+            update = {"status": "ok", "attempted_at": now, "fetched_at": now}
+        operations.append(UpdateOne({"job_id": job_id}, {"$set": update}, upsert=True))
+
+    for batch in _in_batches(operations):
+        ledger_collection.bulk_write(batch, ordered=False)
+
+    return changed_documents
+
+def confirm_fetches(documents):
+    """Mark documents returned by record_fetches as stored, with their new content hash."""
+    now = datetime.now()
+    operations = [
+        UpdateOne(
+            {"job_id": document.metadata["job_id"]},
+            {"$set": {"status": "ok", "fetched_at": now, "content_hash": text_hash(document.page_content)}},
+            upsert=True,
+        )
+        for document in documents
+    ]
+    for batch in _in_batches(operations):
+        ledger_collection.bulk_write(batch, ordered=False)
@@ -0,0 +1,69 @@
+# db/job_briefs.py
+from datetime import datetime
+from pymongo import ASCENDING, UpdateOne
+from db.mongodb_client import db
+from models.job_brief_model import JobBriefModel
+
+JOB_BRIEF_FIELDS = ["company_name", "job_id", "role", "location"]
+
+job_briefs_collection = db["job_briefs"]
+
+def _remove_duplicates():
+    """Keep the oldest document per job_id so a unique index can be built."""
+    duplicates = job_briefs_collection.aggregate([
+        {"$sort": {"_id": ASCENDING}},
+        {"$group": {"_id": "$job_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True)
+
+    removed = 0
+    for group in duplicates:
+        result = job_briefs_collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    if removed:
+        print(f"Removed {removed} duplicate job briefs")
+
+def ensure_job_brief_indexes():
+    if "job_id_1" not in job_briefs_collection.index_information():
+        _remove_duplicates()
+        job_briefs_collection.create_index([("job_id", ASCENDING)], unique=True)
+
+def upsert_job_briefs(job_briefs, batch_size=1000):
+    """
+    Insert new job briefs and refresh existing ones, keyed on job_id.
+
+    New briefs get a first_seen_at timestamp; every brief seen in this run has
+    its last_seen_at updated.
+
+    Returns:
+        Tuple of (inserted, updated) counts
+    """
+    now = datetime.now()
+    inserted = updated = 0
+
+    for start in range(0, len(job_briefs), batch_size):
+        operations = [
+            UpdateOne(
+                {"job_id": brief.job_id},
+                {
+                    "$set": {**brief.model_dump(), "last_seen_at": now},
+                    "$setOnInsert": {"first_seen_at": now},
+                },
+                upsert=True,
+            )
+            for brief in job_briefs[start:start + batch_size]
+        ]
+        result = job_briefs_collection.bulk_write(operations, ordered=False)
+        inserted += result.upserted_count
+        updated += result.matched_count
+
+    print(f"Stored job briefs: {inserted} new, {updated} already known")
+    return inserted, updated
+
+def iter_job_briefs(query=None, batch_size=1000):
+    """Stream job briefs from Mongo, fetching only the fields JobBriefModel needs."""
+    projection = {field: 1 for field in JOB_BRIEF_FIELDS}
+    projection["_id"] = 0
+    cursor = job_briefs_collection.find(query or {}, projection).batch_size(batch_size)
+    for job in cursor:
+        yield JobBriefModel(**job)
@@ -0,0 +1,124 @@
+# db/posting_index.py
+from datetime import datetime
+from itertools import islice
+from pymongo import ASCENDING
+from db.mongodb_client import db
+from db.embedding_cache import text_hash
+from utils.near_duplicates import minhash, lsh_bands, estimated_jaccard
+import threading
+
+# Estimated Jaccard similarity of the posting shingles above which two postings are the same advert
+REPOST_SIMILARITY = 0.8
+
+posting_collection = db["posting_index"]
+# Assignments read the index and then write to it; concurrent fetches must not both become canonical
+_assign_lock = threading.Lock()
+
+def ensure_posting_indexes():
+    posting_collection.create_index([("job_id", ASCENDING)], unique=True)
+    posting_collection.create_index([("content_hash", ASCENDING)])
+    posting_collection.create_index([("lsh_bands", ASCENDING), ("canonical", ASCENDING)])
+    posting_collection.create_index([("cluster_id", ASCENDING)])
+
+def _find_cluster(job_id, content_hash, signature, bands, threshold):
+    """Return the cluster a new or changed posting belongs to, or None if it is a new advert."""
+    exact = posting_collection.find_one(
+        {"content_hash": content_hash, "job_id": {"$ne": job_id}}, {"cluster_id": 1, "_id": 0}
+    )
+    if exact:
+        return exact["cluster_id"]
+
+    # Reposts are only compared with canonical postings, so the work grows with the
+    # number of distinct adverts rather than with the number of listings
+    best_cluster, best_similarity = None, threshold
+    candidates = posting_collection.find(
+        {"lsh_bands": {"$in": bands}, "canonical": True, "job_id": {"$ne": job_id}},
+        {"cluster_id": 1, "signature": 1, "_id": 0},
+    )
+    for candidate in candidates:
+        similarity = estimated_jaccard(signature, candidate["signature"])
+        if similarity >= best_similarity:
+            best_cluster, best_similarity = candidate["cluster_id"], similarity
+    return best_cluster
+
+def assign_posting(document, threshold=REPOST_SIMILARITY):
+    """
+    Place a fetched posting in the repost index and return its cluster ID.
+
+    A posting with the same content hash as a known one joins that posting's
+    cluster without any similarity work. Otherwise its MinHash signature is
+    bucketed with LSH, and it joins the cluster of the most similar candidate at or
+    above threshold, or starts a cluster of its own with itself as the canonical
+    posting. Canonical postings stay canonical when their content changes, so the
+    members of a cluster never lose the document that represents them.
+    """
+    job_id = document.metadata["job_id"]
+    content_hash = text_hash(document.page_content)
+    signature = minhash(document.page_content)
+    bands = lsh_bands(signature)
+
+    with _assign_lock:
+        existing = posting_collection.find_one({"job_id": job_id}, {"cluster_id": 1, "content_hash": 1, "_id": 0})
+        if existing and (existing["content_hash"] == content_hash or existing["cluster_id"] == job_id):
+            cluster_id = existing["cluster_id"]
+        else:
+            cluster_id = _find_cluster(job_id, content_hash, signature, bands, threshold) or job_id
+
+        posting_collection.update_one(
+            {"job_id": job_id},
+            {
+                "$set": {"cluster_id": cluster_id, "canonical": cluster_id == job_id, "content_hash": content_hash,
+                         "signature": signature, "lsh_bands": bands, "updated_at": datetime.now()},
+                "$setOnInsert": {"first_seen_at": datetime.now()},
+            },
+            upsert=True,
+        )
+    return cluster_id
+
+def canonical_documents(documents, threshold=REPOST_SIMILARITY):
+    """
+    Assign documents to repost clusters and return only the canonical ones.
+
+    Reposts and cross-listings of an advert that is already indexed are dropped
+    here, so only one copy of each advert is chunked and embedded. Kept documents
+    get their cluster_id in metadata.
+    """
+    canonical = []
+    for document in documents:
+        cluster_id = assign_posting(document, threshold)
+        if cluster_id == document.metadata["job_id"]:
+            document.metadata["cluster_id"] = cluster_id
+            canonical.append(document)
+    if len(canonical) < len(documents):
+        print(f"Skipping {len(documents) - len(canonical)} reposted or cross-listed postings")
+    return canonical
+
+def iter_new_briefs(job_briefs, batch_size=1000):
+    """
+    Yield the briefs that are not known reposts of another posting, a batch at a time.
+
+    A repost's content is already represented by its cluster's canonical posting,
+    so it is not fetched again. New job IDs are always yielded, since a posting
+    has to be fetched once to tell whether it is a repost.
+    """
+    job_briefs = iter(job_briefs)
+    skipped = 0
+    while batch := list(islice(job_briefs, batch_size)):
+        cursor = posting_collection.find(
+            {"job_id": {"$in": [brief.job_id for brief in batch]}}, {"job_id": 1, "cluster_id": 1, "_id": 0}
+        )
+        reposts = {entry["job_id"] for entry in cursor if entry["cluster_id"] != entry["job_id"]}
+        skipped += sum(1 for brief in batch if brief.job_id in reposts)
+        yield from (brief for brief in batch if brief.job_id not in reposts)
+    print(f"Skipped {skipped} known reposts")
+
+def skip_known_reposts(job_briefs):
+    """Return the briefs that are not known reposts as a list; see iter_new_briefs."""
+    return list(iter_new_briefs(job_briefs))
+
+def cluster_members(job_id):
+    """Job IDs listing the same advert as job_id, including itself."""
+    posting = posting_collection.find_one({"job_id": job_id}, {"cluster_id": 1, "_id": 0})
+    if not posting:
+        return [job_id]
+    return [entry["job_id"] for entry in posting_collection.find({"cluster_id": posting["cluster_id"]}, {"job_id": 1, "_id": 0})]
@@ -0,0 +1,202 @@
+# db/vector_index.py
+from typing import List, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+import argparse
+import json
+import numpy as np
+import os
+import uuid
+
+DEFAULT_INDEX_PATH = "./vector_index"
+# Rows widened to float32 and scored at a time; small blocks stay in CPU cache
+SEARCH_BLOCK_ROWS = 256
+
+def _prepare(vectors, dims):
+    """Truncate to the leading dims (Matryoshka) and L2-normalize rows."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dims:
+        vectors = vectors[..., :dims]
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def quantize(vectors, dtype):
+    """
+    Quantize normalized rows to float16, or to int8 with a per-row scale.
+
+    Returns:
+        Tuple of (quantized rows, per-row float32 scales)
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"Unsupported dtype {dtype!r}; expected int8 or float16")
+
+class QuantizedVectorStore(VectorStore):
+    """
+    Read-only vector store of quantized, memory-mapped embeddings with exact top-k search.
+
+    Vectors live in vectors.npy (int8 or float16, optionally truncated to their
+    leading dimensions), documents in documents.jsonl with a byte-offset table, so
+    only the pages touched by a search and the k returned documents are read.
+    Every query is scored against every vector, so results are exact up to
+    quantization error. int8 is the fast format; NumPy widens float16 much more
+    slowly, so float16 trades speed for accuracy. Build an index from the Chroma
+    store with build_from_chroma, or from raw texts with from_texts.
+
+    Args:
+        path: Directory written by build_from_chroma
+        embedding: Embeddings of the backend the index was built with
+    """
+
+    def __init__(self, path: str, embedding: Embeddings):
+        with open(os.path.join(path, "index.json")) as f:
+            self.header = json.load(f)
+        self.path = path
+        self.embedding = embedding
+        self.dims = self.header["dims"]
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.scales = np.load(os.path.join(path, "scales.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _document(self, row):
+        with open(os.path.join(self.path, "documents.jsonl"), "rb") as f:
+            f.seek(int(self.offsets[row]))
+            record = json.loads(f.readline())
+        return Document(id=record["id"], page_content=record["text"], metadata=record["metadata"] or {})
+
+    def search_vectors(self, query: List[float], k: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the rows and cosine scores of the k nearest vectors, best first."""
+        query = _prepare(query, self.dims)
+        scores = np.empty(len(self.vectors), dtype=np.float32)
+        buffer = np.empty((SEARCH_BLOCK_ROWS, self.vectors.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.vectors), SEARCH_BLOCK_ROWS):
+            block = self.vectors[start:start + SEARCH_BLOCK_ROWS]
+            np.copyto(buffer[:len(block)], block, casting="unsafe")
+            np.dot(buffer[:len(block)], query, out=scores[start:start + len(block)])
+        scores *= self.scales
+
+        k = min(k, len(scores))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        rows, scores = self.search_vectors(embedding, k)
+        return [(self._document(row), float(score)) for row, score in zip(rows, scores)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities; map them onto [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, path=DEFAULT_INDEX_PATH,
+                   dtype="int8", dims=None, backend_id=None, **kwargs):
+        """Embed texts, write them as an index at path and open it."""
+        texts = list(texts)
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(texts)
+        write_index(path, ids, texts, metadatas, embedding.embed_documents(texts),
+                    dtype=dtype, dims=dims, backend_id=backend_id)
+        return cls(path, embedding)
+
+def write_index(path, ids, texts, metadatas, embeddings, dtype="int8", dims=None, backend_id=None):
+    """Write a QuantizedVectorStore directory from parallel lists of ids, texts, metadata and embeddings."""
+    os.makedirs(path, exist_ok=True)
+    vectors = _prepare(embeddings, dims)
+    quantized, scales = quantize(vectors, dtype)
+
+    offsets = np.empty(len(ids), dtype=np.int64)
+    with open(os.path.join(path, "documents.jsonl"), "wb") as f:
+        for row, (id_, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+            offsets[row] = f.tell()
+            f.write(json.dumps({"id": id_, "text": text, "metadata": metadata}).encode() + b"\n")
+
+    np.save(os.path.join(path, "vectors.npy"), quantized)
+    np.save(os.path.join(path, "scales.npy"), scales)
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump({"dtype": dtype, "dims": vectors.shape[1] if len(vectors) else dims,
+                   "count": len(ids), "embedding_backend": backend_id}, f)
+
+def build_from_chroma(vectorstore, path=DEFAULT_INDEX_PATH, dtype="int8", dims=None, backend_id=None, page_size=5000):
+    """Export every chunk of a Chroma store into a quantized index at path."""
+    ids, texts, metadatas, embeddings = [], [], [], []
+    offset = 0
+    while True:
+        page = vectorstore.get(limit=page_size, offset=offset, include=["documents", "metadatas", "embeddings"])
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        texts.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        embeddings.extend(page["embeddings"])
+        offset += len(page["ids"])
+
+    write_index(path, ids, texts, metadatas, embeddings, dtype=dtype, dims=dims, backend_id=backend_id)
+    print(f"Wrote {len(ids)} vectors to {path} as {dtype}" + (f", truncated to {dims} dims" if dims else ""))
+
+def refresh_vector_index(vectorstore, path=DEFAULT_INDEX_PATH, backend_id=None):
+    """
+    Rebuild the index at path from the Chroma store after it changed.
+
+    Keeps the dtype and dims the index was built with. Does nothing if there is
+    no index at path, unless VECTOR_STORE=quantized, in which case it is built.
+
+    Returns:
+        True if the index was written
+    """
+    header_path = os.path.join(path, "index.json")
+    if os.path.exists(header_path):
+        with open(header_path) as f:
+            header = json.load(f)
+        dtype, dims = header["dtype"], header["dims"]
+    elif os.getenv("VECTOR_STORE") == "quantized":
+        dtype, dims = "int8", None
+    else:
+        return False
+    build_from_chroma(vectorstore, path, dtype, dims, backend_id)
+    return True
+
+def open_vector_index(path=DEFAULT_INDEX_PATH):
+    """Open the quantized index with the configured embedding backend, refusing one built by another."""
+    from utils.embeddings import get_embedding_backend_id, get_embedding_function
+    store = QuantizedVectorStore(path, get_embedding_function())
+    built_with = store.header.get("embedding_backend")
+    if built_with and built_with != get_embedding_backend_id():
+        raise ValueError(f"Index in {path} was built with {built_with}, not {get_embedding_backend_id()}")
+    return store
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the quantized vector index from the Chroma store.")
+    parser.add_argument("--chroma", default="./chroma", help="Chroma persist directory")
+    parser.add_argument("--path", default=DEFAULT_INDEX_PATH, help="Index directory to write")
+    parser.add_argument("--dtype", choices=["int8", "float16"], default="int8")
+    parser.add_argument("--dims", type=int, default=None, help="Keep only the leading dimensions (Matryoshka models only)")
+    args = parser.parse_args()
+
+    from utils.embeddings import get_embedding_backend_id, open_vectorstore
+    build_from_chroma(open_vectorstore(args.chroma), args.path, args.dtype, args.dims, get_embedding_backend_id())
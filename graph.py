@@ -1,19 +1,19 @@
 from typing import List, Literal
 from typing_extensions import TypedDict
 from langgraph.graph import END, StateGraph
-from langchain.schema import Document
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_ollama import ChatOllama
-from langchain_chroma import Chroma
-import sqlite3
-from langgraph.checkpoint.sqlite import SqliteSaver
+from langchain_core.documents import Document
+from router import LocalRouter
 from prompts import ROUTER_INSTRUCTIONS, DOCUMENT_GRADER_INSTRUCTIONS, RESPONSE_INSTRUCTIONS
-from langchain_core.messages import HumanMessage, SystemMessage
 from pydantic import BaseModel, Field
-from langchain_community.tools.tavily_search import TavilySearchResults
+from db.checkpointer import get_checkpointer
+from utils.embeddings import open_vectorstore
+from utils.instrumentation import get_instrumentation, graph_callbacks
+from utils.lazy import lazy_singleton
+from utils.selection import get_chat_model, DEFAULT_MODEL
+from langchain_core.runnables import RunnableConfig
 import os
+import time
 from dotenv import load_dotenv
-from IPython.display import Image, display
 
 load_dotenv()
 
@@ -21,28 +21,51 @@ def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = os.getenv(var)
 
-_set_env("LANGSMITH_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+# LangSmith tracing is opt-in (LANGCHAIN_TRACING_V2=true); step timings are recorded locally by utils.instrumentation
+if os.getenv("LANGCHAIN_TRACING_V2") == "true":
+    _set_env("LANGSMITH_API_KEY")
+    os.environ.setdefault("LANGCHAIN_PROJECT", "langchain-academy")
 
 _set_env("OPENAI_API_KEY")
 _set_env("TAVILY_API_KEY")
 os.environ["TOKENIZERS_PARALLELISM"] = "true"
 
-db = Chroma(
-    persist_directory='./chroma',
-    embedding_function=OpenAIEmbeddings(model="text-embedding-3-small")
-)
+# Clients are built on first use so importing this module stays cheap
 
-db_path = "./state_db/example.db"
-conn = sqlite3.connect(db_path, check_same_thread=False)
-memory = SqliteSaver(conn)
+# "chroma", or "quantized" for the memory-mapped index built by `python -m db.vector_index`
+# and refreshed by populate_database after each ingest
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
 
-retriever = db.as_retriever(search_kwargs={"k": 4})
-web_search_tool = TavilySearchResults(max_results=4)
+@lazy_singleton
+def get_vectorstore():
+    if VECTOR_STORE == "quantized":
+        from db.vector_index import open_vector_index
+        return open_vector_index()
+    return open_vectorstore('./chroma')
 
-llm = ChatOllama(model="deepseek-r1:7b")
-llm_openai = ChatOpenAI(model="gpt-4o-mini")
+@lazy_singleton
+def get_retriever():
+    return get_vectorstore().as_retriever(search_kwargs={"k": 4})
+
+@lazy_singleton
+def get_web_search_tool():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    return TavilySearchResults(max_results=4)
+
+def get_llm(config=None):
+    """Answer model selected for this run (configurable["model"]), or the default model."""
+    model_name = (config or {}).get("configurable", {}).get("model", DEFAULT_MODEL)
+    return get_chat_model(model_name)
+
+def get_llm_openai():
+    return get_chat_model("gpt-4o-mini")
+
+@lazy_singleton
+def get_query_router():
+    return LocalRouter()
+
+# Maximum number of grading calls in flight for one question
+GRADER_MAX_CONCURRENCY = 8
 
 class GraphState(TypedDict):
     documents: List
@@ -60,13 +83,20 @@ class DocumentGraderAnswer(BaseModel):
         None, description="Indicates whether the document contains relevant information to the question."
     )
     
+def llm_route(question):
+    router_llm = get_llm_openai().with_structured_output(RouterAnswer)
+    router_prompt = ROUTER_INSTRUCTIONS.format(question=question)
+    result = router_llm.invoke(router_prompt)
+    return result.datasource
+
 def route(state: GraphState): 
     question = state["question"]
     
-    router_llm = llm_openai.with_structured_output(RouterAnswer)
-    router_prompt = ROUTER_INSTRUCTIONS.format(question=question)
-    result = router_llm.invoke(router_prompt)
-    source = result.datasource
+    # Obvious and repeated questions are routed locally; the rest go to the LLM router
+    start = time.perf_counter()
+    source, tier = get_query_router().route(question, fallback=llm_route)
+    get_instrumentation().record("route", "router", time.perf_counter() - start, tier=tier, datasource=source)
+    print(f"---ROUTED BY {tier.upper()} TIER---")
     
     if source == "websearch":
         print("---ROUTING QUESTION TO WEB SEARCH---")
@@ -89,7 +119,7 @@ def web_search(state):
     print("---WEB SEARCH---")
 
     # Web search
-    docs = web_search_tool.invoke({"query": state["question"]})
+    docs = get_web_search_tool().invoke({"query": state["question"]})
     web_results = "\n".join([d["content"] for d in docs])
     web_results = Document(page_content=web_results)
 
@@ -98,7 +128,7 @@ def web_search(state):
 def retrieve(state: GraphState):
     print("---RETRIEVE---")
     
-    documents = retriever.invoke(state["question"])
+    documents = get_retriever().invoke(state["question"])
     return {"documents": documents}
 
 def grade_documents(state: GraphState):
@@ -106,49 +136,70 @@ def grade_documents(state: GraphState):
     question = state["question"]
     documents = state["documents"]
     
-    document_grader = llm_openai.with_structured_output(DocumentGraderAnswer)
-    
-    filtered_docs = []
-    for doc in documents:
-        doc_grader_instructions = DOCUMENT_GRADER_INSTRUCTIONS.format(
+    document_grader = get_llm_openai().with_structured_output(DocumentGraderAnswer)
+    doc_grader_instructions = [
+        DOCUMENT_GRADER_INSTRUCTIONS.format(
             document = doc.page_content,
             question = question
         )
-        result = document_grader.invoke(doc_grader_instructions)    
-        
-        if result.binary_score == "yes":
+        for doc in documents
+    ]
+    
+    # Grade all documents concurrently; batch returns results in input order
+    results = document_grader.batch(
+        doc_grader_instructions,
+        config={"max_concurrency": GRADER_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+    
+    filtered_docs = []
+    for doc, result in zip(documents, results):
+        if isinstance(result, Exception):
+            # Keep the document rather than lose context because one grading call failed
+            print(f"---GRADE: FAILED ({result!r}), KEEPING DOCUMENT---")
+            filtered_docs.append(doc)
+        elif result is not None and result.binary_score == "yes":
             print("---GRADE: DOCUMENT RELEVANT---")
             filtered_docs.append(doc)
     
     return {"documents": filtered_docs}
 
-def generate_answer(state: GraphState):
+def generate_answer(state: GraphState, config: RunnableConfig):
     question = state["question"]
     documents = state["documents"]
     loop_step = state.get("loop_step", 0)
     
     response_prompt = RESPONSE_INSTRUCTIONS.format(context=documents, question=question)
-    answer = llm.invoke(response_prompt)
+    answer = get_llm(config).invoke(response_prompt)
     return {"answer": answer, "loop_step": loop_step + 1}
 
-workflow = StateGraph(GraphState)
-
-workflow.add_node("websearch", web_search)
-workflow.add_node("retrieve", retrieve)
-workflow.add_node("grade_documents", grade_documents)
-workflow.add_node("generate_answer", generate_answer)
-
-workflow.set_conditional_entry_point(
-    route,
-    {
-        "websearch": "websearch",
-        "vectorstore": "retrieve",
-    },
-)
-workflow.add_edge("retrieve", "grade_documents")
-workflow.add_edge("websearch", "generate_answer")
-workflow.add_edge("grade_documents", "generate_answer")
-workflow.add_edge("generate_answer", END)
-
-# Add memory
-graph = workflow.compile(checkpointer=memory)
+@lazy_singleton
+def get_graph():
+    """Build and compile the RAG workflow once per process."""
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node("websearch", web_search)
+    workflow.add_node("retrieve", retrieve)
+    workflow.add_node("grade_documents", grade_documents)
+    workflow.add_node("generate_answer", generate_answer)
+
+    workflow.set_conditional_entry_point(
+        route,
+        {
+            "websearch": "websearch",
+            "vectorstore": "retrieve",
+        },
+    )
+    workflow.add_edge("retrieve", "grade_documents")
+    workflow.add_edge("websearch", "generate_answer")
+    workflow.add_edge("grade_documents", "generate_answer")
+    workflow.add_edge("generate_answer", END)
+
+    # Add memory; nodes and model calls are recorded when instrumentation is enabled
+    return workflow.compile(checkpointer=get_checkpointer()).with_config(callbacks=graph_callbacks())
+
+def __getattr__(name):
+    # Keep `from graph import graph` working without building the graph at import time
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
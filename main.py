@@ -1,14 +1,13 @@
-from db.mongodb_client import db
+from db.job_briefs import ensure_job_brief_indexes, upsert_job_briefs
 from scraper.job_briefs_scraper import scrape_job_briefs
 import asyncio
 
 async def main():
     job_briefs = await scrape_job_briefs()
-    job_briefs = [job.model_dump() for job in job_briefs]
     
     # Store job briefs in MongoDB
-    job_collection = db["job_briefs"]
-    job_collection.insert_many(job_briefs)
+    ensure_job_brief_indexes()
+    upsert_job_briefs(job_briefs)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,15 +1,29 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
 import hashlib
 import asyncio
-from scraper.jobs_scraper import scrape_job_documents
+import aiohttp
+import argparse
+import json
+import logging
+import time
+from scraper.jobs_scraper import (
+    scrape_job_documents, fetch_job_document, AdaptiveRateLimiter, DEFAULT_RATE_LIMIT, RATE_WINDOW
+)
+from scraper.scrape_metrics import ScrapeMetrics, report_progress, DEFAULT_PROGRESS_INTERVAL
+from scraper.retry_policy import RetryPolicy
 from scraper.job_briefs_scraper import scrape_job_briefs
 from dotenv import load_dotenv
 import os
 import openai
-from db.mongodb_client import db
-from models.job_brief_model import JobBriefModel
+from db.embedding_cache import text_hash
+from utils.embeddings import open_vectorstore, get_embedding_backend_id
+from utils.near_duplicates import NearDuplicateFilter
+from db.answer_cache import get_answer_cache
+from db.fetch_ledger import ensure_ledger_indexes, iter_stale_briefs, record_fetches, confirm_fetches
+from db.job_briefs import iter_job_briefs
+from db.vector_index import refresh_vector_index
+from db.posting_index import ensure_posting_indexes, canonical_documents, iter_new_briefs
+from datetime import timedelta
 
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
@@ -22,47 +36,175 @@ def split_documents(documents, chunk_size=1000, chunk_overlap=100):
     )
     return text_splitter.split_documents(documents)
 
-# Function to generate a unique ID for a document based on metadata only
+# Function to generate a unique ID for a chunk based on its source and content
 def generate_chunk_id(chunk):
-    """Generate a unique ID based on document metadata."""
-    hash_input = str(chunk.metadata) 
-    return hashlib.sha256(hash_input.encode()).hexdigest()
+    """Generate an ID from the chunk's source and a hash of its normalized text."""
+    source_hash = hashlib.sha256(str(chunk.metadata.get("source")).encode()).hexdigest()[:16]
+    return f"{source_hash}:{text_hash(chunk.page_content)}"
 
 def calculate_chunk_ids(chunks):
-    last_page_id = None
-    current_chunk_index = 0
+    """
+    Assign content-addressed IDs so that editing one part of a document leaves the
+    IDs of its other chunks, and therefore their embeddings, untouched.
+    """
+    seen_ids = {}
 
     for chunk in chunks:
-        current_page_id = generate_chunk_id(chunk)
+        chunk_id = generate_chunk_id(chunk)
 
-        # If the page ID is the same as the last one, increment the index.
-        if current_page_id == last_page_id:
-            current_chunk_index += 1
-        else:
-            current_chunk_index = 0
-
-        # Calculate the chunk ID.
-        chunk_id = f"{current_page_id}:{current_chunk_index}"
-        last_page_id = current_page_id
+        # Identical text repeated within one source gets an occurrence suffix
+        occurrence = seen_ids.get(chunk_id, 0)
+        seen_ids[chunk_id] = occurrence + 1
+        if occurrence:
+            chunk_id = f"{chunk_id}:{occurrence}"
 
         # Add it to the page meta-data.
         chunk.metadata["id"] = chunk_id
 
     return chunks
 
+def generate_content_hash(chunk):
+    """Generate a hash of the chunk text, stored alongside it to detect changes."""
+    return hashlib.sha256(chunk.page_content.encode()).hexdigest()
+
+def _batched(items, batch_size):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+def load_existing_hashes(db, page_size=5000):
+    """
+    Page through the collection and return the stored content hash and source of every chunk.
+
+    Chunks written before content hashes were stored have their hash computed from the
+    stored document text, which is fetched in pages only for those IDs.
+
+    Args:
+        db: Chroma vectorstore
+        page_size: Number of records to fetch per round-trip
+
+    Returns:
+        Dict mapping chunk ID to a (content_hash, source) tuple
+    """
+    existing = {}
+    missing_hash_ids = []
+    offset = 0
+
+    while True:
+        page = db.get(include=["metadatas"], limit=page_size, offset=offset)
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            metadata = metadata or {}
+            existing[chunk_id] = (metadata.get("content_hash"), metadata.get("source"))
+            if not metadata.get("content_hash"):
+                missing_hash_ids.append(chunk_id)
+        if len(page["ids"]) < page_size:
+            break
+        offset += page_size
+
+    for ids in _batched(missing_hash_ids, page_size):
+        page = db.get(ids=ids, include=["documents"])
+        for chunk_id, document in zip(page["ids"], page["documents"]):
+            content_hash = hashlib.sha256((document or "").encode()).hexdigest()
+            existing[chunk_id] = (content_hash, existing[chunk_id][1])
+
+    return existing
+
+def reconcile_chroma(db, chunks, page_size=5000, batch_size=1000):
+    """
+    Diff chunks against the collection in one pass and apply the result in batches.
+
+    New chunks are added, chunks whose content hash changed are upserted, and stored
+    chunks that belong to one of the incoming sources but are no longer produced by
+    it are deleted. Sources that are not part of this run are left untouched.
+
+    Args:
+        db: Chroma vectorstore
+        chunks: Chunks with IDs already assigned by calculate_chunk_ids
+        page_size: Number of records to fetch per round-trip when loading hashes
+        batch_size: Number of chunks per add/upsert/delete call
+
+    Returns:
+        Tuple of (new, updated, deleted) counts
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    existing = load_existing_hashes(db, page_size=page_size)
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_documents = []
+    updated_documents = []
+    incoming_ids = set()
+    incoming_sources = set()
+    for chunk in chunks:
+        chunk_id = chunk.metadata["id"]
+        chunk.metadata["content_hash"] = generate_content_hash(chunk)
+        incoming_ids.add(chunk_id)
+        incoming_sources.add(chunk.metadata.get("source"))
+
+        if chunk_id not in existing:
+            new_documents.append(chunk)
+        elif existing[chunk_id][0] != chunk.metadata["content_hash"]:
+            updated_documents.append(chunk)
+
+    deleted_ids = [
+        chunk_id for chunk_id, (_, source) in existing.items()
+        if source in incoming_sources and chunk_id not in incoming_ids
+    ]
+    timings["diff"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for batch in _batched(new_documents, batch_size):
+        db.add_documents(documents=batch, ids=[doc.metadata["id"] for doc in batch])
+    timings["add"] = time.perf_counter() - start
+
+    # Chroma's add is an upsert, so changed chunks are overwritten in place
+    start = time.perf_counter()
+    for batch in _batched(updated_documents, batch_size):
+        db.add_documents(documents=batch, ids=[doc.metadata["id"] for doc in batch])
+    timings["upsert"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ids in _batched(deleted_ids, batch_size):
+        db.delete(ids=ids)
+    timings["delete"] = time.perf_counter() - start
+
+    print(
+        f"Reconciled {len(chunks)} chunks against {len(existing)} stored: "
+        f"{len(new_documents)} new, {len(updated_documents)} updated, {len(deleted_ids)} deleted."
+    )
+    print("Phase timings: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items()))
+
+    return len(new_documents), len(updated_documents), len(deleted_ids)
 
 # Function to store documents in a vector store
-def add_to_chroma(chunks, vectorstore_path="./chroma"):
-    """Store documents into Chroma vectorstore, updating existing documents as needed."""
+def add_to_chroma(chunks, vectorstore_path="./chroma", batched=True, dedupe=True):
+    """
+    Store documents into Chroma vectorstore, updating existing documents as needed.
+
+    With batched=True the collection is reconciled in bulk by reconcile_chroma;
+    otherwise every existing chunk is fetched and updated one at a time. With
+    dedupe=True chunks that nearly duplicate a chunk of another source are dropped.
+    """
     
     # Initialize Chroma
-    db = Chroma(
-        persist_directory=vectorstore_path,
-        embedding_function=OpenAIEmbeddings(model="text-embedding-3-small")
-    )
+    db = open_vectorstore(vectorstore_path)
 
     # Calculate chunk IDs
     chunks = calculate_chunk_ids(chunks)
+
+    if dedupe:
+        near_duplicates = NearDuplicateFilter.from_vectorstore(db)
+        chunks = near_duplicates.filter(chunks)
+        print(f"Dropped {near_duplicates.dropped} near-duplicate chunks")
+
+    if batched:
+        num_new, num_updated, num_deleted = reconcile_chroma(db, chunks)
+        if num_new or num_updated or num_deleted:
+            # Cached answers may no longer match what retrieval would return
+            get_answer_cache().invalidate()
+        return num_new
+
     results = db.get()
     existing_ids = set(results["ids"])
 
@@ -96,19 +238,327 @@ def add_to_chroma(chunks, vectorstore_path="./chroma"):
         print("No new or updated documents to process.")
     else:
         print(f"Added {len(new_documents)} new documents and updated {len(updated_documents)} documents.")
+        get_answer_cache().invalidate()
 
     return len(new_documents)
 
+def prepare_chunks(documents):
+    """Split documents and give every chunk its ID and content hash."""
+    chunks = calculate_chunk_ids(split_documents(documents))
+    for chunk in chunks:
+        chunk.metadata["content_hash"] = generate_content_hash(chunk)
+    return chunks
+
+def diff_source(vectorstore, source, chunks):
+    """
+    Compare the chunks of one source with what is stored for it.
+
+    Nothing is deleted here: the caller deletes the stale chunks once the changed
+    ones are stored, so a failed embedding or write never leaves the source
+    without chunks in the store.
+
+    Returns:
+        Tuple of (chunks that are new or changed, IDs of stored chunks the source no longer produces)
+    """
+    stored = vectorstore.get(where={"source": source}, include=["metadatas"])
+    stored_hashes = {
+        chunk_id: (metadata or {}).get("content_hash")
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"])
+    }
+    changed = [chunk for chunk in chunks if stored_hashes.get(chunk.metadata["id"]) != chunk.metadata["content_hash"]]
+    stale_ids = list(stored_hashes.keys() - {chunk.metadata["id"] for chunk in chunks})
+    return changed, stale_ids
+
+class PendingSources:
+    """
+    Sources whose changed chunks are still being embedded and stored.
+
+    add() registers a source with its number of changed chunks, its stale chunk
+    IDs and the documents it came from; stored() counts written chunks off and
+    returns the sources that are now complete, whose stale chunks can be deleted.
+    """
+
+    def __init__(self):
+        self.sources = {}  # source -> [chunks not stored yet, stale IDs, documents]
+
+    def add(self, source, num_chunks, stale_ids, documents=()):
+        entry = self.sources.setdefault(source, [0, [], []])
+        entry[0] += num_chunks
+        entry[1].extend(stale_ids)
+        entry[2].extend(documents)
+
+    def stored(self, chunks):
+        """Return (stale IDs, documents) of the sources whose last chunk is among chunks."""
+        stale_ids, documents = [], []
+        for chunk in chunks:
+            entry = self.sources[chunk.metadata["source"]]
+            entry[0] -= 1
+            if not entry[0]:
+                _, source_stale_ids, source_documents = self.sources.pop(chunk.metadata["source"])
+                stale_ids.extend(source_stale_ids)
+                documents.extend(source_documents)
+        return stale_ids, documents
+
+def upsert_embedded(vectorstore, chunks, vectors):
+    """Write chunks with precomputed embeddings, bypassing a second embedding call."""
+    vectorstore._collection.upsert(
+        ids=[chunk.metadata["id"] for chunk in chunks],
+        embeddings=vectors,
+        metadatas=[chunk.metadata for chunk in chunks],
+        documents=[chunk.page_content for chunk in chunks],
+    )
+
+async def _drain(source_queue, handle, num_workers, sink_queue=None, num_sink_workers=1):
+    """Run num_workers consumers of source_queue until it is closed, then close sink_queue."""
+    async def worker():
+        while (item := await source_queue.get()) is not None:
+            await handle(item)
+
+    await asyncio.gather(*(worker() for _ in range(num_workers)))
+    if sink_queue is not None:
+        for _ in range(num_sink_workers):
+            await sink_queue.put(None)
+
+async def stream_to_chroma(
+    job_briefs,
+    vectorstore_path="./chroma",
+    fetch_concurrency=DEFAULT_RATE_LIMIT,
+    split_concurrency=2,
+    embed_concurrency=2,
+    embed_batch_size=256,
+    flush_interval=2.0,
+    queue_size=64,
+    incremental=False,
+    dedupe=True,
+    metrics=None,
+    progress_interval=DEFAULT_PROGRESS_INTERVAL,
+):
+    """
+    Fetch, split, embed and store job documents as a pipeline of bounded queues.
+
+    Each stage has its own concurrency limit and a bounded queue in front of it, so
+    a slow stage applies backpressure upstream and memory stays flat regardless of
+    the crawl size. Documents are written as soon as a batch is embedded instead of
+    after the last HTTP response arrives.
+
+    Args:
+        job_briefs: Iterable of JobBriefModel objects to fetch
+        vectorstore_path: Path of the Chroma persist directory
+        fetch_concurrency: Number of concurrent Jina requests
+        split_concurrency: Number of documents split concurrently
+        embed_concurrency: Number of embedding batches in flight
+        embed_batch_size: Maximum number of chunks per embedding call
+        flush_interval: Seconds to wait before embedding a partial batch
+        queue_size: Capacity of each inter-stage queue
+        incremental: Record fetches in the fetch ledger and only pass on postings
+            whose content changed since the last fetch; a posting is confirmed
+            in the ledger once all of its changed chunks are stored
+        dedupe: Skip reposts of an advert that is already indexed, and drop chunks
+            that nearly duplicate a chunk of another posting
+        metrics: ScrapeMetrics recording the fetches, logged every progress_interval seconds
+
+    Returns:
+        Dict of document, chunk and skipped-chunk counts
+    """
+    vectorstore = open_vectorstore(vectorstore_path)
+    rate_limiter = AdaptiveRateLimiter(DEFAULT_RATE_LIMIT, RATE_WINDOW)
+    semaphore = asyncio.Semaphore(fetch_concurrency)
+    retry_policy = RetryPolicy()
+    near_duplicates = NearDuplicateFilter.from_vectorstore(vectorstore) if dedupe else None
+    metrics = metrics or ScrapeMetrics()
+    metrics.start(len(job_briefs) if hasattr(job_briefs, "__len__") else None, rate_limiter)
+
+    brief_queue = asyncio.Queue(maxsize=queue_size)
+    document_queue = asyncio.Queue(maxsize=queue_size)
+    chunk_queue = asyncio.Queue(maxsize=queue_size * 4)
+    batch_queue = asyncio.Queue(maxsize=embed_concurrency)
+    write_queue = asyncio.Queue(maxsize=embed_concurrency)
+    stats = {"documents": 0, "chunks": 0, "unchanged": 0, "deleted": 0, "near_duplicates": 0}
+    start = time.perf_counter()
+
+    async def feed_briefs():
+        # Pull from the iterator off the loop: it may query Mongo for its next batch
+        briefs = iter(job_briefs)
+        while (brief := await asyncio.to_thread(next, briefs, None)) is not None:
+            await brief_queue.put(brief)
+        for _ in range(fetch_concurrency):
+            await brief_queue.put(None)
+
+    # Stale chunks are deleted and the ledger confirmed once a source's changed chunks are stored
+    pending_sources = PendingSources()
+
+    async def confirm(documents):
+        if incremental and documents:
+            await asyncio.to_thread(confirm_fetches, documents)
+
+    async def fetch(session, brief):
+        document = await fetch_job_document(session, brief, rate_limiter, semaphore, retry_policy, metrics=metrics)
+        documents = [document] if document is not None else []
+        if incremental:
+            documents = await asyncio.to_thread(record_fetches, [brief], documents)
+        if dedupe:
+            canonical = await asyncio.to_thread(canonical_documents, documents)
+            # Reposts of an indexed advert are deliberately not stored
+            await confirm([document for document in documents if document not in canonical])
+            documents = canonical
+        for document in documents:
+            await document_queue.put(document)
+
+    async def delete_stale(stale_ids):
+        if stale_ids:
+            await asyncio.to_thread(vectorstore.delete, ids=stale_ids)
+            stats["deleted"] += len(stale_ids)
+
+    async def split(document):
+        chunks = await asyncio.to_thread(prepare_chunks, [document])
+        changed, stale_ids = await asyncio.to_thread(diff_source, vectorstore, document.metadata["source"], chunks)
+
+        stats["documents"] += 1
+        stats["unchanged"] += len(chunks) - len(changed)
+        if near_duplicates is not None:
+            # Hashing runs off the loop; the index is only touched from it, so needs no lock
+            await asyncio.to_thread(near_duplicates.fingerprint, changed)
+            kept = near_duplicates.filter(changed)
+            stats["near_duplicates"] += len(changed) - len(kept)
+            changed = kept
+        if not changed:
+            await delete_stale(stale_ids)
+            await confirm([document])
+            return
+        pending_sources.add(document.metadata["source"], len(changed), stale_ids, [document])
+        for chunk in changed:
+            await chunk_queue.put(chunk)
+
+    async def batch_chunks():
+        batch = []
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunk_queue.get(), timeout=flush_interval)
+            except asyncio.TimeoutError:
+                # Embed a partial batch rather than hold it until the batch fills up
+                if batch:
+                    await batch_queue.put(batch)
+                    batch = []
+                continue
+            if chunk is None:
+                break
+            batch.append(chunk)
+            if len(batch) >= embed_batch_size:
+                await batch_queue.put(batch)
+                batch = []
+        if batch:
+            await batch_queue.put(batch)
+        for _ in range(embed_concurrency):
+            await batch_queue.put(None)
+
+    async def embed(batch):
+        texts = [chunk.page_content for chunk in batch]
+        vectors = await vectorstore.embeddings.aembed_documents(texts)
+        await write_queue.put((batch, vectors))
+
+    def write_batch(item):
+        batch, vectors = item
+        upsert_embedded(vectorstore, batch, vectors)
+        if not stats["chunks"]:
+            print(f"First batch stored after {time.perf_counter() - start:.2f}s")
+        stats["chunks"] += len(batch)
+
+    async def write(item):
+        await asyncio.to_thread(write_batch, item)
+        # Finish the postings whose last chunk this batch stored
+        stale_ids, documents = pending_sources.stored(item[0])
+        await delete_stale(stale_ids)
+        await confirm(documents)
+
+    progress = asyncio.create_task(report_progress(metrics, progress_interval))
+    try:
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(
+                feed_briefs(),
+                _drain(brief_queue, lambda brief: fetch(session, brief), fetch_concurrency,
+                       document_queue, split_concurrency),
+                _drain(document_queue, split, split_concurrency, chunk_queue),
+                batch_chunks(),
+                _drain(batch_queue, embed, embed_concurrency, write_queue),
+                # Chroma's local store takes one writer at a time
+                _drain(write_queue, write, 1),
+            )
+    finally:
+        progress.cancel()
+        metrics.finish()
+
+    if stats["chunks"] or stats["deleted"]:
+        get_answer_cache().invalidate()
+
+    print(
+        f"Streamed {stats['documents']} documents in {time.perf_counter() - start:.2f}s: "
+        f"stored {stats['chunks']} chunks, skipped {stats['unchanged']} unchanged and "
+        f"{stats['near_duplicates']} near-duplicates, deleted {stats['deleted']} stale."
+    )
+    return stats
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape job postings and store them in Chroma.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Fetch, split, embed and store documents as a streaming pipeline")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch postings that are new or older than the refresh TTL")
+    parser.add_argument("--refresh-ttl-hours", type=float, default=24 * 7,
+                        help="Refetch postings last fetched longer ago than this (with --incremental)")
+    parser.add_argument("--keep-reposts", action="store_true",
+                        help="Fetch and embed reposted adverts and near-duplicate chunks too")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "INFO"),
+                        help="DEBUG logs every request and retry; WARNING only failures")
+    parser.add_argument("--metrics-report", default=None,
+                        help="Write the crawl's throughput, latency and rate-limit metrics to this JSON file")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+    dedupe = not args.keep_reposts
+    metrics = ScrapeMetrics()
+
     print("🔎 Starting job scraping process...")
 
-    jobs_collection = db["job_briefs"]
-    job_briefs = [JobBriefModel(**job) for job in list(jobs_collection.find())]
+    # Lazy filters: the stream path never holds more than a batch of briefs in memory
+    job_briefs = iter_job_briefs()
 
-    # Run the async function
-    documents = asyncio.run(scrape_job_documents(job_briefs))
-    print("✅ Job scraping process completed.")
-    
-    chunks = split_documents(documents)
-    add_to_chroma(chunks)
-    
\ No newline at end of file
+    if dedupe:
+        ensure_posting_indexes()
+        job_briefs = iter_new_briefs(job_briefs)
+
+    if args.incremental:
+        ensure_ledger_indexes()
+        job_briefs = iter_stale_briefs(job_briefs, timedelta(hours=args.refresh_ttl_hours))
+
+    if args.stream:
+        asyncio.run(stream_to_chroma(job_briefs, incremental=args.incremental, dedupe=dedupe, metrics=metrics))
+        print("✅ Job scraping process completed.")
+    else:
+        # The batch path keeps every fetched document anyway, and record_fetches
+        # needs the briefs again after the crawl, so materialize them here
+        job_briefs = list(job_briefs)
+        documents = asyncio.run(scrape_job_documents(job_briefs, metrics=metrics))
+        print("✅ Job scraping process completed.")
+
+        if args.incremental:
+            fetched = len(documents)
+            documents = record_fetches(job_briefs, documents)
+            changed_documents = documents
+            print(f"{len(documents)} of {fetched} fetched postings are new or changed")
+
+        if dedupe:
+            documents = canonical_documents(documents)
+
+        chunks = split_documents(documents)
+        add_to_chroma(chunks, dedupe=dedupe)
+
+        if args.incremental:
+            # Only now are the changed postings stored; a failure above leaves them pending for the next run
+            confirm_fetches(changed_documents)
+
+    # The quantized index is a snapshot of Chroma; serving it unrefreshed would miss this ingest
+    refresh_vector_index(open_vectorstore(), backend_id=get_embedding_backend_id())
+
+    if args.metrics_report:
+        with open(args.metrics_report, "w") as f:
+            json.dump(metrics.snapshot(), f, indent=2)
+        print(f"📊 Scrape metrics written to {args.metrics_report}")
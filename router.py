@@ -0,0 +1,166 @@
+from collections import Counter, OrderedDict
+import math
+import re
+import threading
+import zlib
+
+# Labelled example queries for the local router
+ROUTER_EXAMPLES = [
+    ("what skills do ml engineer roles need", "vectorstore"),
+    ("which programming languages are required for machine learning jobs", "vectorstore"),
+    ("what qualifications do data scientist positions ask for", "vectorstore"),
+    ("responsibilities of a machine learning engineer", "vectorstore"),
+    ("do ml jobs require a phd", "vectorstore"),
+    ("which companies are hiring machine learning engineers", "vectorstore"),
+    ("what experience is needed for a senior ml engineer role", "vectorstore"),
+    ("list the job listings for computer vision roles", "vectorstore"),
+    ("what frameworks like pytorch or tensorflow do the job postings mention", "vectorstore"),
+    ("are there remote machine learning jobs in sydney", "vectorstore"),
+    ("what does an mlops engineer do day to day", "vectorstore"),
+    ("which cloud platforms do the job ads ask for aws gcp azure", "vectorstore"),
+    ("entry level graduate machine learning positions requirements", "vectorstore"),
+    ("what tools do nlp engineer job listings require", "vectorstore"),
+    ("salary range for ai engineer roles in melbourne", "vectorstore"),
+    ("what is the difference between data scientist and ml engineer roles in the listings", "vectorstore"),
+    ("what soft skills do employers want for ai roles", "vectorstore"),
+    ("show me llm engineer job requirements", "vectorstore"),
+    ("what is the latest news today", "websearch"),
+    ("who won the football game last night", "websearch"),
+    ("what is the weather in sydney tomorrow", "websearch"),
+    ("current stock price of nvidia", "websearch"),
+    ("what happened in the election this week", "websearch"),
+    ("when is the next apple event", "websearch"),
+    ("recent announcements from openai this month", "websearch"),
+    ("how do i cook a lasagna", "websearch"),
+    ("what is the capital of france", "websearch"),
+    ("best restaurants near me", "websearch"),
+    ("latest release of python and what is new", "websearch"),
+    ("who is the current prime minister of australia", "websearch"),
+    ("exchange rate between aud and usd today", "websearch"),
+    ("breaking news about tech layoffs", "websearch"),
+    ("what movies are showing this weekend", "websearch"),
+    ("how tall is mount everest", "websearch"),
+    ("latest news about machine learning hiring", "websearch"),
+    ("recent layoffs at ai companies this week", "websearch"),
+    ("current state of the ml job market in 2025", "websearch"),
+    ("which tech companies announced hiring freezes today", "websearch"),
+]
+
+# Time-sensitive words the job postings cannot answer for; a local vectorstore
+# decision on a question containing one is deferred to the fallback
+WEB_CUES = {
+    "latest", "news", "today", "tonight", "yesterday", "tomorrow", "current", "currently",
+    "recent", "recently", "now", "breaking", "week", "month", "trending", "announced",
+}
+YEAR_PATTERN = re.compile(r"(19|20)[0-9]{2}")
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "do", "does", "what", "which", "who", "for", "of", "in",
+    "to", "and", "or", "me", "i", "my", "on", "at", "by", "with", "how", "about", "there",
+}
+
+def normalize_question(question):
+    return " ".join(re.findall(r"[a-z0-9+#]+", question.lower()))
+
+def _features(question, dims):
+    tokens = [token for token in normalize_question(question).split() if token not in STOPWORDS]
+    terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vector = Counter(zlib.crc32(term.encode()) % dims for term in terms)
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {index: value / norm for index, value in vector.items()}
+
+def has_web_cue(question):
+    """Whether the question asks about something time-sensitive."""
+    return any(token in WEB_CUES or YEAR_PATTERN.fullmatch(token) for token in normalize_question(question).split())
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+class LocalRouter:
+    """
+    Route questions without a network call when the answer is obvious.
+
+    A nearest-centroid classifier over hashed unigram and bigram features decides
+    when the similarity margin between the two sources is at least threshold;
+    otherwise the fallback (the LLM router) decides. So does a question with a
+    time-sensitive cue (latest, news, today, a year, ...) that the classifier
+    would send to the vectorstore, since keyword overlap with the job postings
+    says little about whether they are current enough. Decisions are memoized per
+    normalized question, and metrics count which tier made each decision.
+
+    Args:
+        examples: (question, datasource) pairs to train on
+        threshold: Minimum margin between the best and second-best source
+        cache_size: Number of memoized decisions
+        dims: Size of the hashed feature space
+    """
+
+    def __init__(self, examples=ROUTER_EXAMPLES, threshold=0.15, cache_size=1024, dims=2 ** 18):
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self.dims = dims
+        self.cache = OrderedDict()
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+        centroids = {}
+        for question, label in examples:
+            centroid = centroids.setdefault(label, Counter())
+            centroid.update(_features(question, dims))
+        self.centroids = {}
+        for label, centroid in centroids.items():
+            norm = math.sqrt(sum(value * value for value in centroid.values())) or 1.0
+            self.centroids[label] = {index: value / norm for index, value in centroid.items()}
+
+    def classify(self, question):
+        """Return the best datasource and its margin over the runner-up."""
+        features = _features(question, self.dims)
+        scores = sorted(
+            ((_cosine(features, centroid), label) for label, centroid in self.centroids.items()),
+            reverse=True,
+        )
+        best_score, best_label = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        return best_label, best_score - runner_up
+
+    def route(self, question, fallback):
+        """
+        Return (datasource, tier) for a question.
+
+        Args:
+            question: The user question
+            fallback: Callable taking the question and returning a datasource,
+                used when the local classifier is not confident
+        """
+        key = normalize_question(question)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.counts["cache"] += 1
+                return self.cache[key], "cache"
+
+        label, margin = self.classify(question)
+        if margin >= self.threshold and not (label == "vectorstore" and has_web_cue(question)):
+            tier = "local"
+        else:
+            label = fallback(question)
+            tier = "llm"
+
+        with self.lock:
+            self.counts[tier] += 1
+            if label is not None:
+                self.cache[key] = label
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return label, tier
+
+    def metrics(self):
+        """Decision counts and shares per tier."""
+        with self.lock:
+            total = sum(self.counts.values())
+            return {
+                tier: {"count": count, "share": count / total}
+                for tier, count in self.counts.items()
+            }
@@ -3,6 +3,7 @@ from playwright.async_api import async_playwright, Error as PlaywrightError
 from dotenv import load_dotenv
 from pydantic import ValidationError
 from typing import List
+import asyncio
 import os
 import sys
 from models.job_brief_model import JobBriefModel
@@ -12,8 +13,8 @@ load_dotenv()
 
 def deduplicate_jobs(jobs: List[JobBriefModel]) -> List[JobBriefModel]:
     """
-    Remove duplicate job entries based on company_name and role combination.
-    Keeps the first occurrence of each unique combination.
+    Remove duplicate job entries based on job_id.
+    Keeps the first occurrence of each job.
     
     Args:
         jobs: List of JobBriefModel objects
@@ -25,72 +26,133 @@ def deduplicate_jobs(jobs: List[JobBriefModel]) -> List[JobBriefModel]:
     unique_jobs = []
     
     for job in jobs:
-        # Create a tuple of company_name and role to use as a unique identifier
-        key = (job.company_name, job.role)
-        
-        if key not in seen:
-            seen.add(key)
+        if job.job_id not in seen:
+            seen.add(job.job_id)
             unique_jobs.append(job)
             
     print(f"Removed {len(jobs) - len(unique_jobs)} duplicate job listings")       
             
     return unique_jobs
 
-async def scrape_job_briefs():
+BASE_URL = "https://www.seek.com.au/machine-learning-jobs"
+NUM_PAGES = 15
+JOBS_QUERY = """{
+    jobs[] {
+        company_name
+        job_id
+        role
+        location
+    }
+}"""
+
+# Requests that listing pages do not need for their job data
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+    "hotjar.com", "segment.io", "nr-data.net", "newrelic.com", "optimizely.com",
+)
+
+async def block_unneeded_resources(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(domain in request.url for domain in BLOCKED_DOMAINS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def query_jobs(page):
+    """Extract the job listings on a page with AgentQL."""
+    response = await agentql.wrap_async(page).query_data(JOBS_QUERY)
+    return response.get("jobs", [])
+
+async def scrape_job_briefs(
+    num_pages=NUM_PAGES,
+    concurrency=4,
+    headless=True,
+    block_resources=True,
+    base_url=BASE_URL,
+    extract_jobs=None,
+):
+    """
+    Crawl the SEEK listing pages with a pool of browser pages.
+
+    Pages are handed out in order to `concurrency` tabs sharing one browser context.
+    Once a page returns no jobs, no later pages are scheduled.
+
+    Args:
+        num_pages: Maximum number of listing pages to visit
+        concurrency: Number of pages loaded at the same time
+        headless: Run Chromium without a window
+        block_resources: Abort image, font, media and tracker requests
+        base_url: Listing URL, paginated with ?page=N
+        extract_jobs: Async function returning the job dicts on a loaded page.
+            Defaults to an AgentQL query.
+
+    Returns:
+        List of deduplicated JobBriefModel objects
+    """
     try:
-        api_key = os.getenv("AGENTQL_API_KEY")
-        if not api_key:
-            raise ValueError("AGENTQL_API_KEY not found in .env file")
-
-        base_url = "https://www.seek.com.au/machine-learning-jobs"
-        NUM_PAGES = 15
-        JOBS_QUERY = """{
-            jobs[] {
-                company_name
-                job_id
-                role
-                location
-            }
-        }"""
+        if extract_jobs is None:
+            api_key = os.getenv("AGENTQL_API_KEY")
+            if not api_key:
+                raise ValueError("AGENTQL_API_KEY not found in .env file")
+            extract_jobs = query_jobs
 
         async with async_playwright() as playwright, \
-                  await playwright.chromium.launch(headless=False) as browser:
-            page = await agentql.wrap_async(browser.new_page())
-            
+                  await playwright.chromium.launch(headless=headless) as browser:
+            context = await browser.new_context()
+            if block_resources:
+                await context.route("**/*", block_unneeded_resources)
+
             try:
-                jobs = []
+                page_queue = asyncio.Queue()
+                for page_num in range(1, num_pages + 1):
+                    page_queue.put_nowait(page_num)
+
+                jobs_by_page = {}
                 error_count = 0
-                
-                for page_num in range(1, NUM_PAGES+1):
-                    current_url = f"{base_url}?page={page_num}"
-                    try:
-                        await page.goto(current_url)
-                        print(f"Successfully navigated to page {page_num}: {current_url}")
-                    except PlaywrightError as e:
-                        print(f"Browser error on page {page_num}: {e}", file=sys.stderr)
-                        continue
-
-                    try:
-                        response = await page.query_data(JOBS_QUERY)
-                        print(f"Successfully queried page {page_num}")
-                    except Exception as e:
-                        print(f"Query failed on page {page_num}: {e}", file=sys.stderr)
-                        continue
-
-                    if 'jobs' not in response:
-                        print(f"No jobs found on page {page_num}", file=sys.stderr)
-                        continue
-
-                    # Process jobs from current page
-                    for job_data in response['jobs']:
+                last_page = num_pages
+
+                async def crawl(page):
+                    nonlocal error_count, last_page
+                    while not page_queue.empty():
+                        page_num = page_queue.get_nowait()
+                        if page_num > last_page:
+                            return
+
+                        current_url = f"{base_url}?page={page_num}"
                         try:
-                            job = JobBriefModel(**job_data)
-                            jobs.append(job)
-                        except ValidationError as e:
-                            error_count += 1
-                            print(f"Validation error on page {page_num}: {e}", file=sys.stderr)
+                            await page.goto(current_url, wait_until="domcontentloaded")
+                            print(f"Successfully navigated to page {page_num}: {current_url}")
+                        except PlaywrightError as e:
+                            print(f"Browser error on page {page_num}: {e}", file=sys.stderr)
+                            continue
+
+                        try:
+                            jobs_data = await extract_jobs(page)
+                            print(f"Successfully queried page {page_num}")
+                        except Exception as e:
+                            print(f"Query failed on page {page_num}: {e}", file=sys.stderr)
+                            continue
+
+                        if not jobs_data:
+                            print(f"No jobs found on page {page_num}, stopping", file=sys.stderr)
+                            last_page = min(last_page, page_num - 1)
+                            continue
+
+                        # Process jobs from current page
+                        jobs_by_page[page_num] = []
+                        for job_data in jobs_data:
+                            try:
+                                jobs_by_page[page_num].append(JobBriefModel(**job_data))
+                            except ValidationError as e:
+                                error_count += 1
+                                print(f"Validation error on page {page_num}: {e}", file=sys.stderr)
+
+                pages = [await context.new_page() for _ in range(min(concurrency, num_pages))]
+                await asyncio.gather(*(crawl(page) for page in pages))
 
-                print(f"\nSuccessfully processed {len(jobs)} jobs from all pages")
+                jobs = [job for page_num in sorted(jobs_by_page) for job in jobs_by_page[page_num]]
+                print(f"\nSuccessfully processed {len(jobs)} jobs from {len(jobs_by_page)} pages")
                 if error_count > 0:
                     print(f"Encountered {error_count} validation errors across all pages")
                     
@@ -101,6 +163,8 @@ async def scrape_job_briefs():
             except Exception as e:
                 print(f"Error during scraping: {e}", file=sys.stderr)
                 raise
+            finally:
+                await context.close()
                 
     except Exception as e:
         print(f"Unexpected error occurred: {e}", file=sys.stderr)
@@ -0,0 +1,86 @@
+import re
+
+# Jina prefixes the page markdown with these header lines
+JINA_CONTENT_MARKER = "Markdown Content:"
+JINA_TITLE_PREFIX = "Title:"
+
+# Sections that follow the job description on a SEEK page; everything from the
+# first of them onwards is the same on every posting
+TAIL_MARKERS = (
+    "report this job advert",
+    "report this job ad",
+    "be careful",
+    "similar jobs",
+    "jobs you may be interested in",
+    "people also searched for",
+    "career advice",
+    "what can i earn as",
+    "job seekers",
+)
+
+# Page furniture that can appear above the description
+BOILERPLATE_LINES = {
+    "skip to content",
+    "view all jobs",
+    "back to search results",
+    "quick apply",
+    "apply",
+    "save",
+    "share",
+    "sign in",
+    "employer site",
+}
+
+# Below this many characters the cleaned body is assumed to have lost the description
+MIN_BODY_CHARS = 200
+
+IMAGE_PATTERN = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+LINK_PATTERN = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+NAV_LINK_LINE = re.compile(r"^\s*[*+-]\s+(?:\[[^\]]*\]\([^)]*\)\s*)+$")
+SETEXT_UNDERLINE = re.compile(r"^\s*(?:=+|-+)\s*$")
+
+def _heading_text(line):
+    return line.strip().lstrip("#").strip().rstrip(":").lower()
+
+def clean_job_markdown(markdown):
+    """
+    Extract the job description from the r.jina.ai markdown of a SEEK posting.
+
+    Drops the Jina header, navigation links, images and the tail of the page
+    (scam warning, similar jobs, career advice, footer), and unwraps inline links
+    to their text. The page title is kept as the first line. If the result is
+    implausibly short, the page layout is assumed to have changed and the whole
+    page is returned with only links and images unwrapped.
+    """
+    title = None
+    body = markdown
+    if JINA_CONTENT_MARKER in markdown:
+        header, body = markdown.split(JINA_CONTENT_MARKER, 1)
+        for line in header.splitlines():
+            if line.startswith(JINA_TITLE_PREFIX):
+                title = line[len(JINA_TITLE_PREFIX):].strip().removesuffix("- SEEK").strip()
+
+    lines = []
+    dropped = False
+    for line in body.splitlines():
+        # An underline whose heading was dropped would otherwise turn the line above into a heading
+        if SETEXT_UNDERLINE.match(line) and dropped:
+            continue
+        dropped = True
+        # Navigation menus are lists of links, some of which share a name with a tail section
+        if NAV_LINK_LINE.match(line) or IMAGE_PATTERN.fullmatch(line.strip()):
+            continue
+        if _heading_text(line) in TAIL_MARKERS and any(lines):
+            break
+        line = LINK_PATTERN.sub(r"\1", IMAGE_PATTERN.sub("", line)).rstrip()
+        if _heading_text(line) in BOILERPLATE_LINES:
+            continue
+        dropped = False
+        lines.append(line)
+
+    cleaned = re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+    if len(cleaned) < MIN_BODY_CHARS:
+        cleaned = LINK_PATTERN.sub(r"\1", IMAGE_PATTERN.sub("", body)).strip()
+    if title and not cleaned.startswith(title):
+        cleaned = f"{title}\n\n{cleaned}"
+    return cleaned
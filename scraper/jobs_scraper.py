@@ -4,8 +4,17 @@ import os
 from dotenv import load_dotenv
 from langchain_core.documents import Document
 from .job_briefs_scraper import scrape_job_briefs
+from .retry_policy import RetryPolicy, APIException, RATE_LIMITED, RETRY
+from .job_cleaning import clean_job_markdown
+from .scrape_metrics import ScrapeMetrics, report_progress, DEFAULT_PROGRESS_INTERVAL
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import json
+import logging
 import time
 
+logger = logging.getLogger(__name__)
+
 # Load API key
 load_dotenv()
 api_key = os.getenv("JINA_API_KEY")
@@ -19,14 +28,62 @@ headers = {'Authorization': f'Bearer {api_key}'}
 DEFAULT_RATE_LIMIT = 100  # requests per minute
 RATE_WINDOW = 60  # seconds
 
+def _parse_seconds(value, now=None):
+    """Convert a Retry-After/RateLimit-Reset header into seconds from now."""
+    if value is None:
+        return None
+    now = time.time() if now is None else now
+    try:
+        seconds = float(value)
+    except (ValueError, TypeError):
+        # Retry-After may also be an HTTP date
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+        except (ValueError, TypeError):
+            return None
+
+    # Reset headers are sometimes epoch timestamps in seconds or milliseconds
+    if seconds > 1e12:
+        seconds = seconds / 1000 - now
+    elif seconds > 1e9:
+        seconds -= now
+    return max(0.0, seconds)
+
 class AdaptiveRateLimiter:
-    def __init__(self, initial_rate_limit, window):
+    """
+    Token bucket that refills continuously at rate_limit tokens per window.
+
+    acquire() reserves a token and computes its start time without awaiting, then
+    sleeps on its own, so waiters are spaced out in arrival order instead of queueing
+    behind whichever coroutine is sleeping. Rate-limit headers from the server can
+    lower the limit, drain the bucket, or pause it until the reported reset time.
+    """
+
+    def __init__(self, initial_rate_limit, window, burst=None):
         self.rate_limit = initial_rate_limit
         self.window = window
-        self.tokens = initial_rate_limit
+        self.burst = burst
+        self.capacity = burst or initial_rate_limit
+        self.tokens = float(self.capacity)
         self.last_update = time.monotonic()
-        self.lock = asyncio.Lock()
-        self.retry_after = 0
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        # last_update is in the future while paused, so nothing accrues until then
+        if now > self.last_update:
+            rate = self.rate_limit / self.window
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * rate)
+            self.last_update = now
+
+    def pause(self, seconds):
+        """Stop handing out tokens for the given number of seconds."""
+        now = time.monotonic()
+        self._refill(now)
+        until = now + seconds
+        if until > self.paused_until:
+            self.paused_until = until
+            self.last_update = max(self.last_update, until)
+            self.tokens = min(self.tokens, 0.0)
     
     def update_rate_limit(self, response_headers):
         """Update rate limit based on API response headers"""
@@ -48,141 +105,234 @@ class AdaptiveRateLimiter:
         if limit:
             try:
                 new_limit = int(limit)
-                if new_limit != self.rate_limit:
-                    print(f"Updating rate limit from {self.rate_limit} to {new_limit}")
+                if new_limit > 0 and new_limit != self.rate_limit:
+                    logger.info("Updating rate limit from %s to %s", self.rate_limit, new_limit)
+                    self._refill(time.monotonic())
                     self.rate_limit = new_limit
+                    self.capacity = min(self.burst, new_limit) if self.burst else new_limit
+                    self.tokens = min(self.tokens, self.capacity)
             except (ValueError, TypeError):
                 pass
 
-        if retry_after:
+        if remaining is not None:
             try:
-                self.retry_after = float(retry_after)
+                remaining = int(remaining)
+                # The server's count is authoritative; never spend more than it allows
+                self._refill(time.monotonic())
+                self.tokens = min(self.tokens, float(remaining))
+                if remaining <= 0:
+                    reset_seconds = _parse_seconds(reset)
+                    if reset_seconds:
+                        self.pause(reset_seconds)
             except (ValueError, TypeError):
                 pass
 
+        retry_after_seconds = _parse_seconds(retry_after)
+        if retry_after_seconds:
+            self.pause(retry_after_seconds)
+
+    def state(self):
+        """Current limit, available tokens and remaining pause, for progress reports."""
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "rate_limit": self.rate_limit,
+            "window": self.window,
+            "capacity": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "paused_for": round(max(0.0, self.paused_until - now), 3),
+        }
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it."""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        wait = max(0.0, self.last_update - now)
+        if self.tokens < 0:
+            wait += -self.tokens * self.window / self.rate_limit
+        return wait
+
     async def acquire(self):
-        async with self.lock:
-            now = time.monotonic()
-            time_passed = now - self.last_update
-            
-            # Handle retry-after period
-            if self.retry_after > 0:
-                await asyncio.sleep(self.retry_after)
-                self.retry_after = 0
-                self.tokens = self.rate_limit
-                self.last_update = now
-                return
-            
-            # Replenish tokens based on time passed
-            self.tokens = min(
-                self.rate_limit,
-                self.tokens + int((time_passed * self.rate_limit) / self.window)
-            )
-            
-            if self.tokens <= 0:
-                sleep_time = (self.window / self.rate_limit) - time_passed
-                if sleep_time > 0:
-                    await asyncio.sleep(sleep_time)
-                self.tokens = 1
-            
-            self.tokens -= 1
-            self.last_update = now
+        """Wait for a token; returns the seconds spent waiting."""
+        # reserve() does not await, so reservations are atomic on the event loop
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        # A pause reported while we slept (Retry-After, exhausted quota) still applies
+        while (delay := self.paused_until - time.monotonic()) > 0:
+            wait += delay
+            await asyncio.sleep(delay)
+        return wait
+
+async def fetch_job_document(session, brief, rate_limiter, semaphore, retry_policy=None, base_url=base_url,
+                             metrics=None):
+    """
+    Fetch job details from Jina AI proxy API asynchronously with adaptive rate limiting.
 
-class APIException(Exception):
-    def __init__(self, message, should_retry=False, retry_after=None):
-        super().__init__(message)
-        self.should_retry = should_retry
-        self.retry_after = retry_after
+    Failures are classified by retry_policy. Transient errors and rate limiting are
+    retried with jittered exponential backoff, and repeated transient errors open
+    the host's circuit breaker. The concurrency slot is released while backing off
+    or waiting on an open circuit so other requests can proceed. Every attempt,
+    retry and wait is recorded in metrics.
+    """
+    retry_policy = retry_policy or RetryPolicy()
+    metrics = metrics or ScrapeMetrics()
+    document = await _fetch_job_document(session, brief, rate_limiter, semaphore, retry_policy, base_url, metrics)
+    metrics.record_result(document)
+    return document
 
-async def fetch_job_document(session, brief, rate_limiter, semaphore):
-    """Fetch job details from Jina AI proxy API asynchronously with adaptive rate limiting."""
+async def _fetch_job_document(session, brief, rate_limiter, semaphore, retry_policy, base_url, metrics):
     url = f"{base_url}{brief.job_id}"
-    max_retries = 3
-    retry_count = 0
+    breaker = retry_policy.breaker_for(urlsplit(url).netloc)
+    timeout = aiohttp.ClientTimeout(total=retry_policy.request_timeout)
+    deadline = time.monotonic() + retry_policy.deadline
+    attempt = 0
     
-    while retry_count < max_retries:
-        async with semaphore:
-            await rate_limiter.acquire()
-            print(f"Starting job: {brief.job_id} ({brief.role} at {brief.company_name})")
-            
-            try:
-                async with session.get(url, headers=headers, timeout=10) as response:
-                    # Update rate limiter based on response headers
-                    rate_limiter.update_rate_limit(response.headers)
-                    
-                    if response.status == 429:  # Too Many Requests
-                        retry_after = response.headers.get('Retry-After')
-                        raise APIException(
-                            "Rate limit exceeded",
-                            should_retry=True,
-                            retry_after=float(retry_after) if retry_after else 60
-                        )
-                    
-                    response.raise_for_status()
-                    content = await response.text()
-                    print(f"Finished job: {brief.job_id} ({brief.role} at {brief.company_name})")
+    while attempt < retry_policy.max_attempts:
+        # Wait out an open circuit without holding a concurrency slot
+        while (wait := breaker.time_until_allowed()) > 0:
+            if time.monotonic() + wait > deadline:
+                logger.warning("❌ Giving up on %s: circuit open past the retry deadline", url)
+                return None
+            metrics.record_circuit_wait(wait)
+            await asyncio.sleep(wait)
+
+        # In a half-open circuit this attempt is the probe; its slot is held until a verdict
+        probing = breaker.state == "half_open"
+        try:
+            async with semaphore:
+                metrics.record_limiter_wait(await rate_limiter.acquire())
+                logger.debug("Starting job: %s (%s at %s)", brief.job_id, brief.role, brief.company_name)
+                
+                request_start = time.monotonic()
+                try:
+                    async with session.get(url, headers=headers, timeout=timeout) as response:
+                        # Update rate limiter based on response headers
+                        rate_limiter.update_rate_limit(response.headers)
+                        
+                        if response.status >= 400:
+                            metrics.record_response(response.status, time.monotonic() - request_start)
+                            retry_after = response.headers.get('Retry-After')
+                            raise APIException(
+                                f"HTTP {response.status}",
+                                status=response.status,
+                                retry_after=_parse_seconds(retry_after),
+                            )
+                        
+                        content = await response.text()
+                        metrics.record_response(response.status, time.monotonic() - request_start)
+                    breaker.record_success()
+                    probing = False
+                    logger.debug("Finished job: %s (%s at %s)", brief.job_id, brief.role, brief.company_name)
                     return Document(
-                        page_content=content,
+                        # Only the description is kept; navigation and footers repeat on every posting
+                        page_content=clean_job_markdown(content),
                         metadata={
                             "source": f"https://www.seek.com.au/job/{brief.job_id}",
+                            "job_id": brief.job_id,
                             "location": brief.location,
                             "role": brief.role,
                             "company_name": brief.company_name
                         }
                     )
-                    
-            except APIException as e:
-                if e.should_retry and retry_count < max_retries:
-                    retry_count += 1
-                    if e.retry_after:
-                        print(f"Rate limit exceeded. Waiting {e.retry_after} seconds...")
-                        await asyncio.sleep(e.retry_after)
-                    continue
-                print(f"❌ Rate limit exceeded for {url} after {retry_count} retries")
-                return None
-                
-            except Exception as e:
-                print(f"❌ Error fetching {url}: {e}")
-                return None
-        
-        retry_count += 1
+                except Exception as e:
+                    if not isinstance(e, APIException):
+                        metrics.record_error(e, time.monotonic() - request_start)
+                    error = e
+
+            attempt += 1
+            outcome = retry_policy.classify(error)
+            if outcome == RETRY:
+                breaker.record_failure()
+                probing = False
+        finally:
+            if probing:
+                # Cancelled, failed before the request, rate limited or fatal: no verdict on the host
+                breaker.release_probe()
+
+        if outcome not in (RETRY, RATE_LIMITED):
+            logger.warning("❌ Error fetching %s: %r", url, error)
+            return None
+
+        if attempt >= retry_policy.max_attempts:
+            break
+
+        delay = retry_policy.backoff(attempt - 1, getattr(error, "retry_after", None))
+        if time.monotonic() + delay > deadline:
+            break
+        metrics.record_retry(outcome, delay)
+        logger.debug("Retrying %s in %.1fs after %r (attempt %d/%d)", url, delay, error, attempt, retry_policy.max_attempts)
+        await asyncio.sleep(delay)
     
+    logger.warning("❌ Error fetching %s after %d attempts: %r", url, attempt, error)
     return None
 
-async def scrape_job_documents(job_briefs):
-    """Scrape multiple job documents concurrently using Jina AI API with adaptive rate limiting."""
-    print(f"Total jobs to process: {len(job_briefs)}")
+async def scrape_job_documents(job_briefs, retry_policy=None, base_url=base_url,
+                               rate_limit=DEFAULT_RATE_LIMIT, concurrency=DEFAULT_RATE_LIMIT,
+                               metrics=None, progress_interval=DEFAULT_PROGRESS_INTERVAL):
+    """
+    Scrape multiple job documents concurrently using Jina AI API with adaptive rate limiting.
+
+    Pass a ScrapeMetrics as metrics to poll its snapshot() during the crawl or keep
+    its report afterwards; a progress line is logged every progress_interval seconds.
+    """
+    logger.info("Total jobs to process: %d", len(job_briefs))
     
     # Initialize rate limiter with default values
-    rate_limiter = AdaptiveRateLimiter(DEFAULT_RATE_LIMIT, RATE_WINDOW)
-    semaphore = asyncio.Semaphore(DEFAULT_RATE_LIMIT)
+    rate_limiter = AdaptiveRateLimiter(rate_limit, RATE_WINDOW)
+    semaphore = asyncio.Semaphore(concurrency)
+    retry_policy = retry_policy or RetryPolicy()
+    metrics = metrics or ScrapeMetrics()
+    metrics.start(len(job_briefs), rate_limiter)
+    progress = asyncio.create_task(report_progress(metrics, progress_interval))
     
-    async with aiohttp.ClientSession() as session:
-        tasks = [
-            asyncio.create_task(
-                fetch_job_document(session, brief, rate_limiter, semaphore)
-            ) 
-            for brief in job_briefs
-        ]
-        documents = await asyncio.gather(*tasks)
+    try:
+        async with aiohttp.ClientSession() as session:
+            tasks = [
+                asyncio.create_task(
+                    fetch_job_document(session, brief, rate_limiter, semaphore, retry_policy, base_url, metrics)
+                ) 
+                for brief in job_briefs
+            ]
+            documents = await asyncio.gather(*tasks)
+    finally:
+        progress.cancel()
+        metrics.finish()
 
     successful_docs = [doc for doc in documents if doc is not None]
-    print(f"✅ Processing complete. Retrieved {len(successful_docs)} successful documents.")
+    failed_ids = [brief.job_id for brief, doc in zip(job_briefs, documents) if doc is None]
+    logger.info("✅ Processing complete. Retrieved %d successful documents. %s", len(successful_docs), metrics.progress_line())
+    if failed_ids:
+        logger.warning("❌ Failed to fetch %d jobs: %s", len(failed_ids), ", ".join(failed_ids))
     return successful_docs
 
 # Run the scraper
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape SEEK job postings through the Jina proxy.")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "INFO"),
+                        help="DEBUG logs every request and retry; WARNING only failures")
+    parser.add_argument("--metrics-report", default=None, help="Write the crawl's metrics to this JSON file")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+
     print("🔎 Starting job scraping process...")
     
     # Scrape job briefs first
     job_briefs = scrape_job_briefs()
     
     # Run the async function
-    documents = asyncio.run(scrape_job_documents(job_briefs))
+    metrics = ScrapeMetrics()
+    documents = asyncio.run(scrape_job_documents(job_briefs, metrics=metrics))
     
     print("✅ Job scraping process completed.")
+    if args.metrics_report:
+        with open(args.metrics_report, "w") as f:
+            json.dump(metrics.snapshot(), f, indent=2)
 
     # Print a preview of the first document's content
     if documents:
         print("\n📄 First document content preview:")
-        print(documents[0].page_content[:500])
\ No newline at end of file
+        print(documents[0].page_content[:500])
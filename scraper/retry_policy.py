@@ -0,0 +1,138 @@
+import asyncio
+import aiohttp
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of classifying a failed request
+RETRY = "retry"
+RATE_LIMITED = "rate_limited"
+FATAL = "fatal"
+
+RETRYABLE_STATUSES = {408, 500, 502, 503, 504, 520, 522, 524}
+
+class APIException(Exception):
+    def __init__(self, message, should_retry=False, retry_after=None, status=None):
+        super().__init__(message)
+        self.should_retry = should_retry
+        self.retry_after = retry_after
+        self.status = status
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After failure_threshold consecutive transient failures the circuit opens and
+    requests wait reset_timeout seconds. A single probe request is then let through;
+    success closes the circuit and failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, probe_interval=1.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_interval = probe_interval
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def time_until_allowed(self):
+        """Return 0 if a request may go ahead now, otherwise how long to wait before asking again."""
+        if self.state == "closed":
+            return 0.0
+
+        if self.state == "open":
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                return remaining
+            self.state = "half_open"
+
+        # Half-open: let exactly one probe through at a time
+        if self.probe_in_flight:
+            return self.probe_interval
+        self.probe_in_flight = True
+        return 0.0
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning("Circuit opened after %d consecutive failures", self.failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+
+    def release_probe(self):
+        """Give up a half-open probe slot without a verdict (e.g. the request was rate limited)."""
+        self.probe_in_flight = False
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed fetch is retried.
+
+    Subclass and override classify() to change how errors are treated, or
+    backoff() to change the delay schedule.
+
+    Args:
+        max_attempts: Attempts per request, including the first
+        base_delay: Backoff for the first retry, doubled on every further attempt
+        max_delay: Cap on a single backoff
+        deadline: Seconds after which a request is abandoned, including time spent
+            waiting on an open circuit
+        request_timeout: Total timeout of a single HTTP request
+        failure_threshold: Consecutive transient failures that open a host's circuit
+        reset_timeout: Seconds an open circuit waits before probing the host
+        seed: Seed for the jitter, for reproducible runs
+    """
+
+    def __init__(
+        self,
+        max_attempts=5,
+        base_delay=1.0,
+        max_delay=60.0,
+        deadline=900.0,
+        request_timeout=10.0,
+        failure_threshold=5,
+        reset_timeout=30.0,
+        seed=None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.request_timeout = request_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rng = random.Random(seed)
+        self.breakers = {}
+
+    def breaker_for(self, host):
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[host]
+
+    def classify(self, error):
+        """Return RETRY, RATE_LIMITED or FATAL for an exception raised while fetching."""
+        if isinstance(error, APIException):
+            if error.status == 429:
+                return RATE_LIMITED
+            if error.should_retry or error.status in RETRYABLE_STATUSES:
+                return RETRY
+            return FATAL
+        if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+            return RETRY
+        return FATAL
+
+    def backoff(self, attempt, retry_after=None):
+        """Exponential backoff with full jitter, never shorter than a server-provided Retry-After."""
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
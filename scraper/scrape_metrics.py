@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Seconds of history behind the current requests/sec figure
+RECENT_WINDOW = 10.0
+# Seconds between progress lines while a crawl runs
+DEFAULT_PROGRESS_INTERVAL = 10.0
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 4)
+
+class ScrapeMetrics:
+    """
+    Throughput, latency and rate-limit telemetry of one crawl.
+
+    The fetch loop records every HTTP attempt with its status and latency, every
+    retry, every wait on the rate limiter or an open circuit and the outcome of
+    every posting. snapshot() can be polled while the crawl runs (report_progress
+    logs it periodically) and gives the final JSON report once it is done. Wait
+    and backoff seconds are summed over concurrent fetches, so they can exceed
+    the elapsed time.
+
+    Args:
+        total: Number of postings the crawl will fetch, for progress
+        rate_limiter: AdaptiveRateLimiter whose state is included in snapshots
+    """
+
+    def __init__(self, total=None, rate_limiter=None):
+        self.total = total
+        self.rate_limiter = rate_limiter
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.requests = 0
+        self.fetched = 0
+        self.failed = 0
+        self.status_counts = {}
+        self.error_counts = {}
+        self.latencies = []
+        self.recent = deque()
+        self.retries = {}
+        self.backoff_seconds = 0.0
+        self.throttles = 0
+        self.limiter_waits = 0
+        self.limiter_wait_seconds = 0.0
+        self.circuit_waits = 0
+        self.circuit_wait_seconds = 0.0
+
+    def start(self, total=None, rate_limiter=None):
+        """Mark the start of the crawl; throughput is measured from here."""
+        self.started_at = time.monotonic()
+        self.total = total
+        self.rate_limiter = rate_limiter
+
+    def _request(self, latency):
+        now = time.monotonic()
+        self.requests += 1
+        self.latencies.append(latency)
+        self.recent.append(now)
+        while self.recent and self.recent[0] < now - RECENT_WINDOW:
+            self.recent.popleft()
+
+    def record_response(self, status, latency):
+        self._request(latency)
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if status == 429:
+            self.throttles += 1
+
+    def record_error(self, error, latency):
+        """An attempt that failed without an HTTP response (timeout, dropped connection)."""
+        self._request(latency)
+        name = type(error).__name__
+        self.error_counts[name] = self.error_counts.get(name, 0) + 1
+
+    def record_retry(self, outcome, delay):
+        self.retries[outcome] = self.retries.get(outcome, 0) + 1
+        self.backoff_seconds += delay
+
+    def record_limiter_wait(self, seconds):
+        if seconds > 0:
+            self.limiter_waits += 1
+            self.limiter_wait_seconds += seconds
+
+    def record_circuit_wait(self, seconds):
+        self.circuit_waits += 1
+        self.circuit_wait_seconds += seconds
+
+    def record_result(self, document):
+        if document is None:
+            self.failed += 1
+        else:
+            self.fetched += 1
+
+    def finish(self):
+        self.finished_at = time.monotonic()
+
+    def snapshot(self):
+        """Current metrics as a JSON-serialisable dict."""
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        ordered = sorted(self.latencies)
+        histogram = {f"le_{bound}": sum(1 for latency in ordered if latency <= bound) for bound in LATENCY_BUCKETS}
+        histogram["le_inf"] = len(ordered)
+        recent_span = min(RECENT_WINDOW, elapsed)
+        snapshot = {
+            "elapsed_s": round(elapsed, 3),
+            "total": self.total,
+            "fetched": self.fetched,
+            "failed": self.failed,
+            "requests": self.requests,
+            "requests_per_s": round(self.requests / elapsed, 2) if elapsed else 0.0,
+            "recent_requests_per_s": round(len(self.recent) / recent_span, 2) if recent_span else 0.0,
+            "postings_per_s": round(self.fetched / elapsed, 2) if elapsed else 0.0,
+            "latency_s": {
+                "p50": _percentile(ordered, 0.5),
+                "p95": _percentile(ordered, 0.95),
+                "p99": _percentile(ordered, 0.99),
+                "max": round(ordered[-1], 4) if ordered else None,
+                "histogram": histogram,
+            },
+            "status_counts": {str(status): count for status, count in sorted(self.status_counts.items())},
+            "error_counts": dict(self.error_counts),
+            "retries": dict(self.retries),
+            "backoff_s": round(self.backoff_seconds, 3),
+            "throttles": self.throttles,
+            "limiter_waits": self.limiter_waits,
+            "limiter_wait_s": round(self.limiter_wait_seconds, 3),
+            "circuit_waits": self.circuit_waits,
+            "circuit_wait_s": round(self.circuit_wait_seconds, 3),
+        }
+        if self.rate_limiter is not None:
+            snapshot["limiter"] = self.rate_limiter.state()
+        return snapshot
+
+    def progress_line(self):
+        snapshot = self.snapshot()
+        done = snapshot["fetched"] + snapshot["failed"]
+        total = f"/{self.total}" if self.total is not None else ""
+        latency = snapshot["latency_s"]
+        line = (
+            f"Fetched {done}{total} postings ({snapshot['failed']} failed) in {snapshot['elapsed_s']:.0f}s: "
+            f"{snapshot['recent_requests_per_s']:.1f} req/s, "
+            f"p50 {latency['p50'] or 0:.2f}s, p95 {latency['p95'] or 0:.2f}s, "
+            f"{sum(snapshot['retries'].values())} retries, {snapshot['throttles']} throttled"
+        )
+        if "limiter" in snapshot:
+            limiter = snapshot["limiter"]
+            line += f", limit {limiter['rate_limit']}/{limiter['window']:g}s with {int(round(limiter['tokens']))} tokens"
+            if limiter["paused_for"]:
+                line += f", paused {limiter['paused_for']:.1f}s"
+        return line
+
+async def report_progress(metrics, interval=DEFAULT_PROGRESS_INTERVAL):
+    """Log a progress line every interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(metrics.progress_line())
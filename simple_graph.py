@@ -1,20 +1,16 @@
-from typing import List, Literal
-from typing_extensions import TypedDict
 from langgraph.graph import END, StateGraph, MessagesState
-from langchain.schema import Document
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_ollama import ChatOllama
-from langchain_chroma import Chroma
-import sqlite3
-from langgraph.checkpoint.sqlite import SqliteSaver
-from prompts import ROUTER_INSTRUCTIONS, DOCUMENT_GRADER_INSTRUCTIONS, RESPONSE_INSTRUCTIONS
-from langchain_core.messages import HumanMessage, SystemMessage, RemoveMessage
-from pydantic import BaseModel, Field
-from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, RemoveMessage
+from db.checkpointer import get_checkpointer
+from utils.instrumentation import call_config, get_instrumentation, graph_callbacks
+from utils.lazy import lazy_singleton
+from utils.selection import get_chat_model, DEFAULT_MODEL
+from langchain_core.runnables import RunnableConfig
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
 import os
 from dotenv import load_dotenv
-from IPython.display import Image, display
-from langchain_community.document_loaders import PyPDFLoader
 
 load_dotenv()
 
@@ -22,41 +18,68 @@ def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = os.getenv(var)
 
-_set_env("LANGSMITH_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+# LangSmith tracing is opt-in (LANGCHAIN_TRACING_V2=true); step timings are recorded locally by utils.instrumentation
+if os.getenv("LANGCHAIN_TRACING_V2") == "true":
+    _set_env("LANGSMITH_API_KEY")
+    os.environ.setdefault("LANGCHAIN_PROJECT", "langchain-academy")
 
 _set_env("OPENAI_API_KEY")
 _set_env("TAVILY_API_KEY")
 os.environ["TOKENIZERS_PARALLELISM"] = "true"
 
-db_path = "./state_db/example.db"
-conn = sqlite3.connect(db_path, check_same_thread=False)
-memory = SqliteSaver(conn)
-
-
-llm = ChatOllama(model="deepseek-r1:7b")
-llm_openai = ChatOpenAI(model="gpt-4o-mini")
+# Token budget for the context sent to each model; threads above it are summarized
+CONTEXT_BUDGETS = {
+    "deepseek-r1:7b": 3000,
+    "gpt-4o-mini": 8000,
+}
+DEFAULT_CONTEXT_BUDGET = 4000
+# Most recent messages always sent verbatim and never folded into the summary
+RECENT_MESSAGES = 4
+
+_summary_locks = {}
+# Summarizations submitted per thread and not finished yet, including ones still queued
+_pending_summaries = {}
+_summary_locks_lock = threading.Lock()
+
+def get_llm(config=None):
+    """Chat model selected for this run (configurable["model"]), or the default model."""
+    model_name = (config or {}).get("configurable", {}).get("model", DEFAULT_MODEL)
+    return get_chat_model(model_name)
+
+def get_context_budget(config=None):
+    configurable = (config or {}).get("configurable", {})
+    if "context_budget" in configurable:
+        return configurable["context_budget"]
+    return CONTEXT_BUDGETS.get(configurable.get("model", DEFAULT_MODEL), DEFAULT_CONTEXT_BUDGET)
+
+def build_context(state, config=None):
+    """Summary plus conversation, trimmed to the most recent messages that fit the budget."""
+    summary = state.get("summary", "")
+    messages = state["messages"]
+    if summary:
+        messages = [SystemMessage(content=f"Summary of the conversation earlier: {summary}")] + messages
+
+    # Normally summarization keeps this under budget; trimming covers the turns before it catches up
+    return trim_messages(
+        messages,
+        max_tokens=get_context_budget(config),
+        token_counter=count_tokens_approximately,
+        strategy="last",
+        start_on="human",
+        include_system=True,
+    )
 
 class GraphState(MessagesState):
-    summary = str
+    summary: str
 
-def generate_answer(state: GraphState):
-    summary = state.get("summary", "")
-     
-    if summary:
-        system_message = f"Summary of the conversation earlier: {summary}"
-        messages = [SystemMessage(content=system_message)] + state["messages"]
-    else:
-        messages = state["messages"]
-        
-    response = llm.invoke(messages)
+def generate_answer(state: GraphState, config: RunnableConfig):
+    response = get_llm(config).invoke(build_context(state, config))
     return {"messages": response}
 
-def summarize_conversation(state: GraphState):
-    
-    # First, we get any existing summary
+def summarize_conversation(state: GraphState, config: RunnableConfig):
+    """Fold everything but the recent window into the summary."""
     summary = state.get("summary", "")
+    older = state["messages"][:-RECENT_MESSAGES]
 
     # Create our summarization prompt 
     if summary:
@@ -71,28 +94,161 @@ def summarize_conversation(state: GraphState):
         summary_message = "Create a summary of the conversation above:"
 
     # Add prompt to our history
-    messages = state["messages"] + [HumanMessage(content=summary_message)]
-    response = llm.invoke(messages)
+    messages = older + [HumanMessage(content=summary_message)]
+    # Runs outside the graph, so the call is tagged with its thread explicitly
+    response = get_llm(config).invoke(messages, call_config(config, "summarize_conversation"))
     
-    # Delete all but the 2 most recent messages
-    delete_messages = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
+    # Delete the summarized messages
+    delete_messages = [RemoveMessage(id=m.id) for m in older]
     return {"summary": response.content, "messages": delete_messages}
 
-def should_summarise(state: GraphState):
+def should_summarise(state: GraphState, config=None):
+    """True when the outgoing context would exceed the model's token budget."""
+    if len(state.get("messages", [])) <= RECENT_MESSAGES:
+        return False
     summary = state.get("summary", "")
+    tokens = count_tokens_approximately(state["messages"]) + count_tokens_approximately([SystemMessage(content=summary)])
+    return tokens > get_context_budget(config)
+
+def _summary_lock(thread_id):
+    with _summary_locks_lock:
+        return _summary_locks.setdefault(thread_id, threading.Lock())
+
+def wait_for_summary(config):
+    """Block until every summarization submitted for this thread has been written."""
+    with _summary_locks_lock:
+        pending = list(_pending_summaries.get(config["configurable"]["thread_id"], ()))
+    # A failed summarization leaves the thread as it was; the turn goes ahead either way
+    wait(pending)
+
+def _summarize_thread(config):
+    graph = get_graph()
+    with _summary_lock(config["configurable"]["thread_id"]):
+        state = graph.get_state(config).values
+        if not should_summarise(state, config):
+            return
+        try:
+            update = summarize_conversation(state, config)
+        except Exception as e:
+            print(f"Summarization failed: {e}")
+            return
+        graph.update_state(config, update, as_node="generate_answer")
+
+@lazy_singleton
+def _summary_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarize")
+
+def summarize_in_background(config):
+    """
+    Summarize the thread after a response has streamed if it has outgrown its budget.
+
+    Runs on a worker thread so the user never waits for it; the next turn of the
+    same thread waits for it via wait_for_summary before reading the state. The
+    thread is claimed before the job is queued, so a job waiting for a free worker
+    still holds the next turn back.
+    """
+    thread_id = config["configurable"]["thread_id"]
+    with _summary_locks_lock:
+        future = _summary_executor().submit(_summarize_thread, config)
+        _pending_summaries.setdefault(thread_id, set()).add(future)
+
+    def release(future):
+        with _summary_locks_lock:
+            pending = _pending_summaries.get(thread_id)
+            pending.discard(future)
+            if not pending:
+                del _pending_summaries[thread_id]
+
+    future.add_done_callback(release)
+
+@lazy_singleton
+def get_graph():
+    """Build and compile the chat workflow once per process."""
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node("generate_answer", generate_answer)
+
+    workflow.set_entry_point("generate_answer")
+    # Summarization runs after the response has streamed, see summarize_in_background
+    workflow.add_edge("generate_answer", END)
+
+    # Add memory; nodes and model calls are recorded when instrumentation is enabled
+    return workflow.compile(checkpointer=get_checkpointer()).with_config(callbacks=graph_callbacks())
+
+def get_response(query, config):
+    """
+    Answer one chat turn, yielding the response as it streams.
+
+    Standalone questions are served from the semantic answer cache when possible.
+    Independent of Streamlit, so the chat can be driven from scripts and benchmarks.
+    """
+    # Imported here so building the graph does not open the answer cache or embeddings
+    from db.answer_cache import get_answer_cache
+    from utils.embeddings import get_embedding_function
+
+    graph = get_graph()
+    answer_cache = get_answer_cache()
+    instrumentation = get_instrumentation()
+    thread_id = config["configurable"]["thread_id"]
+    start = time.perf_counter()
+    # A summarization of this thread may still be writing the state
+    wait_for_summary(config)
     
-    if len(summary) > 6:
-        return "summarize_conversation"
-    return END
-
-workflow = StateGraph(GraphState)
-
-workflow.add_node("generate_answer", generate_answer)
-workflow.add_node("summarize_conversation", summarize_conversation)
-
-workflow.set_entry_point("generate_answer")
-workflow.add_conditional_edges("generate_answer", should_summarise)
-workflow.add_edge("summarize_conversation", END)
-
-# Add memory
-graph = workflow.compile(checkpointer=memory)
+    # Only standalone questions are cached; follow-ups depend on the conversation so far.
+    # Answers are cached for the default model and budget only, since either changes the answer
+    configurable = config["configurable"]
+    model_name = configurable.get("model", DEFAULT_MODEL)
+    cacheable = (
+        model_name == DEFAULT_MODEL
+        and get_context_budget(config) == CONTEXT_BUDGETS.get(DEFAULT_MODEL, DEFAULT_CONTEXT_BUDGET)
+        and not graph.get_state(config).values.get("messages")
+    )
+    if cacheable:
+        lookup_start = time.perf_counter()
+        query_embedding = get_embedding_function().embed_query(query)
+        cached_answer = answer_cache.lookup(query_embedding, model_name)
+        instrumentation.record("cache", "answer_cache", time.perf_counter() - lookup_start,
+                               thread_id=thread_id, hit=cached_answer is not None)
+        if cached_answer is not None:
+            # Record the exchange in the thread as if the graph had answered it
+            graph.update_state(
+                config,
+                {"messages": [HumanMessage(content=query), AIMessage(content=cached_answer)]},
+                as_node="generate_answer",
+            )
+            # Recorded before yielding: the caller may stop consuming after the answer
+            elapsed = time.perf_counter() - start
+            instrumentation.record("turn", "chat", elapsed, thread_id=thread_id, cached=True,
+                                   time_to_first_token=round(elapsed, 6))
+            yield cached_answer
+            return
+    
+    # Execute the graph with streaming
+    inputs = {
+        "messages": query,
+    }
+    
+    full_response = ""
+    first_token = None
+    for message_chunk, metadata in graph.stream(
+        inputs, config, stream_mode="messages"
+    ):
+        if message_chunk.content and metadata["langgraph_node"] == "generate_answer":
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            full_response += message_chunk.content
+            yield message_chunk.content
+    instrumentation.record("turn", "chat", time.perf_counter() - start, thread_id=thread_id, cached=False,
+                           time_to_first_token=None if first_token is None else round(first_token, 6))
+    
+    if cacheable and full_response:
+        answer_cache.store(query, query_embedding, full_response, model_name)
+    
+    # Keep the next prompt within budget without making this response wait
+    summarize_in_background(config)
+
+def __getattr__(name):
+    # Keep `from simple_graph import graph` working without building the graph at import time
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, Field
+from db.chat_threads import get_chat_title, update_chat_title
+from utils.lazy import lazy_singleton
+import numpy as np
+import threading
+import time
+
+# Titles are generated for the first few turns, then only re-checked for topic drift
+TITLE_MAX_TURNS = 3
+TITLE_DRIFT_EVERY = 4
+TITLE_DRIFT_THRESHOLD = 0.25
+
+# Bounds on the transcript excerpt sent to the title model
+EXCERPT_RECENT_MESSAGES = 4
+EXCERPT_MESSAGE_CHARS = 400
+
+# Seconds to wait for more turns of the same thread before generating
+TITLE_DEBOUNCE = 1.0
+
+class ChatTitleResponse(BaseModel):
+    chat_title: str = Field(
+        None, description="The title for the current conversation"
+    )
+
+def transcript_excerpt(messages):
+    """First message plus the most recent ones, each clipped, as a short transcript."""
+    selected = messages[:1] + messages[1:][-EXCERPT_RECENT_MESSAGES:]
+    lines = []
+    for message in selected:
+        role = "User" if isinstance(message, HumanMessage) else "Assistant"
+        content = message.content
+        if len(content) > EXCERPT_MESSAGE_CHARS:
+            content = content[:EXCERPT_MESSAGE_CHARS] + "..."
+        lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+def create_chat_title(transcript):
+    from utils.selection import get_chat_model
+    llm = get_chat_model("gpt-4o-mini")
+    title_generator = llm.with_structured_output(ChatTitleResponse)
+    prompt = f"""Given the following conversation transcript:
+
+    {transcript}
+
+    Generate a concise and engaging title that accurately reflects the main topic or theme discussed.
+    If the conversation covers multiple topics, focus on the most prominent or overarching theme.
+    """
+    result = title_generator.invoke(prompt)
+
+    return result.chat_title
+
+def topic_drifted(title, messages):
+    """True when the latest user messages are no longer similar to the current title."""
+    from utils.embeddings import get_embedding_function
+    recent = " ".join([m.content for m in messages if isinstance(m, HumanMessage)][-2:])
+    title_vector, recent_vector = (np.asarray(v) for v in get_embedding_function().embed_documents([title, recent]))
+    similarity = title_vector @ recent_vector / (np.linalg.norm(title_vector) * np.linalg.norm(recent_vector) or 1.0)
+    return similarity < TITLE_DRIFT_THRESHOLD
+
+class ChatTitleWorker:
+    """
+    Generates chat titles off the request path.
+
+    Requests for the same thread are debounced: only the latest transcript is used
+    once a thread has been quiet for debounce seconds. A thread has at most one
+    generation in flight; a request arriving during it is run once it finishes,
+    so an older transcript's title never overwrites a newer one. Titles are written to
+    chat_threads and version is bumped so Streamlit sessions reload their history
+    on the next rerun.
+
+    Args:
+        max_workers: Number of titles generated concurrently
+        debounce: Seconds to wait for further turns before generating
+    """
+
+    def __init__(self, max_workers=2, debounce=TITLE_DEBOUNCE):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-title")
+        self.debounce = debounce
+        self.lock = threading.Lock()
+        self.pending = {}  # thread_id -> (messages, turn, submitted_at)
+        self.running = set()  # thread_ids with a _run scheduled or generating
+        self.titles = {}  # thread_id -> last generated title
+        self.version = 0
+
+    def should_generate(self, turn):
+        return turn <= TITLE_MAX_TURNS or turn % TITLE_DRIFT_EVERY == 0
+
+    def submit(self, thread_id, messages):
+        """Schedule a title update for a thread if this turn calls for one."""
+        turn = sum(isinstance(message, HumanMessage) for message in messages)
+        if not self.should_generate(turn):
+            return False
+
+        with self.lock:
+            scheduled = thread_id in self.running
+            self.running.add(thread_id)
+            self.pending[thread_id] = (list(messages), turn, time.monotonic())
+        if not scheduled:
+            self.executor.submit(self._run, thread_id)
+        return True
+
+    def _run(self, thread_id):
+        while True:
+            self._generate(thread_id)
+            with self.lock:
+                # Turns submitted while generating are picked up by this run, not a parallel one
+                if thread_id not in self.pending:
+                    self.running.discard(thread_id)
+                    return
+
+    def _generate(self, thread_id):
+        # Wait until the thread has been quiet for the debounce interval
+        while True:
+            with self.lock:
+                messages, turn, submitted_at = self.pending[thread_id]
+            remaining = submitted_at + self.debounce - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(remaining)
+
+        with self.lock:
+            messages, turn, _ = self.pending.pop(thread_id)
+
+        try:
+            if turn > TITLE_MAX_TURNS:
+                title = self.titles.get(thread_id) or get_chat_title(thread_id)
+                if title and not topic_drifted(title, messages):
+                    return
+
+            title = create_chat_title(transcript_excerpt(messages))
+            update_chat_title(thread_id, title)
+            with self.lock:
+                self.titles[thread_id] = title
+                self.version += 1
+        except Exception as e:
+            print(f"Title generation for {thread_id} failed: {e}")
+
+@lazy_singleton
+def get_title_worker():
+    return ChatTitleWorker()
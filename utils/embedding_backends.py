@@ -0,0 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import List
+from langchain_core.embeddings import Embeddings
+import numpy as np
+import os
+import re
+import zlib
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def _batches(texts, batch_size):
+    return [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+
+def _hash_batch(texts, dims):
+    """Signed feature hashing of unigrams and bigrams, L2-normalized."""
+    vectors = np.zeros((len(texts), dims), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        for term in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(term.encode())
+            # The top bit picks the sign so collisions tend to cancel out instead of piling up
+            vectors[row, h % dims] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).tolist()
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embeddings computed locally, with no model or network.
+
+    Similar texts share terms and therefore get similar vectors, which is enough
+    for tests, offline development and benchmarks, but not for semantic search.
+    Inputs are split into batch_size batches that are spread over a process pool.
+
+    Args:
+        dims: Vector size
+        batch_size: Texts hashed per task
+        workers: Processes in the pool; defaults to the number of cores
+    """
+
+    def __init__(self, dims=768, batch_size=256, workers=None):
+        self.dims = dims
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+
+    @property
+    def backend_id(self):
+        return f"hashing:{self.dims}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = _batches(texts, self.batch_size)
+        # A pool only pays off once there is more than one batch to spread
+        if len(batches) < 2 or self.workers < 2:
+            return [vector for batch in batches for vector in _hash_batch(batch, self.dims)]
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return [vector for vectors in self.pool.map(_hash_batch, batches, repeat(self.dims)) for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        return _hash_batch([text], self.dims)[0]
+
+class OnnxMiniLMEmbeddings(Embeddings):
+    """
+    all-MiniLM-L6-v2 run on CPU through onnxruntime, using the model bundled with chromadb.
+
+    The model is downloaded once to ~/.cache/chroma and works offline afterwards.
+    onnxruntime releases the GIL, so batches run in parallel on a thread pool.
+
+    Args:
+        batch_size: Texts encoded per inference call
+        workers: Threads running batches; defaults to the number of cores
+    """
+
+    def __init__(self, batch_size=64, workers=None):
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+        self.model = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="onnx-embed")
+
+    @property
+    def backend_id(self):
+        return f"onnx:{self.model.MODEL_NAME}"
+
+    def _encode(self, batch):
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in self.model(batch)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = _batches(texts, self.batch_size)
+        if len(batches) < 2:
+            return [vector for batch in batches for vector in self._encode(batch)]
+        return [vector for vectors in self.pool.map(self._encode, batches) for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
@@ -0,0 +1,84 @@
+from db.embedding_cache import CachedEmbeddings
+from utils.instrumentation import instrument_embeddings
+from utils.lazy import lazy_singleton
+import os
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Which embedding backend to use: "openai", "onnx" (local MiniLM on CPU) or "hashing" (tests, offline)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+
+# Collections store the backend that built them under this metadata key
+BACKEND_METADATA_KEY = "embedding_backend"
+# Collections created before the backend was recorded were all built with OpenAI
+LEGACY_BACKEND_ID = f"openai:{EMBEDDING_MODEL}"
+
+def build_embeddings(backend=EMBEDDING_BACKEND):
+    """
+    Build an embedding backend by name.
+
+    Returns:
+        Tuple of (embeddings, backend_id); backend_id names the backend and model
+        so vectors from different backends are never cached or stored together
+    """
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=EMBEDDING_MODEL), f"openai:{EMBEDDING_MODEL}"
+    if backend == "onnx":
+        from utils.embedding_backends import OnnxMiniLMEmbeddings
+        embeddings = OnnxMiniLMEmbeddings()
+        return embeddings, embeddings.backend_id
+    if backend == "hashing":
+        from utils.embedding_backends import HashingEmbeddings
+        embeddings = HashingEmbeddings()
+        return embeddings, embeddings.backend_id
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected openai, onnx or hashing")
+
+@lazy_singleton
+def _embedding_backend():
+    embeddings, backend_id = build_embeddings(EMBEDDING_BACKEND)
+    # Hashing is cheaper than a cache lookup; model backends go through the on-disk cache
+    if EMBEDDING_BACKEND != "hashing":
+        embeddings = CachedEmbeddings(embeddings, model=backend_id)
+    return instrument_embeddings(embeddings, backend_id), backend_id
+
+def use_embedding_backend(embeddings, backend_id):
+    """Serve every caller in this process from embeddings instead of the configured backend."""
+    _embedding_backend.override((instrument_embeddings(embeddings, backend_id), backend_id))
+
+def get_embedding_function():
+    """Embeddings of the configured backend, behind the on-disk embedding cache."""
+    return _embedding_backend()[0]
+
+def get_embedding_backend_id():
+    return _embedding_backend()[1]
+
+def open_vectorstore(persist_directory="./chroma"):
+    """
+    Open the Chroma collection with the configured embedding backend.
+
+    New collections record the backend that builds them; unlabelled ones are
+    labelled on open, non-empty ones as the legacy backend. Opening a collection
+    built by another backend raises ValueError rather than mixing
+    incompatible vectors in one index.
+    """
+    from langchain_chroma import Chroma
+    backend_id = get_embedding_backend_id()
+    vectorstore = Chroma(
+        persist_directory=persist_directory,
+        embedding_function=get_embedding_function(),
+        collection_metadata={BACKEND_METADATA_KEY: backend_id},
+    )
+
+    metadata = vectorstore._collection.metadata or {}
+    built_with = metadata.get(BACKEND_METADATA_KEY)
+    if built_with is None:
+        # Collections created before backends were recorded: label them now
+        built_with = LEGACY_BACKEND_ID if vectorstore._collection.count() else backend_id
+        vectorstore._collection.modify(metadata={**metadata, BACKEND_METADATA_KEY: built_with})
+    if built_with != backend_id:
+        raise ValueError(
+            f"Collection in {persist_directory} was built with {built_with}, not {backend_id}. "
+            f"Set EMBEDDING_BACKEND to match or ingest into another directory."
+        )
+    return vectorstore
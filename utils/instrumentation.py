@@ -0,0 +1,349 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables.config import var_child_runnable_config
+from utils.lazy import lazy_singleton
+import json
+import os
+import threading
+import time
+
+# Comma-separated sinks for step events: "jsonl", "prometheus", or empty to turn instrumentation off
+INSTRUMENTATION_SINKS = os.getenv("INSTRUMENTATION_SINKS", "")
+DEFAULT_JSONL_PATH = "./instrumentation/events.jsonl"
+DEFAULT_METRICS_PORT = 9464
+
+METRIC_PREFIX = "mljobs"
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Seconds after which a run whose end callback never fired (e.g. an abandoned stream) is dropped
+STALE_RUN_SECONDS = 15 * 60
+
+class JsonlSink:
+    """Append every event as one JSON line to path."""
+
+    def __init__(self, path=DEFAULT_JSONL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path, "a", buffering=1)
+        self.lock = threading.Lock()
+
+    def write(self, event):
+        line = json.dumps(event, default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+
+def _format_labels(labels):
+    escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+class PrometheusSink:
+    """
+    Aggregate events into counters and latency histograms in the Prometheus text format.
+
+    render() returns the exposition text and serve(port) answers GET /metrics with
+    it from a daemon thread, so a Prometheus server can scrape the app directly.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        # (metric, labels) -> cumulative bucket counts followed by sum and count
+        self.histograms = {}
+        # (metric, labels) -> value
+        self.counters = {}
+
+    def _observe(self, metric, labels, value):
+        histogram = self.histograms.get((metric, labels))
+        if histogram is None:
+            histogram = self.histograms[(metric, labels)] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram[i] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def _count(self, metric, labels, value=1):
+        self.counters[(metric, labels)] = self.counters.get((metric, labels), 0) + value
+
+    def write(self, event):
+        name = event["name"]
+        labels = (("kind", event["kind"]), ("name", name))
+        with self.lock:
+            self._observe("step_seconds", labels, event["seconds"])
+            if "error" in event:
+                self._count("step_errors_total", labels)
+            if event.get("time_to_first_token") is not None:
+                self._observe("time_to_first_token_seconds", labels, event["time_to_first_token"])
+            for token_type in ("prompt", "completion"):
+                if event.get(f"{token_type}_tokens"):
+                    self._count("tokens_total", (("name", name), ("type", token_type)), event[f"{token_type}_tokens"])
+            if "documents" in event:
+                self._count("documents_total", labels, event["documents"])
+            if "hit" in event:
+                self._count("cache_lookups_total", (("name", name), ("result", "hit" if event["hit"] else "miss")))
+            if "tier" in event:
+                self._count("route_decisions_total", (("tier", event["tier"]), ("datasource", event.get("datasource"))))
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for metric in sorted({metric for metric, _ in self.histograms}):
+                full_name = f"{METRIC_PREFIX}_{metric}"
+                lines.append(f"# TYPE {full_name} histogram")
+                for (name, labels), histogram in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    for bound, count in zip(self.buckets, histogram):
+                        lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram[-1]}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram[-2]}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {histogram[-1]}")
+            for metric in sorted({metric for metric, _ in self.counters}):
+                full_name = f"{METRIC_PREFIX}_{metric}"
+                lines.append(f"# TYPE {full_name} counter")
+                for (name, labels), value in sorted(self.counters.items()):
+                    if name == metric:
+                        lines.append(f"{full_name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=DEFAULT_METRICS_PORT, host="0.0.0.0"):
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+class Instrumentation:
+    """
+    Fan step events out to sinks; a sink is any object with a write(event) method.
+
+    An event is a dict with the time it was recorded (ts), its kind ("node", "llm",
+    "retriever", "tool", "embedding", "cache", "route" or "turn"), a name, its
+    duration in seconds, and the thread_id, LangGraph step and node it ran in where
+    known, plus kind-specific fields such as time_to_first_token, prompt_tokens,
+    completion_tokens, documents, texts, hit, tier, datasource and error.
+    """
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    @property
+    def enabled(self):
+        return bool(self.sinks)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def record(self, kind, name, seconds, **fields):
+        if not self.sinks:
+            return
+        event = {"ts": time.time(), "kind": kind, "name": name, "seconds": round(seconds, 6), **fields}
+        for sink in self.sinks:
+            try:
+                sink.write(event)
+            except Exception as e:
+                print(f"Instrumentation sink {type(sink).__name__} failed: {e}")
+
+@lazy_singleton
+def get_instrumentation():
+    """Return the process-wide instrumentation with the sinks named in INSTRUMENTATION_SINKS."""
+    sinks = []
+    for sink_name in filter(None, (name.strip() for name in INSTRUMENTATION_SINKS.split(","))):
+        if sink_name == "jsonl":
+            sinks.append(JsonlSink(os.getenv("INSTRUMENTATION_JSONL_PATH", DEFAULT_JSONL_PATH)))
+        elif sink_name == "prometheus":
+            sink = PrometheusSink()
+            port = int(os.getenv("METRICS_PORT", DEFAULT_METRICS_PORT))
+            try:
+                sink.serve(port)
+                print(f"📈 Serving metrics on http://localhost:{port}/metrics")
+            except OSError as e:
+                # Another process of the app already serves the port; keep aggregating anyway
+                print(f"⚠️ Metrics endpoint not started on port {port}: {e}")
+            sinks.append(sink)
+        else:
+            raise ValueError(f"Unknown instrumentation sink {sink_name!r}; expected jsonl or prometheus")
+    return Instrumentation(sinks)
+
+def _graph_context(metadata):
+    return {
+        "thread_id": metadata.get("thread_id"),
+        "step": metadata.get("langgraph_step"),
+        "node": metadata.get("langgraph_node"),
+    }
+
+def _token_usage(response):
+    """(prompt, completion) tokens reported by the provider, or None if it reported none."""
+    prompt = completion = 0
+    reported = False
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+                reported = True
+    if reported:
+        return prompt, completion
+    usage = (response.llm_output or {}).get("token_usage")
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return None
+
+class InstrumentationHandler(BaseCallbackHandler):
+    """
+    Callback handler recording graph nodes, model, retriever and tool calls as events.
+
+    Every finished run becomes one event tagged with the thread, step and node it
+    ran in. Model calls also record the time to their first streamed token and
+    their prompt and completion tokens, estimated from the text when the provider
+    does not report usage. The __start__ node covers a conditional entry point,
+    i.e. the routing of graph.py. Runs still open after STALE_RUN_SECONDS are
+    dropped without an event.
+    """
+
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+        self.runs = {}
+        self.last_sweep = time.perf_counter()
+
+    def _evict_stale(self, now):
+        self.last_sweep = now
+        for run_id, run in list(self.runs.items()):
+            if now - run["start"] > STALE_RUN_SECONDS:
+                self.runs.pop(run_id, None)
+
+    def _start(self, run_id, kind, name, metadata, **fields):
+        now = time.perf_counter()
+        if now - self.last_sweep > STALE_RUN_SECONDS:
+            self._evict_stale(now)
+        self.runs[run_id] = {"kind": kind, "name": name, "start": now, **_graph_context(metadata or {}), **fields}
+
+    def _end(self, run_id, error=None, **fields):
+        run = self.runs.pop(run_id, None)
+        if run is None:
+            return
+        run.pop("prompt", None)
+        seconds = time.perf_counter() - run.pop("start")
+        if error is not None:
+            fields["error"] = repr(error)
+        self.instrumentation.record(run.pop("kind"), run.pop("name"), seconds, **run, **fields)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, tags=None, metadata=None, **kwargs):
+        # Graph nodes only; the runnables inside them are recorded by their own kind
+        if any(tag.startswith("graph:step:") for tag in tags or ()):
+            self._start(run_id, "node", kwargs.get("name") or (metadata or {}).get("langgraph_node"), metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def _model_name(self, serialized, metadata, kwargs):
+        return (metadata or {}).get("ls_model_name") or kwargs.get("name") or (serialized or {}).get("name", "llm")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", self._model_name(serialized, metadata, kwargs), metadata, prompt=messages[0])
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", self._model_name(serialized, metadata, kwargs), metadata, prompt=prompts)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self.runs.get(run_id)
+        if run is not None and "time_to_first_token" not in run:
+            run["time_to_first_token"] = round(time.perf_counter() - run["start"], 6)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self.runs.get(run_id)
+        if run is None:
+            return
+        usage = _token_usage(response)
+        estimated = usage is None
+        if estimated:
+            completion = [generation.text for generations in response.generations for generation in generations]
+            usage = count_tokens_approximately(run["prompt"]), count_tokens_approximately(completion)
+        self._end(run_id, prompt_tokens=usage[0], completion_tokens=usage[1], tokens_estimated=estimated)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "retriever", kwargs.get("name") or (serialized or {}).get("name", "retriever"), metadata)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "tool", kwargs.get("name") or (serialized or {}).get("name", "tool"), metadata)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, **({"documents": len(output)} if isinstance(output, list) else {}))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+def graph_callbacks():
+    """Callbacks to compile into a graph: the instrumentation handler, or none when it is off."""
+    instrumentation = get_instrumentation()
+    return [InstrumentationHandler(instrumentation)] if instrumentation.enabled else []
+
+def call_config(config, node):
+    """Config for a model call made outside a graph run, so it is still recorded under its thread."""
+    metadata = {"thread_id": config["configurable"]["thread_id"], "langgraph_node": node}
+    return {"callbacks": graph_callbacks(), "metadata": metadata}
+
+class InstrumentedEmbeddings(Embeddings):
+    """Embeddings wrapper recording each call, under the graph run it is made in if any."""
+
+    def __init__(self, embeddings: Embeddings, name: str, instrumentation: Instrumentation):
+        self.embeddings = embeddings
+        self.name = name
+        self.instrumentation = instrumentation
+
+    def _timed(self, embed, texts):
+        start = time.perf_counter()
+        fields = {"texts": len(texts)}
+        try:
+            return embed()
+        except Exception as e:
+            fields["error"] = repr(e)
+            raise
+        finally:
+            # Inside a runnable (e.g. a retriever in a graph node) LangChain exposes the run's config
+            metadata = (var_child_runnable_config.get() or {}).get("metadata", {})
+            self.instrumentation.record("embedding", self.name, time.perf_counter() - start, **_graph_context(metadata), **fields)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._timed(lambda: self.embeddings.embed_documents(texts), texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._timed(lambda: self.embeddings.embed_query(text), [text])
+
+def instrument_embeddings(embeddings, name):
+    """Wrap embeddings in InstrumentedEmbeddings when instrumentation is on."""
+    instrumentation = get_instrumentation()
+    if not instrumentation.enabled:
+        return embeddings
+    return InstrumentedEmbeddings(embeddings, name, instrumentation)
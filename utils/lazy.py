@@ -0,0 +1,29 @@
+import functools
+import threading
+
+def lazy_singleton(factory):
+    """
+    Turn a zero-argument factory into a process-wide singleton built on first call.
+
+    Construction is guarded by a lock so concurrent first calls (e.g. from several
+    Streamlit sessions) build the object only once. Call .reset() to drop it, or
+    .override(value) to serve value instead (e.g. a local stand-in in benchmarks).
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    def override(value):
+        with lock:
+            instance[:] = [value]
+
+    get.reset = instance.clear
+    get.override = override
+    return get
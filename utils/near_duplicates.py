@@ -0,0 +1,146 @@
+import hashlib
+import re
+
+import numpy as np
+
+# Chunks whose 64-bit SimHashes differ in at most this many bits are near-duplicates
+SIMHASH_MAX_DISTANCE = 3
+SHINGLE_WORDS = 3
+# Metadata key the fingerprint is stored under, as a hex string (Chroma metadata ints are signed)
+SIMHASH_METADATA_KEY = "simhash"
+
+# MinHash signatures of whole documents: 128 permutations in 16 LSH bands of 8 rows
+# make pairs above roughly 0.7 Jaccard likely to share a band
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 16
+DOCUMENT_SHINGLE_WORDS = 5
+MERSENNE_PRIME = (1 << 31) - 1
+_permutation_rng = np.random.default_rng(1)
+PERMUTATION_A = _permutation_rng.integers(1, MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _permutation_rng.integers(0, MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Overlapping runs of size lowercased words; short texts give a single shingle."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+def simhash(text):
+    """64-bit SimHash of the word shingles of text."""
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little") for shingle in shingles(text)],
+        dtype=np.uint64,
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    return int(np.packbits(votes > 0, bitorder="little").view("<u8")[0])
+
+def minhash(text, shingle_words=DOCUMENT_SHINGLE_WORDS):
+    """MinHash signature of the word shingles of text, as a list of MINHASH_PERMUTATIONS ints."""
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "little")
+         for shingle in set(shingles(text, shingle_words))],
+        dtype=np.uint64,
+    )
+    # a * h + b stays below 2**64 because a < 2**31 and h < 2**32
+    permuted = (PERMUTATION_A[:, None] * hashes[None, :] + PERMUTATION_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).tolist()
+
+def lsh_bands(signature, bands=LSH_BANDS):
+    """Keys of the LSH buckets a signature falls into, one per band."""
+    rows = len(signature) // bands
+    return [
+        f"{band}:{hashlib.blake2b(repr(signature[band * rows:(band + 1) * rows]).encode(), digest_size=8).hexdigest()}"
+        for band in range(bands)
+    ]
+
+def estimated_jaccard(signature, other):
+    """Share of MinHash positions two signatures agree on, an estimate of their Jaccard similarity."""
+    return sum(a == b for a, b in zip(signature, other)) / len(signature)
+
+class SimHashIndex:
+    """
+    Finds stored fingerprints within max_distance bits of a query.
+
+    Fingerprints are split into max_distance + 1 bands. Two fingerprints that differ
+    in at most max_distance bits agree exactly on at least one band, so only the
+    entries sharing a band value need an exact distance check.
+    """
+
+    def __init__(self, max_distance=SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.band_bits = 64 // (max_distance + 1)
+        self.bands = [{} for _ in range(max_distance + 1)]
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        for band in range(len(self.bands)):
+            yield band, (fingerprint >> (band * self.band_bits)) & mask
+
+    def add(self, fingerprint, key):
+        for band, value in self._band_keys(fingerprint):
+            self.bands[band].setdefault(value, []).append((fingerprint, key))
+
+    def find(self, fingerprint, exclude=None):
+        """Return the key of a stored near-duplicate of fingerprint, skipping keys equal to exclude."""
+        for band, value in self._band_keys(fingerprint):
+            for candidate, key in self.bands[band].get(value, ()):
+                if key != exclude and bin(candidate ^ fingerprint).count("1") <= self.max_distance:
+                    return key
+        return None
+
+class NearDuplicateFilter:
+    """
+    Corpus-level filter that drops chunks nearly identical to a chunk of another source.
+
+    Boilerplate that survives cleaning (benefits blurbs, equal-opportunity statements,
+    the same advert reposted under several job IDs) is then embedded and stored once.
+    Matches within the same source are ignored, so an edited chunk of a posting is
+    never dropped in favour of its own previous version. Kept chunks carry their
+    fingerprint in metadata, so later runs can load the index from the store.
+    """
+
+    def __init__(self, max_distance=SIMHASH_MAX_DISTANCE):
+        self.index = SimHashIndex(max_distance)
+        self.dropped = 0
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, max_distance=SIMHASH_MAX_DISTANCE, page_size=5000):
+        """Build a filter indexing the fingerprints of every stored chunk that has one."""
+        near_duplicates = cls(max_distance)
+        offset = 0
+        while True:
+            page = vectorstore.get(include=["metadatas"], limit=page_size, offset=offset)
+            for metadata in page["metadatas"]:
+                fingerprint = (metadata or {}).get(SIMHASH_METADATA_KEY)
+                if fingerprint:
+                    near_duplicates.index.add(int(fingerprint, 16), metadata.get("source"))
+            if len(page["ids"]) < page_size:
+                break
+            offset += page_size
+        return near_duplicates
+
+    @staticmethod
+    def fingerprint(chunks):
+        """Store each chunk's SimHash in its metadata; safe to run off the filtering thread."""
+        for chunk in chunks:
+            chunk.metadata[SIMHASH_METADATA_KEY] = f"{simhash(chunk.page_content):016x}"
+        return chunks
+
+    def filter(self, chunks):
+        """Return the chunks that are not near-duplicates of an indexed chunk, indexing them."""
+        kept = []
+        for chunk in chunks:
+            if SIMHASH_METADATA_KEY not in chunk.metadata:
+                self.fingerprint([chunk])
+            fingerprint = int(chunk.metadata[SIMHASH_METADATA_KEY], 16)
+            source = chunk.metadata.get("source")
+            if self.index.find(fingerprint, exclude=source) is not None:
+                self.dropped += 1
+                continue
+            self.index.add(fingerprint, source)
+            kept.append(chunk)
+        return kept
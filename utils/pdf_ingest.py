@@ -0,0 +1,182 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import io
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+# Chunks embedded and written per call
+EMBED_BATCH_SIZE = 256
+
+def parse_pdf(name, data):
+    """
+    Extract the text of every page of a PDF held in memory.
+
+    Runs in a worker process, so it only takes and returns plain picklable values.
+
+    Returns:
+        Tuple of (name, list of (page number, text) for pages that have text)
+    """
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(data))
+    pages = []
+    for number, page in enumerate(reader.pages):
+        text = page.extract_text() or ""
+        if text.strip():
+            pages.append((number, text))
+    return name, pages
+
+class IngestProgress:
+    """Counters of one ingest, updated by the ingesting thread and read by the UI."""
+
+    def __init__(self, total_files):
+        self.lock = threading.Lock()
+        self.total_files = total_files
+        self.files = 0
+        self.pages = 0
+        self.chunks = 0
+        self.stored = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.errors = []
+        self.done = False
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def update(self, **increments):
+        with self.lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def fail(self, message):
+        with self.lock:
+            self.errors.append(message)
+            self.files += 1
+
+    def finish(self):
+        with self.lock:
+            self.done = True
+            self.finished_at = time.time()
+
+    def fraction(self):
+        """Share of the work done: files parsed, then chunks stored, weighted equally."""
+        with self.lock:
+            parsed = self.files / self.total_files if self.total_files else 1.0
+            pending = self.chunks - self.unchanged
+            stored = self.stored / pending if pending else parsed
+            return 1.0 if self.done else min(1.0, (parsed + stored) / 2)
+
+    def summary(self):
+        with self.lock:
+            return (
+                f"{self.files}/{self.total_files} files, {self.pages} pages, "
+                f"{self.stored} chunks stored, {self.unchanged} unchanged"
+            )
+
+def ingest_pdfs(files, vectorstore_path="./chroma", workers=None, embed_batch_size=EMBED_BATCH_SIZE,
+                progress=None, on_progress=None):
+    """
+    Parse PDFs in a process pool and stream their chunks into Chroma.
+
+    Files are parsed from memory in parallel. As each one finishes, its pages are
+    split, diffed against what is stored for that file, and the new or changed
+    chunks are embedded and written in batches while the remaining files are
+    still being parsed.
+
+    Args:
+        files: List of (name, PDF bytes) tuples; name is stored as the chunk source
+        vectorstore_path: Path of the Chroma persist directory
+        workers: Number of parsing processes; defaults to the number of cores
+        embed_batch_size: Maximum number of chunks per embedding call
+        progress: IngestProgress to update, e.g. one the UI is polling
+        on_progress: Called with the progress after every file and batch
+
+    Returns:
+        The IngestProgress of this ingest
+    """
+    # Imported here so parsing processes do not load the ingestion stack
+    from langchain_core.documents import Document
+    from db.answer_cache import get_answer_cache
+    from populate_database import prepare_chunks, diff_source, upsert_embedded, PendingSources
+    from utils.embeddings import open_vectorstore
+
+    progress = progress or IngestProgress(len(files))
+    notify = on_progress or (lambda progress: None)
+    vectorstore = open_vectorstore(vectorstore_path)
+    pending = []
+    # A file's stale chunks are only deleted once its changed chunks are stored
+    pending_sources = PendingSources()
+
+    def delete_stale(stale_ids):
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+            progress.update(deleted=len(stale_ids))
+
+    def store(batch):
+        vectors = vectorstore.embeddings.embed_documents([chunk.page_content for chunk in batch])
+        upsert_embedded(vectorstore, batch, vectors)
+        progress.update(stored=len(batch))
+        delete_stale(pending_sources.stored(batch)[0])
+        notify(progress)
+
+    workers = min(workers or os.cpu_count() or 1, max(1, len(files)))
+    # Spawned workers do not inherit the threads and open handles of the Streamlit server
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(parse_pdf, name, data): name for name, data in files}
+        for future in as_completed(futures):
+            try:
+                name, pages = future.result()
+            except Exception as e:
+                progress.fail(f"{futures[future]}: {e}")
+                notify(progress)
+                continue
+
+            documents = [Document(page_content=text, metadata={"source": name, "page": number}) for number, text in pages]
+            chunks = prepare_chunks(documents)
+            changed, stale_ids = diff_source(vectorstore, name, chunks)
+            if changed:
+                pending_sources.add(name, len(changed), stale_ids)
+            else:
+                delete_stale(stale_ids)
+            progress.update(files=1, pages=len(pages), chunks=len(chunks), unchanged=len(chunks) - len(changed))
+            notify(progress)
+
+            pending.extend(changed)
+            while len(pending) >= embed_batch_size:
+                store(pending[:embed_batch_size])
+                pending = pending[embed_batch_size:]
+
+    if pending:
+        store(pending)
+    if progress.stored or progress.deleted:
+        # Cached answers may no longer match what retrieval would return
+        get_answer_cache().invalidate()
+    progress.finish()
+    notify(progress)
+    return progress
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def start_ingest_job(files, **kwargs):
+    """Run ingest_pdfs on a background thread and return a job ID to poll with get_ingest_job."""
+    job_id = uuid.uuid4().hex
+    progress = IngestProgress(len(files))
+    with _jobs_lock:
+        _jobs[job_id] = progress
+
+    def run():
+        try:
+            ingest_pdfs(files, progress=progress, **kwargs)
+        except Exception as e:
+            with progress.lock:
+                progress.errors.append(str(e))
+            progress.finish()
+
+    threading.Thread(target=run, name=f"ingest-{job_id[:8]}", daemon=True).start()
+    return job_id
+
+def get_ingest_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
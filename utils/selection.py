@@ -1,9 +1,78 @@
-from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI
+from utils.lazy import lazy_singleton
+import threading
+
+DEFAULT_MODEL = "deepseek-r1:7b"
+MODEL_PROVIDERS = {
+    "gpt-4o-mini": "openai",
+    "deepseek-r1:7b": "ollama",
+}
+
+# How long Ollama keeps a model loaded after its last request
+OLLAMA_KEEP_ALIVE = "30m"
+
+_models = {}
+_models_lock = threading.Lock()
+_warmed_up = set()
+
+@lazy_singleton
+def _openai_http_clients():
+    """HTTP clients shared by every OpenAI chat model so they reuse one connection pool."""
+    import httpx
+    limits = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+    return httpx.Client(limits=limits), httpx.AsyncClient(limits=limits)
+
+def _build_model(model_name, params):
+    provider = MODEL_PROVIDERS.get(model_name, "ollama" if ":" in model_name else "openai")
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        http_client, http_async_client = _openai_http_clients()
+        # Report token usage on streamed responses too, for utils.instrumentation
+        params.setdefault("stream_usage", True)
+        return ChatOpenAI(model=model_name, http_client=http_client, http_async_client=http_async_client, **params)
+
+    from langchain_ollama import ChatOllama
+    params.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+    return ChatOllama(model=model_name, **params)
+
+def get_chat_model(model_name=DEFAULT_MODEL, **params):
+    """
+    Return the process-wide chat model client for a model name and parameters.
+
+    Clients are built once per (model_name, params) combination and reused across
+    Streamlit reruns, sessions and graph nodes.
+    """
+    key = (model_name, tuple(sorted(params.items())))
+    with _models_lock:
+        if key not in _models:
+            _models[key] = _build_model(model_name, dict(params))
+        return _models[key]
+
+def register_chat_model(model_name, model):
+    """Serve model_name from an already built chat model, e.g. a local stand-in in benchmarks."""
+    with _models_lock:
+        _models[(model_name, ())] = model
+        # Nothing to load into memory ahead of the first request
+        _warmed_up.add(model_name)
+
+def _load_ollama_model(model):
+    try:
+        import ollama
+        # An empty prompt loads the model into memory without generating anything
+        ollama.Client(host=model.base_url).generate(model=model.model, keep_alive=model.keep_alive)
+    except Exception as e:
+        print(f"Warm-up of {model.model} failed: {e}")
+
+def warm_up(model_name):
+    """Start loading a model in the background so the first request does not pay for it."""
+    with _models_lock:
+        if model_name in _warmed_up:
+            return
+        _warmed_up.add(model_name)
+
+    model = get_chat_model(model_name)
+    if MODEL_PROVIDERS.get(model_name) == "ollama" or ":" in model_name:
+        threading.Thread(target=_load_ollama_model, args=(model,), daemon=True).start()
 
 def configure_model(model_name):
-    model_mapper = {
-        "gpt-4o-mini": ChatOpenAI(model=model_name),
-        "deepseek-r1:7b": ChatOllama(model=model_name)
-    }
-    return model_mapper[model_name]
+    warm_up(model_name)
+    return get_chat_model(model_name)
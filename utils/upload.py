@@ -1,54 +1,77 @@
+import hashlib
 import streamlit as st
-from langchain_community.document_loaders import PyPDFLoader
-import tempfile
-import os
-from populate_database import split_documents, add_to_chroma
 
 @st.dialog("Upload documents")
 def upload_dialog():
     with st.form("upload-form", clear_on_submit=True):
         uploaded_files = st.file_uploader("Choose a document to upload", accept_multiple_files=True)
-        
+        in_background = st.checkbox("Process in the background", value=False,
+                                    help="Keep chatting while the documents are ingested")
+
         if st.form_submit_button("Upload", use_container_width=True):
-            upload_files(uploaded_files)
+            upload_files(uploaded_files, in_background)
+
+def upload_files(files, in_background=False):
+    # Imported here so the ingestion stack is only loaded when something is uploaded
+    from utils.pdf_ingest import ingest_pdfs, start_ingest_job
 
-def upload_files(files):
     if files is None or len(files) == 0:
         st.warning("Please select at least one file to upload.")
-        return 
-    
+        return
+
     valid_files = []
     for file in files:
         if file.type == "application/pdf":
             valid_files.append(file)
         else:
             st.warning(f"Skipping non-PDF file: {file.name}")
-            
+
     if len(valid_files) == 0:
         st.warning("No valid PDF files were uploaded.")
         return
 
-    with st.spinner("Uploading documents to Chroma. Please wait...", show_time=True):
-        temp_dir = tempfile.mkdtemp()
-        file_paths = []
-        
-        for uploaded_file in valid_files:
-            file_path = os.path.join(temp_dir, uploaded_file.name)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            file_paths.append(file_path)
-    
-        documents = []
-        for file_path in file_paths:
-            loader = PyPDFLoader(file_path)
-            documents.extend(loader.load())
-        
-        chunks = split_documents(documents)
-        num_uploaded_docs = add_to_chroma(chunks)
-
-        # Clean up: Remove the temporary files
-        for file_path in file_paths:
-            os.remove(file_path)
-        os.rmdir(temp_dir)
-    
-    st.success(f'Successfully uploaded {num_uploaded_docs} to Chroma', icon="✅")
\ No newline at end of file
+    # Parsed straight from the upload buffers; chunks are keyed on the uploaded name plus
+    # a hash of the content, so same-name files do not overwrite each other and
+    # re-uploading a file reuses its chunk IDs and cached embeddings
+    pdfs = {}
+    for uploaded_file in valid_files:
+        data = uploaded_file.getvalue()
+        source = f"{uploaded_file.name}#{hashlib.sha256(data).hexdigest()[:12]}"
+        if source in pdfs:
+            st.warning(f"Skipping duplicate file: {uploaded_file.name}")
+            continue
+        pdfs[source] = data
+    pdfs = list(pdfs.items())
+
+    if in_background:
+        job_id = start_ingest_job(pdfs)
+        st.session_state.setdefault("ingest_jobs", []).append(job_id)
+        st.info(f"Ingesting {len(pdfs)} documents in the background. Progress is shown in the sidebar.")
+        return
+
+    progress_bar = st.progress(0.0, text="Parsing documents...")
+    progress = ingest_pdfs(pdfs, on_progress=lambda progress: progress_bar.progress(progress.fraction(), text=progress.summary()))
+
+    for error in progress.errors:
+        st.warning(f"Could not read {error}")
+    st.success(f'Successfully uploaded {progress.stored} chunks to Chroma', icon="✅")
+
+@st.fragment(run_every=2)
+def ingest_status():
+    """Sidebar progress of background ingest jobs, refreshed every two seconds."""
+    from utils.pdf_ingest import get_ingest_job
+
+    for job_id in list(st.session_state.get("ingest_jobs", [])):
+        progress = get_ingest_job(job_id)
+        if progress is None:
+            st.session_state.ingest_jobs.remove(job_id)
+            continue
+        if progress.done:
+            st.success(f"Ingest finished: {progress.summary()}", icon="✅")
+            for error in progress.errors:
+                st.warning(f"Could not read {error}")
+            if st.button("Dismiss", key=f"dismiss-{job_id}"):
+                st.session_state.ingest_jobs.remove(job_id)
+                st.rerun()
+        else:
+            st.progress(progress.fraction(), text=progress.summary())